@@ -0,0 +1,239 @@
+"""
+성적 분석 파이프라인 벤치마크.
+
+가상 성적표(grade_analyzer.synthetic)로 데이터 크기별 수집, 필터링, analyze_grades,
+탭별 집계, 차트 생성(JSON 직렬화 포함), CSV 내보내기, 해석·추천 규칙 평가와 문구 생성,
+과목 쌍별·그룹 간 유의성 검정, 과목 군집 순서와 학생 군집(학습자 프로필), 시험 이력 추가/조회의
+실행 시간과 최대 메모리를 측정하고 JSON으로 저장합니다. 이전 결과 파일을 --compare로 넘기면 느려진 단계를 표시합니다.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 --label v2 --compare benchmarks/results/v1.json
+"""
+import argparse
+import json
+import platform
+import dataclasses
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from grade_analyzer import clustering, export, significance  # noqa: E402
+from grade_analyzer.analysis import analyze_grades, generate_insights, generate_recommendations  # noqa: E402
+from grade_analyzer.batch import bulk_analyze  # noqa: E402
+from grade_analyzer.charts import box_figure, histogram_counts, histogram_figure, score_bin_edges  # noqa: E402
+from grade_analyzer.grading import assign_grades, grade_counts  # noqa: E402
+from grade_analyzer.groups import GroupStats  # noqa: E402
+from grade_analyzer.history import HistoryStore  # noqa: E402
+from grade_analyzer.index import DatasetIndex  # noqa: E402
+from grade_analyzer.ingest import DatasetCache, load_dataset  # noqa: E402
+from grade_analyzer.rules import default_rules, student_metrics  # noqa: E402
+from grade_analyzer.stats import GradeStats  # noqa: E402
+from grade_analyzer.synthetic import generate_gradebook  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+# 이력 조회 단계에서 미리 쌓아 두는 시험 수와, 이력 단계를 측정하는 최대 학생 수
+# (한 학교의 한 시험 규모를 넘는 크기에서는 이력 저장소를 미리 채우는 데 너무 오래 걸립니다)
+HISTORY_EXAMS = 10
+HISTORY_MAX_ROWS = 100_000
+# 학생 전체의 해석·추천 문구를 만드는 단계를 측정하는 최대 학생 수 (조건 평가는 모든 크기에서 측정)
+INSIGHT_MAX_ROWS = 100_000
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+# --compare에서 느려졌다고 표시할 배율
+REGRESSION_RATIO = 1.2
+
+
+def measure(func, repeat):
+    """
+    func의 가장 빠른 실행 시간(초)과 tracemalloc으로 잰 최대 메모리(MB)를 반환합니다.
+    첫 호출(지연 임포트 등)은 측정에서 제외합니다.
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak / 2 ** 20
+
+
+def build_stages(csv_bytes, workdir):
+    """측정할 단계 이름과 함수. 각 함수는 앞 단계의 결과에 의존하지 않도록 필요한 입력을 미리 만듭니다."""
+    dataset = load_dataset(csv_bytes, 'bench.csv', cache=DatasetCache(), persist=False)
+    df, score_cols = dataset.df, dataset.score_cols
+    stats = GradeStats.from_frame(df, score_cols)
+    index = DatasetIndex(stats.row_means, df['이름'])
+    rows = index.select(60, 90)
+    filtered = stats.subset(rows)
+    filtered_grades = assign_grades(filtered.row_means)
+    first_name = df['이름'].iloc[0]
+    first_id = df['학번'].iloc[0]
+    history = HistoryStore(Path(workdir) / 'history.sqlite3')
+    appended = [0]
+
+    def ingest():
+        load_dataset(csv_bytes, 'bench.csv', cache=DatasetCache(), persist=False)
+
+    def filtering():
+        fresh = GradeStats.from_frame(df, score_cols)
+        fresh_index = DatasetIndex(fresh.row_means, df['이름'])
+        fresh.subset(fresh_index.select(60, 90))
+
+    def analyze():
+        analyze_grades(None, score_cols, stats=GradeStats.from_frame(df, score_cols))
+        analyze_grades(None, score_cols, first_name, stats, student_pos=index.lookup(first_name))
+
+    def aggregations():
+        fresh = filtered.subset(slice(None))
+        fresh.summary_table()
+        fresh.corr
+        fresh.overall_median
+        fresh.overall_std
+        grade_counts(assign_grades(fresh.row_means))
+
+    def figures():
+        edges = score_bin_edges(filtered.overall_min, filtered.overall_max)
+        histogram_figure(histogram_counts(filtered.flat, edges), edges, 'hist').to_json()
+        box_figure(filtered.matrix, score_cols, 'box').to_json()
+
+    def csv_export():
+        export.export_bytes('CSV', export.student_table(dataset, filtered, rows, filtered_grades))
+
+    def rule_matching():
+        # 학생 전체의 지표 배열에 규칙 조건을 마스크 연산으로 한 번에 평가합니다
+        default_rules().match('개인', student_metrics(stats))
+
+    def insight_text():
+        names = df['이름'].to_numpy()
+        for analysis in bulk_analyze(stats, names):
+            generate_insights(analysis)
+            generate_recommendations(analysis)
+
+    def significance_tests():
+        significance.corr_pvalues(stats)
+        significance.paired_tests(stats)
+        significance.group_tests(GroupStats(stats, df['반'].to_numpy()))
+        significance.outliers(stats)
+
+    def clusters():
+        clustering.subject_order(stats.corr)
+        clustering.learner_profiles(stats, 4)
+
+    def history_append():
+        appended[0] += 1
+        fresh = HistoryStore(Path(workdir) / f'append-{appended[0]}.sqlite3')
+        fresh.append(dataset, stats=stats)
+
+    def history_trend():
+        history.exams()
+        history.subject_trend()
+        history.student_trend(first_id)
+        history.student_totals(first_id)
+
+    stages = [
+        ('ingest', ingest),
+        ('filtering', filtering),
+        ('analyze_grades', analyze),
+        ('tab_aggregations', aggregations),
+        ('figures', figures),
+        ('csv_export', csv_export),
+        ('rule_matching', rule_matching),
+        ('significance', significance_tests),
+        ('clustering', clusters),
+    ]
+    if len(df) <= INSIGHT_MAX_ROWS:
+        stages.append(('insight_text', insight_text))
+    if len(df) <= HISTORY_MAX_ROWS:
+        # 같은 성적표를 다른 시험으로 여러 번 쌓아 둔 이력 저장소에서 조회합니다
+        for i in range(HISTORY_EXAMS):
+            history.append(dataclasses.replace(dataset, key=f'{dataset.key}-{i}'), f'시험{i + 1}', stats=stats)
+        stages += [('history_append', history_append), ('history_trend', history_trend)]
+    return stages
+
+
+def run(sizes, repeat, n_subjects, seed):
+    results = []
+    for n in sizes:
+        df = generate_gradebook(n, n_subjects, n_classes=10, distribution='normal', seed=seed)
+        csv_bytes = df.to_csv(index=False).encode('utf-8')
+        del df
+        with tempfile.TemporaryDirectory() as workdir:
+            for stage, func in build_stages(csv_bytes, workdir):
+                seconds, peak_mb = measure(func, repeat)
+                results.append({'rows': n, 'stage': stage, 'seconds': seconds, 'peak_mb': peak_mb})
+                print(f"{n:>9,}행  {stage:<18} {seconds * 1000:>10.1f} ms  {peak_mb:>9.1f} MB", flush=True)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous_path):
+    """이전 결과와 비교해 REGRESSION_RATIO배 넘게 느려진 단계를 출력하고 개수를 반환합니다."""
+    previous = json.loads(Path(previous_path).read_text(encoding='utf-8'))
+    before = {(r['rows'], r['stage']): r['seconds'] for r in previous['results']}
+    regressions = 0
+    print(f"\n{previous.get('label')} 대비:")
+    for r in results:
+        old = before.get((r['rows'], r['stage']))
+        if not old:
+            continue
+        ratio = r['seconds'] / old
+        flag = '  ← 느려짐' if ratio > REGRESSION_RATIO else ''
+        regressions += bool(flag)
+        print(f"{r['rows']:>9,}행  {r['stage']:<18} ×{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='학생 수 목록')
+    parser.add_argument('--subjects', type=int, default=5, help='과목 수')
+    parser.add_argument('--repeat', type=int, default=3, help='단계별 반복 횟수 (가장 빠른 값 사용)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', default=None, help='결과 이름 (기본: git 리비전)')
+    parser.add_argument('--out', default=None, help='결과 JSON 경로 (기본: benchmarks/results/<label>.json)')
+    parser.add_argument('--compare', default=None, help='비교할 이전 결과 JSON')
+    args = parser.parse_args(argv)
+
+    label = args.label or git_revision() or datetime.now().strftime('%Y%m%d-%H%M%S')
+    results = run(args.sizes, args.repeat, args.subjects, args.seed)
+    report = {
+        'label': label,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'subjects': args.subjects,
+        'results': results,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f'{label}.json'
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    print(f"\n결과 저장: {out}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
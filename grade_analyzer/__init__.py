@@ -0,0 +1,20 @@
+"""
+성적 데이터 시각화 분석기의 분석 코어 패키지.
+
+Streamlit 없이도 사용할 수 있으며, plotly·pyarrow 같은 무거운 라이브러리는
+차트나 Arrow 파일이 필요할 때만 불러옵니다.
+
+    from grade_analyzer import load_dataset, analyze_grades
+"""
+from grade_analyzer.analysis import analyze_grades, generate_insights, generate_recommendations
+from grade_analyzer.ingest import Dataset, load_dataset
+from grade_analyzer.stats import GradeStats
+
+__all__ = [
+    'Dataset',
+    'GradeStats',
+    'analyze_grades',
+    'generate_insights',
+    'generate_recommendations',
+    'load_dataset',
+]
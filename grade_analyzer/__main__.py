@@ -0,0 +1,5 @@
+import sys
+
+from grade_analyzer.cli import main
+
+sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+성적 분석과 비판적 해석/행동 추천 생성.
+
+Streamlit 앱과 일괄 리포트 생성, 배치 작업이 함께 사용하는 분석 코어입니다.
+해석·추천 문구와 그 조건은 rules 모듈의 규칙표로 정의합니다.
+"""
+import numpy as np
+
+from grade_analyzer.rules import default_rules
+from grade_analyzer.stats import GradeStats
+
+
+def top_subjects(matrix, top=2):
+    """
+    행(학생)마다 점수가 가장 높은/낮은 과목 위치 (strengths, weaknesses), 각각 (학생 수, top) 배열.
+
+    강점은 오름차순(마지막이 최고), 약점도 오름차순(처음이 최저)입니다. 결측 과목은 ±inf로 가려
+    점수가 있는 과목보다 먼저 뽑히지 않게 하고, 점수가 top개보다 적어 결측 과목이 들어간 칸은 -1로 둡니다.
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float64))
+    n, k = matrix.shape
+    top = min(top, k)
+    missing = np.isnan(matrix)
+    high = np.where(missing, -np.inf, matrix)
+    low = np.where(missing, np.inf, matrix)
+    strengths = np.argpartition(high, k - top, axis=1)[:, k - top:]
+    weaknesses = np.argpartition(low, top - 1, axis=1)[:, :top]
+    rows = np.arange(n)[:, None]
+    strengths = np.take_along_axis(strengths, np.argsort(high[rows, strengths], axis=1, kind='stable'), axis=1)
+    weaknesses = np.take_along_axis(weaknesses, np.argsort(low[rows, weaknesses], axis=1, kind='stable'), axis=1)
+    strengths[missing[rows, strengths]] = -1
+    weaknesses[missing[rows, weaknesses]] = -1
+    return strengths, weaknesses
+
+
+def subject_names(subjects, positions):
+    """top_subjects의 한 행을 과목 이름 배열로 바꿉니다 (결측 칸 -1은 뺍니다)."""
+    return subjects[positions[positions >= 0]]
+
+
+def analyze_grades(df_data, score_cols, student_name=None, stats=None, student_pos=None):
+    """
+    성적 데이터를 분석하고 비판적 해석 및 추천을 제공합니다.
+    stats(GradeStats)를 넘기면 이미 계산된 집계값을 재사용하고, student_pos(stats 안의 행 순번)를
+    넘기면 이름 검색 없이 해당 학생을 분석합니다. 둘 다 주어지면 df_data는 None이어도 됩니다.
+    """
+    analysis = {}
+    if stats is None:
+        stats = GradeStats.from_frame(df_data, score_cols)
+    subjects = np.asarray(score_cols)
+    if student_name and student_pos is None and df_data is not None and student_name in df_data['이름'].values:
+        student_pos = np.flatnonzero(df_data['이름'].to_numpy() == student_name)[0]
+    
+    if student_name and student_pos is not None:
+        # 개인별 분석
+        pos = student_pos
+        student_scores = stats.matrix[pos].astype(np.float64)
+        student_avg = stats.row_means[pos]
+        class_avg = stats.col_means.mean()
+        
+        analysis['type'] = '개인'
+        analysis['name'] = student_name
+        analysis['avg'] = student_avg
+        analysis['class_avg'] = class_avg
+        # 상위/하위 2개 과목 (결측 과목은 빼고, 일괄 분석과 같은 기준)
+        strengths, weaknesses = top_subjects(student_scores)
+        analysis['strengths'] = subject_names(subjects, strengths[0])
+        analysis['weaknesses'] = subject_names(subjects, weaknesses[0])
+        analysis['scores'] = dict(zip(score_cols, student_scores))
+        # 정렬된 평균에 대한 이진 탐색 (동점자는 절반만 아래로 셈)
+        analysis['percentile'] = stats.ranks.percentile(student_avg)
+        analysis['rank'] = stats.ranks.rank(student_avg)
+        analysis['n_ranked'] = stats.ranks.n_ranked
+        analysis['subject_percentiles'] = stats.ranks.student_subject_percentiles(pos)
+        
+    else:
+        # 반 전체 분석
+        analysis['type'] = '반전체'
+        analysis['avg'] = stats.overall_mean
+        analysis['max'] = stats.overall_max
+        analysis['min'] = stats.overall_min
+        analysis['std'] = stats.overall_std
+        analysis['scores_by_subject'] = dict(zip(score_cols, stats.col_means))
+        
+        # 강점/약점 과목
+        subject_means = stats.col_means
+        analysis['best_subject'] = subjects[np.nanargmax(subject_means)]
+        analysis['worst_subject'] = subjects[np.nanargmin(subject_means)]
+        analysis['best_avg'] = np.nanmax(subject_means)
+        analysis['worst_avg'] = np.nanmin(subject_means)
+    
+    return analysis
+
+def generate_insights(analysis, rules=None):
+    """
+    분석 결과로부터 비판적 해석을 생성합니다.
+    문구와 조건은 규칙표(rules, 기본값은 default_rules.json)를 따릅니다.
+    """
+    return (rules or default_rules()).render_insights(analysis)
+
+def generate_recommendations(analysis, df_data=None, score_cols=None, rules=None):
+    """
+    데이터 기반 행동 연결 추천을 규칙표(rules, 기본값은 default_rules.json)로 생성합니다.
+    추천은 analysis만으로 정해집니다. df_data와 score_cols는 쓰지 않으며, 예전 호출
+    generate_recommendations(analysis, df, score_cols)가 그대로 동작하도록 남겨 둔 인자입니다.
+    """
+    return (rules or default_rules()).render_recommendations(analysis)
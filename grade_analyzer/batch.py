@@ -0,0 +1,190 @@
+"""
+전체 학생 일괄 리포트 생성.
+
+개인별 분석값(평균, 백분위, 강점/약점 과목)은 점수 행렬 전체에 대한 벡터 연산 한 번으로
+계산하고, 학생별 해석/추천 텍스트와 차트 HTML 렌더링만 프로세스 풀로 나누어 처리한 뒤
+zip 파일 하나로 묶습니다.
+"""
+import html
+import io
+import json
+import multiprocessing
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from grade_analyzer.analysis import generate_insights, generate_recommendations, subject_names, top_subjects
+from grade_analyzer.rules import default_rules, student_metrics
+
+# 프로세스 하나에 한 번에 넘기는 학생 수 (프로세스 간 통신 비용을 줄이기 위함)
+CHUNK_SIZE = 100
+# 리포트 HTML이 불러오는 Plotly.js
+PLOTLY_CDN = 'https://cdn.plot.ly/plotly-2.35.2.min.js'
+
+
+def bulk_analyze(stats, names, rules=None):
+    """
+    모든 학생의 개인별 분석 dict 목록을 반환합니다. analyze_grades의 개인별 분석과 같은 형식입니다.
+
+    백분위는 정렬된 평균에 대한 searchsorted로, 강점/약점 과목은 행렬 전체에
+    argpartition을 한 번 적용해 구합니다. 해석·추천 규칙(rules, 기본 규칙표)의 조건도 학생 전체의
+    지표 배열에 한 번에 평가해 'matched'로 붙여 두므로, 문구를 만들 때 학생별 조건 판단이 없습니다.
+    """
+    subjects = np.asarray(stats.score_cols)
+    matrix = stats.matrix.astype(np.float64)
+    row_means = stats.row_means
+    class_avg = stats.col_means.mean()
+
+    # 석차/백분위는 순위 엔진의 전체 학생 배열을 그대로 씁니다
+    percentiles = stats.ranks.percentiles
+    ranks = stats.ranks.ranks
+    subject_percentiles = stats.ranks.subject_percentiles
+
+    # 상위/하위 2개 과목 (analyze_grades와 같은 함수로, 결측 과목은 강점에도 약점에도 넣지 않음)
+    strengths, weaknesses = top_subjects(matrix)
+
+    analyses = []
+    for i, name in enumerate(names):
+        analyses.append({
+            'type': '개인',
+            'name': name,
+            'avg': row_means[i],
+            'class_avg': class_avg,
+            'strengths': subject_names(subjects, strengths[i]),
+            'weaknesses': subject_names(subjects, weaknesses[i]),
+            'scores': dict(zip(stats.score_cols, matrix[i])),
+            'percentile': percentiles[i],
+            'rank': ranks[i],
+            'n_ranked': stats.ranks.n_ranked,
+            'subject_percentiles': dict(zip(stats.score_cols, subject_percentiles[i])),
+        })
+    return (rules or default_rules()).annotate(analyses, student_metrics(stats))
+
+
+def summary_frame(analyses):
+    """일괄 분석 결과 요약표."""
+    return pd.DataFrame({
+        '이름': [a['name'] for a in analyses],
+        '평균': [a['avg'] for a in analyses],
+        '석차': [a['rank'] for a in analyses],
+        '백분위': [a['percentile'] for a in analyses],
+        '강점 과목': [', '.join(a['strengths']) for a in analyses],
+        '개선 필요 과목': [', '.join(a['weaknesses']) for a in analyses],
+    })
+
+
+def _markdown_to_html(text):
+    """해석 문구의 간단한 마크다운(**굵게**, 줄바꿈)을 HTML로 바꿉니다."""
+    text = html.escape(text.strip())
+    text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
+    return text.replace('\n', '<br>')
+
+
+def _chart_specs(analysis, class_scores):
+    """
+    레이더/막대 차트의 Plotly 사양(data, layout)을 일반 dict로 만듭니다.
+
+    학생마다 go.Figure를 만들면 검증 비용이 커서, 리포트에는 JSON 사양만 넣고
+    브라우저의 Plotly.newPlot으로 그립니다.
+    """
+    subjects = [str(subject) for subject in analysis['scores']]
+    scores = [None if np.isnan(score) else float(score) for score in analysis['scores'].values()]
+    class_avg = float(analysis['class_avg'])
+    radar = {
+        'data': [
+            {'type': 'scatterpolar', 'r': scores, 'theta': subjects, 'fill': 'toself', 'name': str(analysis['name'])},
+            {'type': 'scatterpolar', 'r': class_scores, 'theta': subjects, 'fill': 'toself', 'name': '반 평균'},
+        ],
+        'layout': {'polar': {'radialaxis': {'visible': True, 'range': [0, 100]}}, 'height': 450},
+    }
+    bar = {
+        'data': [{'type': 'bar', 'x': subjects, 'y': scores, 'name': '개인 성적', 'marker': {'color': '#1f77b4'}}],
+        'layout': {
+            'xaxis': {'title': {'text': '과목'}},
+            'yaxis': {'title': {'text': '점수'}},
+            'height': 400,
+            'shapes': [{'type': 'line', 'xref': 'paper', 'x0': 0, 'x1': 1, 'y0': class_avg, 'y1': class_avg,
+                        'line': {'color': 'red', 'dash': 'dash'}}],
+            'annotations': [{'xref': 'paper', 'x': 1, 'y': class_avg, 'text': f'반 평균: {class_avg:.1f}',
+                             'showarrow': False, 'xanchor': 'right', 'yanchor': 'bottom'}],
+        },
+    }
+    return radar, bar
+
+
+def render_report(analysis, class_scores, rules=None):
+    """학생 한 명의 해석/추천(rules 규칙표)과 레이더·막대 차트를 담은 HTML 문서를 만듭니다."""
+    radar, bar = _chart_specs(analysis, class_scores)
+
+    parts = [f"<h1>{html.escape(str(analysis['name']))} 학생 성적 리포트</h1>", "<h2>📌 비판적 해석</h2>"]
+    parts += [f"<p>{_markdown_to_html(insight)}</p>" for insight in generate_insights(analysis, rules)]
+    parts.append("<h2>🎯 행동 연결 추천</h2>")
+    for rec in generate_recommendations(analysis, rules=rules):
+        items = ''.join(f"<li>{html.escape(action)}</li>" for action in rec['actions'])
+        parts.append(f"<h3>{html.escape(rec['title'])}</h3><ul>{items}</ul>")
+    parts.append("<h2>📈 과목별 성적</h2>")
+    parts.append('<div id="radar"></div><div id="bar"></div>')
+    parts.append(
+        "<script>"
+        f"Plotly.newPlot('radar', {json.dumps(radar['data'], ensure_ascii=False)}, {json.dumps(radar['layout'], ensure_ascii=False)});"
+        f"Plotly.newPlot('bar', {json.dumps(bar['data'], ensure_ascii=False)}, {json.dumps(bar['layout'], ensure_ascii=False)});"
+        "</script>"
+    )
+    body = '\n'.join(parts)
+    return (
+        '<!DOCTYPE html>\n<html lang="ko"><head><meta charset="utf-8">'
+        f'<script src="{PLOTLY_CDN}"></script></head><body>\n{body}\n</body></html>\n'
+    )
+
+
+def _safe_filename(name):
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', str(name)) or 'student'
+
+
+def _render_chunk(start, analyses, class_scores, rules):
+    # 프로세스 풀 작업 단위: (zip 안 파일 이름, HTML bytes) 목록
+    return [
+        (f"reports/{start + i + 1:05d}_{_safe_filename(a['name'])}.html", render_report(a, class_scores, rules).encode('utf-8'))
+        for i, a in enumerate(analyses)
+    ]
+
+
+def build_reports_zip(analyses, class_scores, progress=None, max_workers=None, rules=None):
+    """
+    학생별 HTML 리포트와 요약표(summary.csv)를 zip bytes로 만듭니다. 해석·추천은 rules 규칙표
+    (bulk_analyze에 넘긴 것과 같은 규칙표, 기본값은 기본 규칙표)를 따릅니다.
+
+    렌더링은 CHUNK_SIZE명씩 프로세스 풀에 나누어 맡기고, 조각이 끝날 때마다
+    progress(완료한 학생 수, 전체 학생 수)를 호출합니다. progress가 예외를 내면 남은 조각을
+    취소하고 그 예외를 그대로 전달합니다.
+    """
+    total = len(analyses)
+    class_scores = [float(score) for score in class_scores]
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('summary.csv', summary_frame(analyses).to_csv(index=False).encode('utf-8-sig'))
+        done = 0
+        # Streamlit 서버처럼 스레드가 있는 프로세스에서 fork하지 않도록 spawn을 사용합니다
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_render_chunk, start, analyses[start:start + CHUNK_SIZE], class_scores, rules)
+                for start in range(0, total, CHUNK_SIZE)
+            ]
+            try:
+                for future in as_completed(futures):
+                    files = future.result()
+                    for filename, content in files:
+                        archive.writestr(filename, content)
+                    done += len(files)
+                    if progress is not None:
+                        progress(done, total)
+            except BaseException:
+                # progress가 예외(예: 작업 취소)를 내면 아직 시작하지 않은 조각은 실행하지 않습니다
+                for future in futures:
+                    future.cancel()
+                raise
+    return buffer.getvalue()
@@ -0,0 +1,73 @@
+"""
+프로세스 전체에서 공유하는 캐시의 크기 추정과 상태(적중률, 메모리) 집계.
+
+데이터셋·통계 객체·보기 결과·백그라운드 작업 결과는 모두 세션과 무관한 키(데이터셋 해시,
+필터 상태 등)로 캐시되어 같은 파일을 연 세션들이 한 벌을 함께 씁니다. 각 캐시는 만들 때
+register()로 이름을 등록하고 metrics()로 자기 상태를 알려 주며, cache_metrics()가 이를 한 표로 모읍니다.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+_registry = {}
+
+
+def register(name, cache):
+    """cache_metrics()에 나타날 캐시를 이름과 함께 등록합니다."""
+    _registry[name] = cache
+    return cache
+
+
+def approx_nbytes(value, _depth=0):
+    """
+    캐시 항목이 차지하는 메모리의 근사값 (bytes).
+
+    배열·DataFrame·bytes는 버퍼 크기를, nbytes 속성이 있는 객체(Dataset, GradeStats 등)는 그 값을,
+    Plotly 차트는 to_plotly_json() 결과를, tuple/list/dict는 원소의 합을 셉니다. 문자열 같은
+    파이썬 객체의 깊은 크기는 세지 않습니다.
+    """
+    if value is None or _depth > 6:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, (int, np.integer)):
+        return int(nbytes)
+    if hasattr(value, 'to_plotly_json'):
+        return approx_nbytes(value.to_plotly_json(), _depth + 1)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_nbytes(item, _depth + 1) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(approx_nbytes(item, _depth + 1) for item in value)
+    return sys.getsizeof(value)
+
+
+def cache_metrics():
+    """등록된 캐시별 항목 수, 적중/실패 횟수, 적중률, 메모리 사용량, 상한, 제거 횟수 표."""
+    rows = []
+    for name, cache in _registry.items():
+        metrics = cache.metrics()
+        lookups = metrics['hits'] + metrics['misses']
+        rows.append({
+            '캐시': name,
+            '항목 수': metrics['entries'],
+            '적중': metrics['hits'],
+            '실패': metrics['misses'],
+            '적중률(%)': metrics['hits'] / lookups * 100 if lookups else np.nan,
+            '메모리(MB)': metrics['nbytes'] / 2 ** 20,
+            '상한(MB)': metrics['max_bytes'] / 2 ** 20 if metrics['max_bytes'] else np.nan,
+            '제거': metrics['evictions'],
+        })
+    return pd.DataFrame(rows, columns=['캐시', '항목 수', '적중', '실패', '적중률(%)', '메모리(MB)', '상한(MB)', '제거'])
+
+
+def resident_bytes():
+    """등록된 모든 캐시가 붙잡고 있는 메모리의 합 (bytes)."""
+    return sum(cache.metrics()['nbytes'] for cache in _registry.values())
@@ -0,0 +1,118 @@
+"""
+서버 측에서 미리 집계한 데이터로 차트를 만드는 함수 모음.
+
+히스토그램은 구간별 개수만, 박스 플롯은 사분위수/수염/평균과 개수를 제한해 표본 추출한
+이상값만 브라우저로 보내므로, Plotly JSON 크기가 학생 수와 무관하게 일정합니다.
+plotly는 차트를 만들 때만 불러옵니다.
+"""
+import numpy as np
+
+DEFAULT_NBINS = 20
+# 박스 플롯에 과목별로 표시할 이상값의 최대 개수
+MAX_OUTLIERS = 200
+
+
+def score_bin_edges(lo=0.0, hi=100.0, nbins=DEFAULT_NBINS):
+    """0~100점을 기본으로, 데이터가 범위를 벗어나면 넓힌 균등 구간 경계를 반환합니다."""
+    lo = min(0.0, lo) if np.isfinite(lo) else 0.0
+    hi = max(100.0, hi) if np.isfinite(hi) else 100.0
+    return np.linspace(lo, hi, nbins + 1)
+
+
+def histogram_counts(values, bin_edges):
+    """결측값을 제외하고 구간별 개수를 셉니다."""
+    values = np.asarray(values)
+    values = values[~np.isnan(values)]
+    counts, _ = np.histogram(values, bins=bin_edges)
+    return counts
+
+
+def histogram_figure(counts, bin_edges, title, mean=None, median=None):
+    """미리 센 구간별 개수로 히스토그램(go.Bar)을 그립니다."""
+    import plotly.graph_objects as go
+
+    bin_edges = np.asarray(bin_edges, dtype=np.float64)
+    fig = go.Figure(go.Bar(
+        x=(bin_edges[:-1] + bin_edges[1:]) / 2,
+        y=counts,
+        width=np.diff(bin_edges),
+        marker_color='#1f77b4',
+        hovertemplate='%{customdata[0]:.0f}~%{customdata[1]:.0f}점: %{y}명<extra></extra>',
+        customdata=np.column_stack([bin_edges[:-1], bin_edges[1:]]),
+    ))
+    fig.update_layout(title=title, xaxis_title="점수", yaxis_title="학생 수", bargap=0)
+    fig.update_xaxes(range=[min(0, bin_edges[0]), max(105, bin_edges[-1])])
+    if mean is not None:
+        fig.add_vline(x=mean, line_dash="dash", line_color="red", annotation_text=f"평균: {mean:.1f}")
+    if median is not None:
+        fig.add_vline(x=median, line_dash="dot", line_color="green", annotation_text=f"중앙값: {median:.1f}")
+    return fig
+
+
+def box_stats(values, max_outliers=MAX_OUTLIERS, seed=0):
+    """
+    박스 플롯용 요약 통계.
+
+    사분위수와 Tukey 수염(1.5×IQR 안쪽의 최소/최대 관측값), 평균/표준편차를 계산하고,
+    이상값은 최대 max_outliers개만 무작위로 추출합니다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)]
+    if outliers.size > max_outliers:
+        outliers = np.random.default_rng(seed).choice(outliers, max_outliers, replace=False)
+    return {
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'lowerfence': inside.min(),
+        'upperfence': inside.max(),
+        'mean': values.mean(),
+        'sd': values.std(ddof=1) if values.size > 1 else 0.0,
+        'outliers': outliers,
+    }
+
+
+def box_figure(matrix, score_cols, title, max_outliers=MAX_OUTLIERS, webgl=False):
+    """
+    과목별 박스 플롯을 미리 계산한 통계(go.Box의 q1/median/q3 등)로 그립니다.
+    webgl이면 이상값 점을 SVG 대신 WebGL(go.Scattergl)로 그립니다.
+    """
+    import plotly.graph_objects as go
+
+    scatter = go.Scattergl if webgl else go.Scatter
+    fig = go.Figure()
+    for i, col in enumerate(score_cols):
+        box = box_stats(matrix[:, i], max_outliers)
+        if box is None:
+            continue
+        fig.add_trace(go.Box(
+            x=[col],
+            name=col,
+            q1=[box['q1']],
+            median=[box['median']],
+            q3=[box['q3']],
+            lowerfence=[box['lowerfence']],
+            upperfence=[box['upperfence']],
+            mean=[box['mean']],
+            sd=[box['sd']],
+            boxmean='sd',
+            legendgroup=col,
+        ))
+        if box['outliers'].size:
+            fig.add_trace(scatter(
+                x=[col] * box['outliers'].size,
+                y=box['outliers'],
+                mode='markers',
+                marker=dict(size=4, opacity=0.6, color='#888888'),
+                name=f'{col} 이상값',
+                legendgroup=col,
+                showlegend=False,
+            ))
+    fig.update_layout(title=title, yaxis_title="점수", height=500)
+    return fig
@@ -0,0 +1,226 @@
+"""
+Streamlit 없이 성적 분석을 실행하는 명령줄 도구.
+
+    python -m grade_analyzer analyze grades.csv --out report.json
+    python -m grade_analyzer analyze term1.csv term2.parquet --students --workers 4 --out reports.json
+    python -m grade_analyzer analyze grades.csv --students --rules school_rules.json
+    python -m grade_analyzer analyze huge.csv --stream --out summary.json
+    python -m grade_analyzer importtime --budget-ms 750
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# 분석 코어를 불러올 때 함께 불러와서는 안 되는 무거운 라이브러리
+# (pyarrow는 설치되어 있으면 pandas가 스스로 불러오므로 검사하지 않습니다)
+HEAVY_MODULES = ('streamlit', 'plotly', 'scipy', 'altair')
+DEFAULT_IMPORT_BUDGET_MS = 750
+NO_SCORES_MESSAGE = "점수가 하나도 없습니다. 성적 컬럼과 값이 들어 있는지 확인하세요."
+
+
+def _jsonable(value):
+    """numpy 값과 NaN을 JSON으로 쓸 수 있는 값으로 바꿉니다."""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def analyze_file(path, include_students=False, persist=True, rules_path=None):
+    """
+    파일 하나를 분석해 반 전체(및 선택 시 학생별) 해석·추천을 담은 dict를 반환합니다.
+    rules_path를 주면 기본 규칙표 대신 그 규칙 파일로 해석·추천을 만듭니다.
+    """
+    from grade_analyzer.analysis import analyze_grades, generate_insights, generate_recommendations
+    from grade_analyzer.batch import bulk_analyze
+    from grade_analyzer.ingest import DatasetCache, load_dataset
+    from grade_analyzer.rules import default_rules, load_rules
+    from grade_analyzer.stats import GradeStats
+
+    rules = load_rules(rules_path) if rules_path else default_rules()
+
+    path = Path(path)
+    # 배치 작업에서는 파일마다 캐시를 새로 써서 처리한 데이터셋을 메모리에 남기지 않습니다
+    dataset = load_dataset(path.read_bytes(), path.name, cache=DatasetCache(max_entries=1), persist=persist)
+    if not dataset.score_cols:
+        skipped = dataset.report.skipped if dataset.report is not None else {}
+        detail = ', '.join(f"{col}({reason})" for col, reason in skipped.items())
+        raise ValueError("성적 컬럼을 찾지 못했습니다." + (f" 제외된 컬럼: {detail}" if detail else ""))
+    stats = GradeStats.from_frame(dataset.df, dataset.score_cols)
+    if np.isnan(stats.matrix).all():
+        raise ValueError(NO_SCORES_MESSAGE)
+    analysis = analyze_grades(None, dataset.score_cols, stats=stats)
+    report = {
+        'file': str(path),
+        'n_students': stats.n_students,
+        'subjects': dataset.score_cols,
+        'class': {
+            'analysis': analysis,
+            'insights': generate_insights(analysis, rules),
+            'recommendations': generate_recommendations(analysis, rules=rules),
+        },
+    }
+    if include_students:
+        df = dataset.df
+        names = df['이름'] if '이름' in df.columns else [f"{i + 1}번" for i in range(len(df))]
+        report['students'] = [
+            {
+                'analysis': {key: value for key, value in student.items() if key != 'matched'},
+                'insights': generate_insights(student, rules),
+                'recommendations': generate_recommendations(student, rules=rules),
+            }
+            for student in bulk_analyze(stats, names, rules)
+        ]
+    return _jsonable(report)
+
+
+def stream_file(path, chunksize=None):
+    """
+    메모리보다 큰 CSV를 디스크에서 청크 단위로 읽어 전체 점수 분포와 과목별 통계 요약을 dict로
+    반환합니다. 한 번에 청크 하나만 메모리에 올리며 학생별 분석은 하지 않습니다.
+    """
+    from grade_analyzer.columnar import detect_format
+    from grade_analyzer.streaming import DEFAULT_CHUNKSIZE, summarize_stream
+
+    path = Path(path)
+    if detect_format(path.name) != 'csv':
+        raise ValueError("스트리밍 모드는 CSV 파일만 읽을 수 있습니다.")
+    summary = summarize_stream(path, chunksize or DEFAULT_CHUNKSIZE)
+    if not summary.overall_count:
+        raise ValueError(NO_SCORES_MESSAGE)
+    return _jsonable({
+        'file': str(path),
+        'n_students': summary.n_rows,
+        'subjects': summary.score_cols,
+        'overall': {
+            'count': summary.overall_count,
+            'mean': summary.overall_mean,
+            'std': summary.overall_std,
+            'median': summary.overall_median,
+            'min': summary.overall_min,
+            'max': summary.overall_max,
+        },
+        'subject_summary': summary.summary_table().to_dict(orient='records'),
+        'out_of_range': dict(zip(summary.score_cols, summary.out_of_range)),
+        'corr': summary.corr.to_dict(),
+    })
+
+
+def _analyze_task(args):
+    path, include_students, persist, rules_path, stream = args
+    try:
+        if stream:
+            return stream_file(path)
+        return analyze_file(path, include_students, persist, rules_path)
+    except (OSError, ValueError) as exc:
+        return {'file': str(path), 'error': str(exc)}
+
+
+def run_analyze(args):
+    if args.rules:
+        # 규칙 파일 오류는 파일마다 반복하지 않고 시작할 때 한 번 알립니다
+        from grade_analyzer.rules import load_rules
+        try:
+            load_rules(args.rules)
+        except (OSError, ValueError) as exc:
+            print(f"오류: 규칙 파일 {args.rules}: {exc}", file=sys.stderr)
+            return 2
+    if args.stream and (args.students or args.rules):
+        print("오류: --stream은 --students, --rules와 함께 쓸 수 없습니다 (학생별 분석을 하지 않습니다)", file=sys.stderr)
+        return 2
+    tasks = [(path, args.students, not args.no_store, args.rules, args.stream) for path in args.files]
+    workers = args.workers or min(len(tasks), os.cpu_count() or 1)
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            reports = list(pool.map(_analyze_task, tasks))
+    else:
+        reports = [_analyze_task(task) for task in tasks]
+
+    failed = [report for report in reports if 'error' in report]
+    for report in failed:
+        print(f"오류: {report['file']}: {report['error']}", file=sys.stderr)
+
+    output = reports[0] if len(reports) == 1 else reports
+    text = json.dumps(output, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+    return 1 if failed else 0
+
+
+def measure_import_time(module='grade_analyzer', repeat=3):
+    """
+    새 인터프리터에서 module을 불러오는 데 걸린 시간(ms, 가장 빠른 값)과
+    함께 불러온 무거운 라이브러리 목록을 반환합니다. 불러오기가 실패하면 CalledProcessError를 냅니다.
+    """
+    code = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "print((time.perf_counter() - t) * 1000)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(Path(__file__).resolve().parent.parent), os.environ.get('PYTHONPATH')])))
+    timings, heavy = [], []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=env)
+        elapsed, loaded = result.stdout.split('\n')[:2]
+        timings.append(float(elapsed))
+        heavy = [name for name in loaded.split(',') if name]
+    return min(timings), heavy
+
+
+def run_importtime(args):
+    try:
+        elapsed, heavy = measure_import_time(repeat=args.repeat)
+    except subprocess.CalledProcessError as exc:
+        print("grade_analyzer를 불러오지 못했습니다:", file=sys.stderr)
+        print(exc.stderr.rstrip(), file=sys.stderr)
+        return 1
+    print(f"grade_analyzer 가져오기: {elapsed:.0f} ms (예산 {args.budget_ms} ms)")
+    if heavy:
+        print(f"함께 불러온 무거운 라이브러리: {', '.join(heavy)}", file=sys.stderr)
+    if elapsed > args.budget_ms or heavy:
+        print("가져오기 예산 초과", file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m grade_analyzer', description='성적 데이터 분석 (Streamlit 없이 실행)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    analyze = subparsers.add_parser('analyze', help='성적 파일(CSV/Parquet/Arrow)을 분석해 JSON 리포트를 만듭니다')
+    analyze.add_argument('files', nargs='+', help='분석할 성적 파일')
+    analyze.add_argument('--out', help='JSON 리포트를 쓸 경로 (생략하면 표준 출력)')
+    analyze.add_argument('--students', action='store_true', help='학생별 분석·해석·추천도 포함')
+    analyze.add_argument('--workers', type=int, default=None, help='동시에 처리할 프로세스 수 (기본: 파일 수와 CPU 수 중 작은 값)')
+    analyze.add_argument('--no-store', action='store_true', help='로컬 데이터셋 저장소를 사용하지 않음')
+    analyze.add_argument('--rules', help='해석·추천 규칙 파일 (JSON, 기본: 패키지의 default_rules.json)')
+    analyze.add_argument('--stream', action='store_true',
+                         help='메모리보다 큰 CSV를 청크 단위로 읽어 점수 분포와 과목별 통계 요약만 계산')
+    analyze.set_defaults(func=run_analyze)
+
+    importtime = subparsers.add_parser('importtime', help='분석 코어의 콜드 임포트 시간을 측정하고 예산과 비교합니다')
+    importtime.add_argument('--budget-ms', type=float, default=DEFAULT_IMPORT_BUDGET_MS)
+    importtime.add_argument('--repeat', type=int, default=3)
+    importtime.set_defaults(func=run_importtime)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,198 @@
+"""
+과목 상관관계의 계층적 군집 순서와 학생 군집(학습자 프로필).
+
+과목이 수십 개면 상관관계 히트맵을 과목 이름 순으로 그려서는 구조가 보이지 않으므로,
+상관계수로 거리(1 - r)를 만들어 평균 연결 계층적 군집의 잎 순서로 과목을 다시 배열합니다.
+학생 군집은 과목별 z점수(결측은 과목 평균 = 0으로 채움)에 k-평균을 적용하며, 학생이 많으면
+무작위 미니배치로 중심을 갱신한 뒤 전체 학생을 한 번만 배정합니다. scipy는 계층적 군집을
+실제로 계산할 때만 불러옵니다.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from grade_analyzer.significance import z_scores
+
+# 최적 잎 순서(optimal_ordering)를 계산하는 최대 과목 수 (과목 수에 대해 빠르게 느려집니다)
+OPTIMAL_ORDER_MAX_SUBJECTS = 100
+# 이보다 학생이 많으면 미니배치 k-평균을 씁니다
+FULL_KMEANS_MAX_ROWS = 20_000
+BATCH_SIZE = 4096
+MAX_ITER = 100
+# 중심 이동량(z점수 단위)이 이보다 작으면 수렴한 것으로 봅니다
+TOLERANCE = 1e-4
+# 거리 계산에서 한 번에 처리하는 학생 수
+CHUNK_ROWS = 1 << 16
+
+
+def subject_order(corr):
+    """
+    상관계수 DataFrame의 과목을 비슷한 과목끼리 이웃하도록 배열한 위치 배열.
+    함께 수강한 학생이 없어 상관계수가 NaN인 쌍은 상관이 없는 것(거리 1)으로 봅니다.
+    """
+    k = len(corr)
+    if k <= 2:
+        return np.arange(k)
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
+
+    distance = 1 - np.nan_to_num(corr.to_numpy(dtype=np.float64), nan=0.0)
+    distance = np.clip((distance + distance.T) / 2, 0, 2)
+    np.fill_diagonal(distance, 0)
+    tree = linkage(squareform(distance, checks=False), 'average', optimal_ordering=k <= OPTIMAL_ORDER_MAX_SUBJECTS)
+    return leaves_list(tree)
+
+
+def _sq_distances(points, centers):
+    # ‖x - c‖² = ‖x‖² - 2x·c + ‖c‖² (반올림으로 생기는 음수는 0으로)
+    return np.maximum((points ** 2).sum(axis=1)[:, None] - 2 * points @ centers.T + (centers ** 2).sum(axis=1), 0)
+
+
+def _assign(points, centers):
+    """가장 가까운 중심 번호와 그 제곱거리. 학생이 많아도 메모리가 늘지 않도록 나눠 계산합니다."""
+    labels = np.empty(len(points), dtype=np.intp)
+    distances = np.empty(len(points))
+    for start in range(0, len(points), CHUNK_ROWS):
+        block = _sq_distances(points[start:start + CHUNK_ROWS], centers)
+        labels[start:start + CHUNK_ROWS] = block.argmin(axis=1)
+        distances[start:start + CHUNK_ROWS] = block.min(axis=1)
+    return labels, distances
+
+
+def _init_centers(points, k, rng):
+    # k-means++: 이미 고른 중심에서 먼 점일수록 다음 중심으로 뽑힐 확률이 큽니다 (표본에서만 고릅니다)
+    sample = points[rng.choice(len(points), min(len(points), 10 * BATCH_SIZE), replace=False)]
+    centers = [sample[rng.integers(len(sample))]]
+    nearest = _sq_distances(sample, np.array(centers))[:, 0]
+    for _ in range(1, k):
+        total = nearest.sum()
+        pick = rng.choice(len(sample), p=nearest / total) if total > 0 else rng.integers(len(sample))
+        centers.append(sample[pick])
+        nearest = np.minimum(nearest, _sq_distances(sample, sample[pick][None])[:, 0])
+    return np.array(centers)
+
+
+def kmeans(points, k, seed=0, max_iter=MAX_ITER):
+    """
+    k-평균 군집. (학생별 군집 번호, 중심 행렬, 중심까지 제곱거리의 합)을 반환합니다.
+
+    FULL_KMEANS_MAX_ROWS명 이하는 모든 점으로 중심을 다시 계산하고(Lloyd), 그보다 많으면 BATCH_SIZE명씩
+    무작위로 뽑아 중심마다 지금까지 배정된 점 수의 역수를 학습률로 갱신합니다(미니배치, Sculley 2010).
+    빈 군집의 중심은 이전 값을 유지합니다.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(points)
+    k = min(k, n)
+    centers = _init_centers(points, k, rng)
+    if n <= FULL_KMEANS_MAX_ROWS:
+        labels = None
+        for _ in range(max_iter):
+            new_labels, _ = _assign(points, centers)
+            if labels is not None and (new_labels == labels).all():
+                break
+            labels = new_labels
+            counts = np.bincount(labels, minlength=k)
+            sums = np.zeros_like(centers)
+            np.add.at(sums, labels, points)
+            filled = counts > 0
+            centers[filled] = sums[filled] / counts[filled, None]
+    else:
+        counts = np.zeros(k)
+        for _ in range(max_iter):
+            batch = points[rng.integers(0, n, BATCH_SIZE)]
+            batch_labels, _ = _assign(batch, centers)
+            batch_counts = np.bincount(batch_labels, minlength=k)
+            sums = np.zeros_like(centers)
+            np.add.at(sums, batch_labels, batch)
+            counts += batch_counts
+            filled = batch_counts > 0
+            step = (sums[filled] - batch_counts[filled, None] * centers[filled]) / counts[filled, None]
+            centers[filled] += step
+            if np.abs(step).max(initial=0) < TOLERANCE:
+                break
+    labels, distances = _assign(points, centers)
+    return labels, centers, float(distances.sum())
+
+
+@dataclass
+class LearnerProfiles:
+    """
+    학생 군집 결과. 프로필은 평균 점수가 높은 순으로 1번부터 번호를 매기고,
+    점수가 하나도 없는 학생의 labels는 -1입니다.
+    """
+    labels: np.ndarray
+    centers: pd.DataFrame       # 프로필 × 과목 평균 원점수
+    z_centers: pd.DataFrame     # 프로필 × 과목 평균 z점수 (전체 학생 대비 위치)
+    sizes: np.ndarray
+    inertia: float
+
+    @property
+    def names(self):
+        return list(self.centers.index)
+
+    @property
+    def nbytes(self):
+        return self.labels.nbytes + self.centers.to_numpy().nbytes + self.z_centers.to_numpy().nbytes
+
+    def summary_table(self):
+        """
+        프로필별 학생 수·비율·평균과 강점/약점 과목. 강점/약점은 전체 학생 대비 위치(z점수)가
+        프로필 자신의 평균 위치보다 가장 높은/낮은 과목이라 과목 난이도의 영향을 받지 않습니다.
+        """
+        z = self.z_centers.to_numpy()
+        relative = z - np.nanmean(z, axis=1, keepdims=True)
+        has_scores = ~np.isnan(relative).all(axis=1)
+        filled = np.where(np.isnan(relative), 0.0, relative)
+        subjects = np.asarray(self.centers.columns, dtype=object)
+        return pd.DataFrame({
+            '프로필': self.names,
+            '학생 수': self.sizes,
+            '비율 (%)': 100 * self.sizes / max(self.sizes.sum(), 1),
+            '평균': np.nanmean(self.centers.to_numpy(), axis=1),
+            '평균 z점수': np.nanmean(z, axis=1),
+            '강점 과목': np.where(has_scores, subjects[filled.argmax(axis=1)], None),
+            '약점 과목': np.where(has_scores, subjects[filled.argmin(axis=1)], None),
+        })
+
+
+def learner_profiles(stats, k=4, seed=0):
+    """
+    stats의 학생들을 과목별 z점수의 k-평균으로 k개 프로필로 나눕니다.
+    프로필 중심은 해당 학생들의 과목별 평균 원점수(결측 제외)입니다.
+    """
+    valid = np.flatnonzero(~np.isnan(stats.row_means))
+    labels = np.full(stats.n_students, -1, dtype=np.intp)
+    if not len(valid):
+        empty = pd.DataFrame(columns=stats.score_cols, dtype=np.float64)
+        return LearnerProfiles(labels, empty, empty, np.zeros(0, dtype=np.int64), 0.0)
+    points = np.nan_to_num(z_scores(stats)[valid], nan=0.0)
+    assigned, _, inertia = kmeans(points, k, seed)
+    k = int(assigned.max()) + 1
+
+    # 군집·과목별 합계와 개수를 bincount 한 번씩으로 모아 원점수 평균을 구합니다
+    matrix = stats.matrix[valid].astype(np.float64)
+    present = ~np.isnan(matrix)
+    n_cols = stats.n_subjects
+    codes = (assigned[:, None] * n_cols + np.arange(n_cols)).ravel()
+    sums = np.bincount(codes, np.where(present, matrix, 0.0).ravel(), minlength=k * n_cols).reshape(k, n_cols)
+    counts = np.bincount(codes, present.ravel(), minlength=k * n_cols).reshape(k, n_cols)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+
+    # 평균이 높은 프로필부터 번호를 다시 매기고, 학생이 없는 군집은 뺍니다
+    sizes = np.bincount(assigned, minlength=k)
+    order = [c for c in np.argsort(-np.nan_to_num(np.nanmean(means, axis=1), nan=-np.inf), kind='stable') if sizes[c]]
+    remap = np.full(k, -1, dtype=np.intp)
+    remap[order] = np.arange(len(order))
+    labels[valid] = remap[assigned]
+    names = [f'프로필 {i + 1}' for i in range(len(order))]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z_means = (means[order] - stats.col_means) / stats.col_std
+    return LearnerProfiles(
+        labels,
+        pd.DataFrame(means[order], index=names, columns=stats.score_cols),
+        pd.DataFrame(z_means, index=names, columns=stats.score_cols),
+        sizes[order].astype(np.int64),
+        inertia,
+    )
@@ -0,0 +1,170 @@
+"""
+Parquet / Arrow IPC 입출력과 로컬 데이터셋 저장소.
+
+한 번 수집한 데이터셋은 압축하지 않은 Arrow IPC 파일로 저장해 두고, 이후 세션에서는
+CSV를 다시 파싱하지 않고 메모리 맵으로 바로 엽니다. pyarrow는 필요할 때만 불러옵니다.
+"""
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# 업로드 파일 확장자 → 형식
+FORMATS_BY_EXTENSION = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+UPLOAD_EXTENSIONS = [ext.lstrip('.') for ext in FORMATS_BY_EXTENSION]
+
+DEFAULT_STORE_DIR = Path.home() / '.cache' / 'grade_analyzer' / 'datasets'
+# 저장된 Arrow 파일의 스키마 메타데이터 키
+METADATA_KEY = b'grade_analyzer'
+# 수집 규칙(성적 컬럼 감지·검증)이 바뀌면 올려서 예전 규칙으로 저장된 파일을 다시 파싱하게 합니다
+STORE_VERSION = 2
+
+
+def detect_format(name):
+    """파일 이름의 확장자로 형식을 판별합니다. 알 수 없으면 CSV로 간주합니다."""
+    return FORMATS_BY_EXTENSION.get(Path(name or '').suffix.lower(), 'csv')
+
+
+def read_frame(data, fmt):
+    """bytes를 형식(fmt)에 맞게 DataFrame으로 읽습니다."""
+    if fmt == 'csv':
+        return pd.read_csv(io.BytesIO(data))
+    import pyarrow as pa
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(pa.BufferReader(data))
+    elif fmt == 'arrow':
+        table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+    else:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+    return table.to_pandas()
+
+
+def to_parquet_bytes(df):
+    """DataFrame을 Parquet bytes로 변환합니다."""
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def to_arrow_bytes(df):
+    """DataFrame을 Arrow IPC 파일 bytes로 변환합니다."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class DatasetStore:
+    """
+    수집한 데이터셋을 `<내용 해시>.arrow` 파일로 보관하는 로컬 저장소.
+
+    파일은 압축하지 않은 Arrow IPC 형식이므로 다시 열 때 메모리 맵으로 읽어
+    숫자 컬럼은 복사 없이 사용할 수 있습니다. 성적 컬럼 목록과 데이터셋 이름은
+    스키마 메타데이터에 함께 저장합니다.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or os.environ.get('GRADE_ANALYZER_STORE', DEFAULT_STORE_DIR))
+
+    def path_for(self, key):
+        return self.root / f'{key}.arrow'
+
+    def __contains__(self, key):
+        return self.path_for(key).exists()
+
+    def save(self, dataset):
+        """데이터셋을 저장합니다. 저장소에 쓸 수 없으면 조용히 건너뜁니다."""
+        import pyarrow as pa
+
+        path = self.path_for(dataset.key)
+        if path.exists() and (self._read_meta(path) or {}).get('version') == STORE_VERSION:
+            return path
+        table = pa.Table.from_pandas(dataset.df, preserve_index=False)
+        meta = {
+            'version': STORE_VERSION,
+            'name': dataset.name,
+            'score_cols': dataset.score_cols,
+            'validation': dataset.report.to_dict() if dataset.report is not None else None,
+        }
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            METADATA_KEY: json.dumps(meta, ensure_ascii=False).encode('utf-8'),
+        })
+        tmp = None
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            # 같은 내용을 여러 세션이 동시에 저장해도 서로의 임시 파일에 쓰지 않도록 이름을 따로 받습니다
+            fd, tmp = tempfile.mkstemp(prefix=f'{path.stem}.', suffix='.tmp', dir=self.root)
+            os.close(fd)
+            with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)
+        except OSError:
+            if tmp is not None:
+                Path(tmp).unlink(missing_ok=True)
+            return None
+        return path
+
+    def open(self, key):
+        """
+        저장된 데이터셋을 메모리 맵으로 엽니다. 없거나 읽을 수 없으면(잘린 파일, 이 저장소가 쓰지 않은
+        .arrow 파일 등) None을 반환해 호출한 쪽이 원본을 다시 파싱하게 합니다.
+        """
+        from grade_analyzer.ingest import Dataset
+        from grade_analyzer.validation import ValidationReport
+        import pyarrow as pa
+
+        path = self.path_for(key)
+        if not path.exists():
+            return None
+        try:
+            table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+            meta = json.loads(table.schema.metadata[METADATA_KEY])
+            if meta.get('version') != STORE_VERSION:
+                return None
+            df = table.to_pandas(split_blocks=True)
+            report = ValidationReport.from_dict(meta['validation']) if meta.get('validation') else None
+            return Dataset(key, df, meta['score_cols'], meta['name'], report)
+        except (OSError, KeyError, TypeError, ValueError, pa.ArrowInvalid):
+            return None
+
+    @staticmethod
+    def _read_meta(path):
+        # 스키마 메타데이터만 읽습니다 (읽을 수 없으면 None)
+        import pyarrow as pa
+
+        try:
+            schema = pa.ipc.open_file(pa.memory_map(str(path), 'r')).schema
+            return json.loads(schema.metadata[METADATA_KEY])
+        except (OSError, KeyError, TypeError, ValueError, pa.ArrowInvalid):
+            return None
+
+    def list(self):
+        """저장된 데이터셋 목록 [(키, 이름, 수정 시각)]을 최근 순으로 반환합니다."""
+        entries = []
+        if not self.root.exists():
+            return entries
+        for path in self.root.glob('*.arrow'):
+            meta = self._read_meta(path)
+            if meta is None or meta.get('version') != STORE_VERSION:
+                continue
+            entries.append((path.stem, meta['name'], path.stat().st_mtime))
+        return sorted(entries, key=lambda entry: entry[2], reverse=True)
+
+
+default_store = DatasetStore()
@@ -0,0 +1,178 @@
+"""
+분석 결과 내보내기 (CSV, Excel, Parquet, Arrow, JSON).
+
+파일은 요청할 때만 만들고, 학생별 표는 CHUNK_ROWS행씩 인코딩해 BytesIO 하나에 바로 써 넣습니다.
+전체 CSV 문자열과 그 bytes 사본을 동시에 만들지 않으며, 묶음마다 progress(완료 행 수, 전체 행 수)를
+호출하므로 진행률 표시와 작업 취소(progress에서 예외)가 가능합니다. Excel은 openpyxl이나
+xlsxwriter가 설치되어 있을 때만 사용할 수 있습니다.
+"""
+import codecs
+import importlib.util
+import io
+import json
+
+import pandas as pd
+
+from grade_analyzer.analysis import analyze_grades, generate_insights, generate_recommendations
+from grade_analyzer.grading import grade_counts
+
+# 형식 → (확장자, MIME 형식)
+FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+    'JSON': ('json', 'application/json'),
+}
+# 한 번에 인코딩하는 학생 수
+CHUNK_ROWS = 50_000
+# Excel 시트 하나에 들어가는 데이터 행 수 (헤더 한 줄 제외)
+EXCEL_MAX_ROWS = 1_048_575
+STUDENT_SHEET = '학생별 성적'
+
+
+def excel_engine():
+    """설치된 Excel 쓰기 엔진 이름 (xlsxwriter 우선). 없으면 None."""
+    for engine in ('xlsxwriter', 'openpyxl'):
+        if importlib.util.find_spec(engine) is not None:
+            return engine
+    return None
+
+
+def available_formats():
+    """지금 환경에서 만들 수 있는 형식 목록."""
+    return [fmt for fmt in FORMATS if fmt != 'Excel' or excel_engine() is not None]
+
+
+def file_name(fmt, base='grades_analysis'):
+    return f"{base}.{FORMATS[fmt][0]}"
+
+
+def mime_type(fmt):
+    return FORMATS[fmt][1]
+
+
+def student_table(dataset, stats, rows, grades):
+    """선택된 행(rows)의 원본 컬럼에 평균/석차/백분위/등급을 붙인 표. 내보낼 때만 행을 복사합니다."""
+    return dataset.df.iloc[rows].assign(
+        평균=stats.row_means,
+        석차=stats.ranks.ranks,
+        백분위=stats.ranks.percentiles,
+        등급=grades
+    )
+
+
+def analysis_tables(stats, grades, rules=None):
+    """Excel 시트와 JSON에 학생별 표와 함께 넣는 분석 결과 표 (이름 → DataFrame). 해석·추천은 rules 규칙표를 따릅니다."""
+    analysis = analyze_grades(None, stats.score_cols, stats=stats)
+    counts = grade_counts(grades)
+    overview = {
+        '학생 수': stats.n_students,
+        '평균': analysis['avg'],
+        '표준편차': analysis['std'],
+        '최고점': analysis['max'],
+        '최저점': analysis['min'],
+        '최고 과목': analysis['best_subject'],
+        '최고 과목 평균': analysis['best_avg'],
+        '최저 과목': analysis['worst_subject'],
+        '최저 과목 평균': analysis['worst_avg'],
+        '학력 격차': analysis['best_avg'] - analysis['worst_avg'],
+    }
+    notes = [('해석', '', insight.strip().replace('**', '')) for insight in generate_insights(analysis, rules)]
+    notes += [
+        ('추천', rec['title'], action)
+        for rec in generate_recommendations(analysis, rules=rules) for action in rec['actions']
+    ]
+    return {
+        '과목별 통계': stats.summary_table(),
+        '등급 분포': pd.DataFrame({'등급': counts.index.astype(str), '학생 수': counts.to_numpy()}),
+        '반 전체 분석': pd.DataFrame({'항목': list(overview), '값': list(overview.values())}),
+        '해석 및 추천': pd.DataFrame(notes, columns=['구분', '제목', '내용']),
+    }
+
+
+def _chunks(table):
+    for start in range(0, len(table), CHUNK_ROWS):
+        yield start, table.iloc[start:start + CHUNK_ROWS]
+
+
+def _write_csv(buffer, table, bom, progress):
+    if bom:
+        buffer.write(codecs.BOM_UTF8)
+    if table.empty:
+        buffer.write(table.to_csv(index=False).encode('utf-8'))
+    for start, chunk in _chunks(table):
+        buffer.write(chunk.to_csv(index=False, header=start == 0).encode('utf-8'))
+        progress(start + len(chunk), len(table))
+
+
+def _write_json(buffer, table, tables, progress):
+    # {"분석": {표 이름: [레코드...]}, "학생": [레코드...]} — 학생 레코드는 묶음마다 이어 씁니다
+    analysis = ', '.join(
+        f"{json.dumps(name, ensure_ascii=False)}: {frame.to_json(orient='records', force_ascii=False)}"
+        for name, frame in tables.items()
+    )
+    buffer.write(f'{{"분석": {{{analysis}}}, "학생": ['.encode('utf-8'))
+    for start, chunk in _chunks(table):
+        records = chunk.to_json(orient='records', force_ascii=False)[1:-1]
+        if records:
+            buffer.write((',' if start else '').encode('utf-8') + records.encode('utf-8'))
+        progress(start + len(chunk), len(table))
+    buffer.write(b']}')
+
+
+def _write_excel(buffer, table, tables, progress):
+    if len(table) > EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel 시트에는 최대 {EXCEL_MAX_ROWS:,}명까지 넣을 수 있습니다. CSV나 Parquet 형식을 사용하세요.")
+    with pd.ExcelWriter(buffer, engine=excel_engine()) as writer:
+        if table.empty:
+            table.to_excel(writer, sheet_name=STUDENT_SHEET, index=False)
+        for start, chunk in _chunks(table):
+            chunk.to_excel(writer, sheet_name=STUDENT_SHEET, index=False, header=start == 0, startrow=start + 1 if start else 0)
+            progress(start + len(chunk), len(table))
+        for name, frame in tables.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+
+
+def _write_arrow(buffer, table, fmt, progress):
+    import pyarrow as pa
+
+    # 표 전체를 한 번에 Arrow로 바꾸지 않고 스키마는 첫 묶음에서 정합니다.
+    # 첫 묶음에서 값이 모두 비어 null로 추론된 열은 뒤 묶음을 담을 수 있도록 문자열로 둡니다.
+    schema = pa.Schema.from_pandas(table.iloc[:CHUNK_ROWS], preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    if fmt == 'Parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(buffer, schema)
+    else:
+        writer = pa.ipc.new_file(buffer, schema)
+    # 묶음마다 Parquet 행 그룹(또는 Arrow 레코드 배치) 하나를 씁니다
+    with writer:
+        for start, chunk in _chunks(table):
+            writer.write_batch(pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False))
+            progress(start + len(chunk), len(table))
+
+
+def export_bytes(fmt, table, tables=None, bom=True, progress=None):
+    """
+    학생별 표(table)를 형식(fmt)의 파일 bytes로 만듭니다.
+
+    Excel과 JSON에는 분석 결과 표(tables, analysis_tables 결과)가 함께 들어가고, CSV는 bom=True이면
+    Excel에서 한글이 깨지지 않도록 UTF-8 BOM을 앞에 붙입니다.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+    progress = progress or (lambda done, total: None)
+    tables = tables or {}
+    buffer = io.BytesIO()
+    if fmt == 'CSV':
+        _write_csv(buffer, table, bom, progress)
+    elif fmt == 'JSON':
+        _write_json(buffer, table, tables, progress)
+    elif fmt == 'Excel':
+        _write_excel(buffer, table, tables, progress)
+    else:
+        _write_arrow(buffer, table, fmt, progress)
+    return buffer.getvalue()
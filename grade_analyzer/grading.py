@@ -0,0 +1,103 @@
+"""
+벡터화된 등급 산출 엔진.
+
+학생마다 Python 함수를 호출하는 대신 np.searchsorted로 평균 점수 배열 전체를
+한 번에 등급 구간에 배정하고, 결과는 순서가 있는 범주형(Categorical)으로 돌려줍니다.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class GradeScale:
+    """
+    등급 체계.
+
+    labels는 좋은 등급부터, cutoffs는 각 등급(마지막 등급 제외)의 하한을 같은 순서로 적습니다.
+    basis에 따라 cutoffs를 해석하는 기준이 달라집니다.
+
+    - 'score': 평균 점수 (절대평가)
+    - 'percentile': 상위 누적 비율(%) — cutoffs는 각 등급에 들어가는 상위 누적 비율의 상한입니다
+    - 'zscore': 표준점수 (커브)
+    """
+    name: str
+    labels: tuple
+    cutoffs: tuple
+    basis: str = 'score'
+    colors: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        if len(self.cutoffs) != len(self.labels) - 1:
+            raise ValueError(f"{self.name}: cutoffs는 labels보다 하나 적어야 합니다.")
+
+
+ABCDF_COLORS = {'A': '#00cc66', 'B': '#0066cc', 'C': '#ffcc00', 'D': '#ff6600', 'F': '#cc0000'}
+
+GRADE_SCALES = {
+    'A/B/C/D/F (절대평가)': GradeScale(
+        'A/B/C/D/F', ('A', 'B', 'C', 'D', 'F'), (90, 80, 70, 60), 'score', ABCDF_COLORS,
+    ),
+    '9등급 (내신 상대평가)': GradeScale(
+        '9등급', tuple(str(i) for i in range(1, 10)), (4, 11, 23, 40, 60, 77, 89, 96), 'percentile',
+    ),
+    'A/B/C/D/F (커브)': GradeScale(
+        '커브', ('A', 'B', 'C', 'D', 'F'), (1.0, 0.3, -0.3, -1.0), 'zscore', ABCDF_COLORS,
+    ),
+}
+DEFAULT_SCALE = GRADE_SCALES['A/B/C/D/F (절대평가)']
+
+
+def _band_codes(values, scale):
+    """각 값의 등급 코드(0 = 가장 좋은 등급, 결측은 -1)를 반환합니다."""
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    n_labels = len(scale.labels)
+
+    if scale.basis == 'percentile':
+        # 동점자는 평균 석차를 받습니다 (동석차 처리)
+        ranks = pd.Series(values).rank(method='average', ascending=False).to_numpy()
+        top_pct = ranks / max((~missing).sum(), 1) * 100
+        codes = np.searchsorted(np.asarray(scale.cutoffs, dtype=np.float64), top_pct, side='left')
+    else:
+        if scale.basis == 'zscore':
+            mean, std = np.nanmean(values), np.nanstd(values)
+            values = (values - mean) / std if std > 0 else np.zeros_like(values)
+        # 하한을 오름차순으로 뒤집어 searchsorted: 하한 이상이면 해당 등급
+        edges = np.asarray(scale.cutoffs[::-1], dtype=np.float64)
+        codes = (n_labels - 1) - np.searchsorted(edges, values, side='right')
+
+    codes = np.minimum(codes, n_labels - 1)
+    codes[missing] = -1
+    return codes
+
+
+def assign_grades(values, scale=DEFAULT_SCALE):
+    """평균 점수 배열을 등급 범주형으로 변환합니다."""
+    codes = _band_codes(values, scale)
+    return pd.Categorical.from_codes(codes, categories=list(scale.labels), ordered=True)
+
+
+def grade_counts(grades):
+    """등급별 학생 수 (좋은 등급 순, 해당 학생이 없는 등급 제외)."""
+    counts = pd.Series(grades).value_counts(sort=False)
+    return counts[counts > 0]
+
+
+def students_by_grade(names, grades):
+    """등급별 학생 이름 목록을 한 번의 groupby로 만듭니다."""
+    groups = pd.Series(np.asarray(names)).groupby(pd.Series(grades), observed=True).agg(list)
+    return groups.to_dict()
+
+
+def grade_positions(grades):
+    """
+    등급별 학생 행 위치 배열 (좋은 등급 순, 등급 안에서는 행 순서). 이름 목록을 만들지 않으므로
+    학생이 많을 때 명단을 쪽 단위로 보여 주는 데 씁니다. 등급이 없는 학생과 학생이 없는 등급은 뺍니다.
+    """
+    codes = np.asarray(grades.codes)
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=len(grades.categories))
+    ends = (codes < 0).sum() + np.cumsum(counts)
+    return {label: order[end - count:end] for label, count, end in zip(grades.categories, counts, ends) if count}
@@ -0,0 +1,212 @@
+"""
+반/학년 같은 소속(그룹)별 분석.
+
+그룹 컬럼 값으로 행을 한 번 정렬해 그룹마다 연속된 구간을 만든 뒤, 과목별 개수·합계·
+제곱편차합을 np.add.reduceat 한 번씩으로 모든 그룹에 대해 계산합니다. 그룹이 수백 개여도
+데이터를 그룹 수만큼 다시 훑지 않고, 그룹별 결과는 analyze_grades의 반 전체 분석과 같은
+형식으로 돌려줍니다.
+"""
+import re
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from grade_analyzer.ingest import GROUP_COLUMNS, TEXT_COLUMNS
+from grade_analyzer.stats import StatsCache
+
+# 그룹 컬럼 후보로 보는 최대 고유값 수
+MAX_GROUPS = 2000
+
+_cache = StatsCache(max_entries=16, name='그룹 컬럼')
+
+
+def _natural_key(label):
+    # '2반'이 '10반'보다 앞에 오도록 숫자 부분은 숫자로 비교합니다
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part) for part in re.split(r'(\d+)', str(label)) if part]
+
+
+def group_columns(dataset):
+    """
+    그룹 컬럼 후보 목록. 학년/반 컬럼이 있으면 먼저 오고, 그 밖의 성적이 아닌 컬럼 중
+    고유값이 2개 이상이면서 학생마다 달라지지 않는 컬럼을 덧붙입니다.
+    """
+    def build():
+        df = dataset.df
+        candidates = [col for col in GROUP_COLUMNS if col in df.columns]
+        for col in df.columns:
+            if col in candidates or col in TEXT_COLUMNS or col in dataset.score_cols:
+                continue
+            n_unique = df[col].nunique()
+            if 2 <= n_unique <= MAX_GROUPS and n_unique < len(df):
+                candidates.append(col)
+        return candidates
+    return _cache.get_or_build(('columns', dataset.key), build)
+
+
+class GroupStats:
+    """
+    그룹별 통계 객체. 행 순서는 GradeStats와 같고, 그룹 값이 결측인 행은 제외합니다.
+
+    과목별 표준편차는 표본 표준편차(ddof=1), 그룹 전체 표준편차는 모표준편차(ddof=0)로
+    GradeStats와 같은 기준이며, 결측 점수는 건너뜁니다.
+    """
+
+    def __init__(self, stats, values):
+        codes, labels = pd.factorize(pd.Series(values))
+        # 그룹 이름 순으로 코드를 다시 매깁니다
+        ranking = np.array(sorted(range(len(labels)), key=lambda i: _natural_key(labels[i])), dtype=np.intp)
+        remap = np.empty(len(labels) + 1, dtype=np.intp)
+        remap[ranking] = np.arange(len(labels))
+        remap[-1] = -1
+        codes = remap[codes]
+        self.stats = stats
+        self.score_cols = stats.score_cols
+        self.labels = np.asarray(labels, dtype=object)[ranking]
+        # 그룹 순으로 정렬한 행 위치와 그룹별 구간 시작점
+        valid = np.flatnonzero(codes >= 0)
+        self.order = valid[np.argsort(codes[valid], kind='stable')]
+        self.sizes = np.bincount(codes[valid], minlength=len(self.labels))
+        self.starts = np.concatenate([[0], np.cumsum(self.sizes)[:-1]])
+        self.codes = codes
+
+    @classmethod
+    def from_dataset(cls, dataset, stats, rows, column):
+        """필터링된 행(rows)과 그 통계 객체(stats)로 column 기준 그룹 통계를 만듭니다."""
+        return cls(stats, dataset.df[column].to_numpy()[rows])
+
+    @property
+    def n_groups(self):
+        return len(self.labels)
+
+    @property
+    def nbytes(self):
+        """그룹 배열과 지금까지 계산한 집계의 메모리 크기 (공유하는 GradeStats는 제외)."""
+        return sum(value.nbytes for value in self.__dict__.values() if isinstance(value, np.ndarray))
+
+    def _segment_sum(self, values):
+        # 그룹 순으로 정렬된 배열의 구간 합 (모든 그룹은 한 명 이상이라 빈 구간이 없습니다)
+        if not self.n_groups:
+            return np.zeros((0,) + values.shape[1:])
+        return np.add.reduceat(values, self.starts, axis=0)
+
+    @cached_property
+    def _sorted(self):
+        return self.stats.matrix[self.order].astype(np.float64)
+
+    @cached_property
+    def _present(self):
+        return ~np.isnan(self._sorted)
+
+    # ---------- 그룹×과목 집계 ----------
+    @cached_property
+    def col_counts(self):
+        return self._segment_sum(self._present.astype(np.int64))
+
+    @cached_property
+    def col_sums(self):
+        return self._segment_sum(np.where(self._present, self._sorted, 0))
+
+    @cached_property
+    def col_means(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.col_sums / self.col_counts
+
+    @cached_property
+    def col_std(self):
+        deviations = self._sorted - np.repeat(self.col_means, self.sizes, axis=0)
+        m2 = self._segment_sum(np.where(self._present, deviations ** 2, 0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(m2 / (self.col_counts - 1))
+
+    # ---------- 그룹 전체 집계 ----------
+    @cached_property
+    def overall_mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.col_sums.sum(axis=1) / self.col_counts.sum(axis=1)
+
+    @cached_property
+    def overall_std(self):
+        deviations = self._sorted - np.repeat(self.overall_mean, self.sizes)[:, None]
+        m2 = self._segment_sum(np.where(self._present, deviations ** 2, 0)).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(m2 / self.col_counts.sum(axis=1))
+
+    @cached_property
+    def _best_worst(self):
+        means = np.where(np.isnan(self.col_means), -np.inf, self.col_means)
+        best = means.argmax(axis=1)
+        worst = np.where(np.isnan(self.col_means), np.inf, self.col_means).argmin(axis=1)
+        return best, worst
+
+    @property
+    def best_subject(self):
+        return np.asarray(self.score_cols, dtype=object)[self._best_worst[0]]
+
+    @property
+    def worst_subject(self):
+        return np.asarray(self.score_cols, dtype=object)[self._best_worst[1]]
+
+    @property
+    def best_avg(self):
+        return np.take_along_axis(self.col_means, self._best_worst[0][:, None], axis=1)[:, 0]
+
+    @property
+    def worst_avg(self):
+        return np.take_along_axis(self.col_means, self._best_worst[1][:, None], axis=1)[:, 0]
+
+    def summary_table(self):
+        """그룹 비교 보기의 그룹별 요약표 (analyze_grades 반 전체 분석 항목)."""
+        return pd.DataFrame({
+            '그룹': self.labels,
+            '학생 수': self.sizes,
+            '평균': self.overall_mean,
+            '표준편차': self.overall_std,
+            '최고 과목': self.best_subject,
+            '최고 과목 평균': self.best_avg,
+            '최저 과목': self.worst_subject,
+            '최저 과목 평균': self.worst_avg,
+            '학력 격차': self.best_avg - self.worst_avg,
+        })
+
+    def subject_means_frame(self):
+        """그룹×과목 평균표."""
+        return pd.DataFrame(self.col_means, index=pd.Index(self.labels, name='그룹'), columns=self.score_cols)
+
+    def grade_table(self, grades):
+        """
+        그룹×등급 학생 수 표. grades는 GradeStats 행 순서의 등급 범주형(assign_grades 결과)입니다.
+        """
+        categories = list(grades.categories)
+        codes = np.asarray(grades.codes)
+        valid = (self.codes >= 0) & (codes >= 0)
+        flat = self.codes[valid] * len(categories) + codes[valid]
+        counts = np.bincount(flat, minlength=self.n_groups * len(categories)).reshape(self.n_groups, len(categories))
+        return pd.DataFrame(counts, index=pd.Index(self.labels, name='그룹'), columns=categories)
+
+    def group_stats(self, group):
+        """그룹 하나의 GradeStats (상관관계 등 그룹 내부 분석용)."""
+        i = int(np.flatnonzero(self.labels == group)[0])
+        rows = np.sort(self.order[self.starts[i]:self.starts[i] + self.sizes[i]])
+        return self.stats.subset(rows)
+
+    def analyses(self):
+        """그룹별 분석 dict 목록. analyze_grades의 반 전체 분석 형식에 'group' 키를 더했습니다."""
+        analyses = []
+        flat_max = np.maximum.reduceat(np.where(self._present, self._sorted, -np.inf).max(axis=1), self.starts) if self.n_groups else []
+        flat_min = np.minimum.reduceat(np.where(self._present, self._sorted, np.inf).min(axis=1), self.starts) if self.n_groups else []
+        for i, label in enumerate(self.labels):
+            analyses.append({
+                'type': '반전체',
+                'group': label,
+                'avg': self.overall_mean[i],
+                'max': flat_max[i],
+                'min': flat_min[i],
+                'std': self.overall_std[i],
+                'scores_by_subject': dict(zip(self.score_cols, self.col_means[i])),
+                'best_subject': self.best_subject[i],
+                'worst_subject': self.worst_subject[i],
+                'best_avg': self.best_avg[i],
+                'worst_avg': self.worst_avg[i],
+            })
+        return analyses
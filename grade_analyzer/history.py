@@ -0,0 +1,264 @@
+"""
+여러 시험(학기/회차)의 성적을 누적하는 SQLite 이력 저장소.
+
+시험을 추가할 때 그 시험의 과목별 요약, 학생별 평균·석차·백분위, 반 전체 분석(analyze_grades)
+결과를 한 번만 계산해 저장하고, 학생×과목 누적 통계(횟수, 평균, 제곱편차합)는 지난 기록을
+다시 읽지 않고 Welford 방식으로 갱신합니다. 추이 조회는 학생/시험 기준 인덱스가 걸린
+요약 테이블만 읽으므로 시험이 수백 번 쌓여도 빠르게 응답합니다.
+"""
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from grade_analyzer.analysis import analyze_grades
+from grade_analyzer.stats import GradeStats
+
+DEFAULT_HISTORY_PATH = Path.home() / '.cache' / 'grade_analyzer' / 'history.sqlite3'
+# 학생별 누적 통계에서 과목 대신 시험 평균을 나타내는 항목 이름
+AVERAGE_KEY = '평균'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exams (
+    exam_id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL,
+    taken_on TEXT NOT NULL,
+    dataset_key TEXT NOT NULL UNIQUE,
+    n_students INTEGER NOT NULL,
+    avg REAL,
+    std REAL,
+    best_subject TEXT,
+    worst_subject TEXT,
+    added_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scores (
+    student TEXT NOT NULL,
+    exam_id INTEGER NOT NULL,
+    subject TEXT NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (student, exam_id, subject)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS exam_students (
+    student TEXT NOT NULL,
+    exam_id INTEGER NOT NULL,
+    name TEXT,
+    avg REAL NOT NULL,
+    rank INTEGER NOT NULL,
+    percentile REAL NOT NULL,
+    PRIMARY KEY (student, exam_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS exam_subjects (
+    exam_id INTEGER NOT NULL,
+    subject TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    mean REAL,
+    std REAL,
+    min REAL,
+    max REAL,
+    PRIMARY KEY (exam_id, subject)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS student_totals (
+    student TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    PRIMARY KEY (student, subject)
+) WITHOUT ROWID;
+"""
+
+# 관측값 하나를 (n, mean, m2)에 더하는 Welford 갱신. SET 절의 컬럼은 모두 갱신 전 값입니다.
+_UPSERT_TOTAL = """
+INSERT INTO student_totals (student, subject, n, mean, m2) VALUES (?, ?, 1, ?, 0)
+ON CONFLICT (student, subject) DO UPDATE SET
+    n = n + 1,
+    mean = mean + (excluded.mean - mean) / (n + 1),
+    m2 = m2 + (excluded.mean - mean) * (excluded.mean - mean) * n / (n + 1)
+"""
+
+
+def student_ids(df):
+    """학생을 시험 사이에서 구분하는 값. 학번이 있으면 학번, 없으면 이름을 씁니다."""
+    for column in ('학번', '이름'):
+        if column in df.columns:
+            return df[column].astype(str).to_numpy(dtype=object)
+    raise ValueError("시험 기록에 추가하려면 '학번' 또는 '이름' 컬럼이 필요합니다.")
+
+
+class HistoryStore:
+    """시험 단위로 성적을 쌓고 학생/과목별 추이를 조회하는 저장소."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.environ.get('GRADE_ANALYZER_HISTORY', DEFAULT_HISTORY_PATH))
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        if not self._initialized:
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return closing(conn)
+
+    def exam_for(self, dataset_key):
+        """데이터셋이 이미 추가되어 있으면 그 시험 번호, 아니면 None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT exam_id FROM exams WHERE dataset_key = ?", (dataset_key,)).fetchone()
+        return row[0] if row else None
+
+    def append(self, dataset, label=None, taken_on=None, stats=None):
+        """
+        데이터셋 전체를 시험 하나로 추가하고 시험 번호를 반환합니다.
+        같은 데이터셋(내용 해시)을 다시 추가하면 기록을 바꾸지 않고 기존 시험 번호를 반환합니다.
+        여러 세션이 같은 데이터셋을 동시에 추가해도 기록은 하나만 생깁니다.
+        """
+        existing = self.exam_for(dataset.key)
+        if existing is not None:
+            return existing
+        df, score_cols = dataset.df, dataset.score_cols
+        stats = stats or GradeStats.from_frame(df, score_cols)
+        students = student_ids(df)
+        names = df['이름'].astype(str).to_numpy(dtype=object) if '이름' in df.columns else students
+        taken_on = (taken_on or date.today()).isoformat()
+        class_analysis = analyze_grades(None, score_cols, stats=stats)
+
+        # 시험 안에서 한 번만 계산하는 요약값
+        ranks, percentiles = stats.ranks.ranks, stats.ranks.percentiles
+        # 같은 구분값이 한 시험에 여러 번 나오면 첫 행만 기록합니다
+        first = ~pd.Series(students).duplicated().to_numpy()
+        has_avg = first & ~np.isnan(stats.row_means)
+        matrix = stats.matrix
+        present = ~np.isnan(matrix)
+        rows, cols = np.nonzero(present & first[:, None])
+        subjects = np.asarray(score_cols, dtype=object)
+        score_rows = list(zip(students[rows], subjects[cols], matrix[rows, cols].astype(float).tolist()))
+        average_rows = [(s, AVERAGE_KEY, float(m)) for s, m in zip(students[has_avg], stats.row_means[has_avg])]
+
+        with self._connect() as conn, conn:
+            # 확인과 추가를 쓰기 잠금을 잡은 한 트랜잭션에서 하므로, 그 사이에 다른 세션이 끼어들 수 없습니다
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT exam_id FROM exams WHERE dataset_key = ?", (dataset.key,)).fetchone()
+            if row is not None:
+                return row[0]
+            exam_id = conn.execute(
+                "INSERT INTO exams (label, taken_on, dataset_key, n_students, avg, std, best_subject, worst_subject, added_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (label or dataset.name or taken_on, taken_on, dataset.key, stats.n_students,
+                 float(class_analysis['avg']), float(class_analysis['std']),
+                 str(class_analysis['best_subject']), str(class_analysis['worst_subject']),
+                 datetime.now().isoformat(timespec='seconds'))
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO scores (student, exam_id, subject, score) VALUES (?, ?, ?, ?)",
+                ((student, exam_id, subject, score) for student, subject, score in score_rows)
+            )
+            conn.executemany(
+                "INSERT INTO exam_students (student, exam_id, name, avg, rank, percentile) VALUES (?, ?, ?, ?, ?, ?)",
+                zip(students[has_avg], [exam_id] * int(has_avg.sum()), names[has_avg],
+                    stats.row_means[has_avg].tolist(), ranks[has_avg].tolist(), percentiles[has_avg].tolist())
+            )
+            conn.executemany(
+                "INSERT INTO exam_subjects (exam_id, subject, n, mean, std, min, max) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(exam_id, subject, int(n), *(None if np.isnan(v) else float(v) for v in values))
+                 for subject, n, *values in zip(score_cols, present.sum(axis=0), stats.col_means, stats.col_std,
+                                                stats.col_min, stats.col_max)]
+            )
+            # 누적 통계는 이번 시험의 관측값만으로 갱신합니다
+            conn.executemany(_UPSERT_TOTAL, score_rows)
+            conn.executemany(_UPSERT_TOTAL, average_rows)
+        return exam_id
+
+    def exams(self):
+        """시험 목록 (시험일 순). 반 평균/표준편차/최고·최저 과목은 추가 당시의 analyze_grades 결과입니다."""
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT exam_id, label, taken_on, n_students, avg, std, best_subject, worst_subject"
+                " FROM exams ORDER BY taken_on, exam_id", conn
+            )
+
+    def subject_trend(self):
+        """시험별·과목별 평균, 표준편차, 최고/최저점 (긴 형식)."""
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT e.exam_id, e.label, e.taken_on, s.subject, s.n, s.mean, s.std, s.min, s.max"
+                " FROM exam_subjects s JOIN exams e USING (exam_id) ORDER BY e.taken_on, e.exam_id", conn
+            )
+
+    def students(self):
+        """기록된 학생 목록: 학생 구분값 → 가장 최근 시험의 이름."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT student, name, MAX(exam_id) FROM exam_students GROUP BY student ORDER BY student"
+            ).fetchall()
+        return {student: name for student, name, _ in rows}
+
+    def student_trend(self, student):
+        """
+        학생 한 명의 시험별 평균·석차·백분위와 과목별 점수 (행: 시험일 순, 과목은 컬럼).
+        """
+        with self._connect() as conn:
+            summary = pd.read_sql_query(
+                "SELECT e.exam_id, e.label, e.taken_on, e.n_students, x.avg AS 평균, x.rank AS 석차, x.percentile AS 백분위"
+                " FROM exam_students x JOIN exams e USING (exam_id) WHERE x.student = ?"
+                " ORDER BY e.taken_on, e.exam_id", conn, params=(student,)
+            )
+            scores = pd.read_sql_query(
+                "SELECT exam_id, subject, score FROM scores WHERE student = ?", conn, params=(student,)
+            )
+        wide = scores.pivot(index='exam_id', columns='subject', values='score')
+        return summary.join(wide, on='exam_id')
+
+    def student_totals(self, student):
+        """학생 한 명의 과목별(및 평균) 누적 응시 횟수, 평균, 표준편차."""
+        with self._connect() as conn:
+            totals = pd.read_sql_query(
+                "SELECT subject, n, mean, m2 FROM student_totals WHERE student = ?", conn, params=(student,)
+            )
+        m2 = totals.pop('m2')
+        totals['std'] = np.sqrt(m2 / (totals['n'] - 1)).where(totals['n'] > 1)
+        return totals
+
+
+def trend_insights(trend, score_cols):
+    """
+    student_trend() 결과로 최근 변화에 대한 해석 문구를 만듭니다.
+    과목별 기울기는 시험 순서에 대한 최소제곱 직선으로 한 번에 계산합니다.
+    """
+    if len(trend) < 2:
+        return ["📅 시험 기록이 2회 이상 쌓이면 변화 추이를 해석합니다."]
+    insights = []
+    last, prev = trend.iloc[-1], trend.iloc[-2]
+    change = last['평균'] - prev['평균']
+    if change >= 3:
+        insights.append(f"📈 **상승세**: 직전 시험({prev['label']})보다 평균이 {change:+.1f}점 올랐습니다. 석차 {prev['석차']}위 → {last['석차']}위.")
+    elif change <= -3:
+        insights.append(f"📉 **하락 주의**: 직전 시험({prev['label']})보다 평균이 {change:+.1f}점 떨어졌습니다. 석차 {prev['석차']}위 → {last['석차']}위.")
+    else:
+        insights.append(f"➡️ **유지**: 직전 시험({prev['label']})과 평균 차이가 {change:+.1f}점으로 안정적입니다.")
+
+    subjects = [subject for subject in score_cols if subject in trend.columns]
+    scores = trend[subjects].to_numpy(dtype=np.float64)
+    x = np.arange(len(trend), dtype=np.float64)[:, None]
+    mask = ~np.isnan(scores)
+    # 과목마다 결측을 뺀 점들로 기울기 = cov(x, y) / var(x)
+    n = mask.sum(axis=0)
+    x_mean = (x * mask).sum(axis=0) / np.maximum(n, 1)
+    y_mean = np.where(mask, scores, 0).sum(axis=0) / np.maximum(n, 1)
+    dx = np.where(mask, x - x_mean, 0)
+    var = (dx ** 2).sum(axis=0)
+    slopes = np.where((n >= 2) & (var > 0), (dx * np.where(mask, scores - y_mean, 0)).sum(axis=0) / np.where(var > 0, var, 1), np.nan)
+    if np.isfinite(slopes).any():
+        best, worst = int(np.nanargmax(slopes)), int(np.nanargmin(slopes))
+        if slopes[best] > 1:
+            insights.append(f"🚀 **꾸준히 오르는 과목**: {subjects[best]} (시험당 {slopes[best]:+.1f}점)")
+        if slopes[worst] < -1:
+            insights.append(f"⚠️ **꾸준히 떨어지는 과목**: {subjects[worst]} (시험당 {slopes[worst]:+.1f}점) - 원인 점검이 필요합니다.")
+    return insights
+
+
+default_history = HistoryStore()
@@ -0,0 +1,82 @@
+"""
+데이터셋별로 한 번 만드는 필터링/조회용 인덱스.
+
+학생별 평균을 한 번 정렬해 두어 점수 범위 필터가 searchsorted 구간 자르기가 되고,
+이름 → 행 위치 해시 인덱스로 학생 조회가 O(1)이 됩니다. 필터 결과는 DataFrame 복사본이
+아니라 원본 데이터셋의 행 위치 배열(오름차순)입니다.
+"""
+import numpy as np
+import pandas as pd
+
+from grade_analyzer.stats import StatsCache, dataset_stats
+
+
+class DatasetIndex:
+    """정렬된 학생 평균과 이름 해시 인덱스."""
+
+    def __init__(self, row_means, names=None):
+        row_means = np.asarray(row_means, dtype=np.float64)
+        self.n_rows = len(row_means)
+        self.row_means = row_means
+        # NaN(점수 없는 학생)은 정렬 결과의 맨 뒤로 가므로 범위 검색에서 제외됩니다
+        self.order = np.argsort(row_means, kind='stable')
+        self.sorted_means = row_means[self.order]
+        self.n_valid = int((~np.isnan(row_means)).sum())
+        self.names = None if names is None else np.asarray(names, dtype=object)
+        self._name_positions = None if names is None else pd.Series(self.names).groupby(self.names, sort=False).indices
+
+    @property
+    def nbytes(self):
+        """정렬 배열과 이름 인덱스의 메모리 크기 (이름 문자열은 데이터셋과 공유하므로 제외)."""
+        arrays = [self.row_means, self.order, self.sorted_means]
+        if self.names is not None:
+            arrays.append(self.names)
+            arrays += self._name_positions.values()
+        return sum(array.nbytes for array in arrays)
+
+    def range_rows(self, min_score, max_score):
+        """평균이 [min_score, max_score]인 행 위치(오름차순)."""
+        valid = self.sorted_means[:self.n_valid]
+        lo = np.searchsorted(valid, min_score, side='left')
+        hi = np.searchsorted(valid, max_score, side='right')
+        return np.sort(self.order[lo:hi])
+
+    def lookup(self, name):
+        """이름의 첫 번째 행 위치. 없으면 None."""
+        positions = self.name_rows(name)
+        return int(positions[0]) if len(positions) else None
+
+    def name_rows(self, name):
+        """이름이 같은 모든 행 위치."""
+        if self._name_positions is None:
+            return np.empty(0, dtype=np.intp)
+        return self._name_positions.get(name, np.empty(0, dtype=np.intp))
+
+    def select(self, min_score=0, max_score=100, names=None):
+        """
+        학생 이름(선택 시)과 평균 점수 범위로 걸러낸 행 위치(오름차순)를 반환합니다.
+        """
+        if names:
+            rows = np.unique(np.concatenate([self.name_rows(name) for name in names]))
+            means = self.row_means[rows]
+            return rows[(means >= min_score) & (means <= max_score)]
+        return self.range_rows(min_score, max_score)
+
+    def locate(self, rows, name):
+        """선택된 행 위치 배열(rows) 안에서 해당 이름 학생의 순번. 없으면 None."""
+        for position in self.name_rows(name):
+            i = np.searchsorted(rows, position)
+            if i < len(rows) and rows[i] == position:
+                return int(i)
+        return None
+
+
+_cache = StatsCache(max_entries=8, max_bytes=256 << 20, name='인덱스')
+
+
+def dataset_index(dataset):
+    """데이터셋의 인덱스를 반환합니다. 데이터셋마다 한 번만 만듭니다."""
+    def build():
+        names = dataset.df['이름'] if '이름' in dataset.df.columns else None
+        return DatasetIndex(dataset_stats(dataset).row_means, names)
+    return _cache.get_or_build(dataset.key, build)
@@ -0,0 +1,185 @@
+"""
+성적 데이터 수집(ingestion) 계층.
+
+업로드된 파일 내용의 해시를 키로 파싱 결과를 캐시하여, Streamlit이 위젯 변경마다
+스크립트를 재실행하더라도 같은 파일을 다시 파싱하지 않도록 합니다.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from grade_analyzer import columnar
+from grade_analyzer.cache import register
+from grade_analyzer.validation import (  # noqa: F401 (기존 import 경로 유지)
+    GROUP_COLUMNS, ID_COLUMNS, TEXT_COLUMNS, detect_score_columns, validate_frame,
+)
+
+
+def content_hash(data):
+    """업로드 내용(bytes)의 해시를 반환합니다. 데이터셋 캐시의 키로 사용합니다."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def normalize_frame(df):
+    """
+    검증·변환과 dtype 정규화를 마친 새 DataFrame과 검증 보고서(ValidationReport)를 반환합니다.
+
+    성적 컬럼은 숫자로 바꾼 뒤(결시/빈 칸/읽을 수 없는 칸은 NaN) 정수 점수는 가장 작은
+    정수형으로, 실수 점수는 float32로 줄이고 학번/이름은 문자열로 통일합니다.
+    """
+    df, report = validate_frame(df)
+    score_cols = report.score_cols
+    for col in score_cols:
+        if pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        else:
+            df[col] = df[col].astype(np.float32)
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    return df, report
+
+
+@dataclass
+class Dataset:
+    """파싱과 dtype 정규화가 끝난 데이터셋. 성적 컬럼 감지는 데이터셋마다 한 번만 수행합니다."""
+    key: str
+    df: pd.DataFrame
+    score_cols: list
+    name: str = None
+    report: object = None
+    nbytes: int = field(init=False)
+
+    def __post_init__(self):
+        self.nbytes = int(self.df.memory_usage(deep=True).sum())
+
+
+class DatasetCache:
+    """
+    내용 해시를 키로 하는 데이터셋 LRU 캐시.
+
+    항목 수(max_entries)와 전체 메모리 사용량(max_bytes) 중 하나라도 넘으면
+    가장 오래 사용하지 않은 데이터셋부터 제거합니다. 상한보다 큰 데이터셋 하나는
+    캐시하지 않고 그대로 반환합니다. 모든 세션이 같은 데이터셋 객체를 공유하므로
+    세션은 데이터셋 키만 들고 있다가 매 실행마다 이 캐시에서 다시 찾습니다.
+    """
+
+    def __init__(self, max_entries=8, max_bytes=1 << 30, name=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+        if name is not None:
+            register(name, self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get(self, key):
+        with self._lock:
+            dataset = self._entries.get(key)
+            if dataset is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return dataset
+
+    def put(self, dataset):
+        if dataset.nbytes > self.max_bytes:
+            return dataset
+        with self._lock:
+            old = self._entries.pop(dataset.key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._entries[dataset.key] = dataset
+            self._nbytes += dataset.nbytes
+            self._evict()
+        return dataset
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'nbytes': self._nbytes, 'max_bytes': self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._nbytes > self.max_bytes):
+            _, dataset = self._entries.popitem(last=False)
+            self._nbytes -= dataset.nbytes
+            self.evictions += 1
+
+
+# 프로세스 전체에서 공유하는 기본 캐시
+default_cache = DatasetCache(name='데이터셋')
+
+
+def parse_upload(data, name=None):
+    """업로드 bytes를 파일 확장자에 맞는 형식(CSV/Parquet/Arrow)으로 파싱합니다."""
+    return columnar.read_frame(data, columnar.detect_format(name))
+
+
+def load_dataset(data, name=None, cache=None, store=None, persist=True):
+    """
+    업로드 내용(bytes)으로부터 데이터셋을 반환합니다.
+
+    같은 내용이 이미 캐시에 있으면 캐시된 데이터셋을, 로컬 저장소에 있으면 저장된
+    Arrow 파일을 메모리 맵으로 열어 돌려주고, 둘 다 없을 때만 파싱한 뒤 저장소에 남깁니다.
+    persist=False이면 로컬 저장소를 사용하지 않습니다.
+    """
+    cache = default_cache if cache is None else cache
+    store = columnar.default_store if store is None else store
+    key = content_hash(data)
+    dataset = cache.get(key)
+    if dataset is None:
+        dataset = store.open(key) if persist else None
+        if dataset is None:
+            df, report = normalize_frame(parse_upload(data, name))
+            dataset = Dataset(key, df, report.score_cols, name, report)
+            if persist:
+                store.save(dataset)
+        dataset = cache.put(dataset)
+    return dataset
+
+
+def load_stored_dataset(key, cache=None, store=None):
+    """로컬 저장소에 있는 데이터셋을 키로 엽니다. 없으면 None을 반환합니다."""
+    cache = default_cache if cache is None else cache
+    store = columnar.default_store if store is None else store
+    dataset = cache.get(key)
+    if dataset is None:
+        dataset = store.open(key)
+        if dataset is not None:
+            dataset = cache.put(dataset)
+    return dataset
+
+
+def dataset_from_frame(df, name=None, cache=None):
+    """이미 만들어진 DataFrame(예: 샘플 데이터)을 데이터셋으로 등록합니다."""
+    cache = default_cache if cache is None else cache
+    header = '\x1f'.join(map(str, df.columns)).encode('utf-8')
+    key = content_hash(header + pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    dataset = cache.get(key)
+    if dataset is None:
+        normalized, report = normalize_frame(df)
+        dataset = cache.put(Dataset(key, normalized, report.score_cols, name, report))
+    return dataset
@@ -0,0 +1,198 @@
+"""
+무거운 계산(통계표·상관관계, 일괄 리포트, 대용량 내보내기)을 스크립트 실행과 분리하는 백그라운드 작업 실행기.
+
+작업은 입력 키(데이터셋 키, 필터 상태, 작업 이름, 매개변수)로 구분되며 모든 세션이 함께 쓰는
+스레드 풀에서 실행됩니다. 같은 키의 작업이 이미 실행 중이면 새로 시작하지 않고 그 작업을 함께
+기다리고, 끝난 작업은 LRU로 보관해 같은 키를 다시 요청하면 결과를 바로 돌려줍니다.
+
+작업 함수는 Job 하나를 받아 job.update()로 진행률과 중간 결과를 알립니다. 세션이 필터를 바꾸거나
+같은 자리(slot)에 다른 작업을 내면 이전 작업에서 빠지고, 기다리는 세션이 하나도 남지 않은 작업은
+취소됩니다. 취소는 협조적이라 작업 함수의 다음 update()/check() 호출에서 JobCancelled가 발생합니다.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from grade_analyzer.cache import approx_nbytes, register
+
+# 점수 행렬 칸 수(학생 × 과목)가 이보다 작으면 백그라운드로 보내지 않고 바로 계산합니다
+INLINE_MAX_CELLS = 200_000
+# 작업 스레드 수 (NumPy/pandas 연산과 압축은 대부분 GIL을 놓고 실행됩니다)
+MAX_WORKERS = min(8, os.cpu_count() or 2)
+
+
+class JobCancelled(Exception):
+    """취소된 작업의 update()/check()에서 발생해 작업 함수를 멈춥니다."""
+
+
+class Job:
+    """실행 중이거나 끝난 작업 하나. 진행률과 중간 결과는 작업 스레드가 쓰고 화면 쪽이 읽습니다."""
+
+    def __init__(self, key, scope=None):
+        self.key = key
+        self.scope = scope
+        self.owners = set()
+        self.completed = 0
+        self.total = None
+        self.text = ''
+        self.partial = None
+        self.future = None
+        self.nbytes = 0
+        self._result = None
+        self._error = None
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    def update(self, completed, total, text='', partial=None):
+        """진행률(completed / total)과 설명, 중간 결과를 알립니다. 취소된 작업이면 JobCancelled."""
+        self.check()
+        self.completed, self.total, self.text = completed, total, text
+        if partial is not None:
+            self.partial = partial
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+
+    @property
+    def fraction(self):
+        return min(self.completed / self.total, 1.0) if self.total else 0.0
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def failed(self):
+        return self._error is not None
+
+    def done(self):
+        return self._finished.is_set()
+
+    def result(self, timeout=None):
+        """작업 결과. 끝나지 않았으면 timeout초까지 기다리고, 작업 중 발생한 예외는 다시 발생시킵니다."""
+        if not self._finished.wait(timeout):
+            raise TimeoutError(f"작업이 끝나지 않았습니다: {self.key}")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _run(self, func):
+        try:
+            self._result = func(self)
+            self.nbytes = approx_nbytes(self._result)
+        except BaseException as exc:
+            self._error = exc
+        finally:
+            self._finished.set()
+
+    def _abort(self):
+        self._cancel.set()
+        # 아직 시작하지 않은 작업은 풀에서 바로 빼고 끝난 것으로 표시합니다
+        if self.future is not None and self.future.cancel():
+            self._error = JobCancelled(self.key)
+            self._finished.set()
+
+
+class JobRunner:
+    """
+    키별 작업 실행과 결과 보관. owner는 세션 식별자, slot은 세션 안에서 작업이 차지하는 자리
+    (예: 'summary', 'export')로, 같은 자리에 새 작업을 내면 이전 작업에서 빠집니다.
+    끝난 작업은 max_finished개, 결과 크기의 합 max_bytes까지 보관합니다.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_finished=32, max_bytes=256 << 20, name=None):
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = 0
+        self._jobs = OrderedDict()
+        self._slots = {}
+        self._pool = None
+        self._lock = threading.Lock()
+        if name is not None:
+            register(name, self)
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='grade-job')
+        return self._pool
+
+    def submit(self, owner, slot, key, func, scope=None, inline=False):
+        """
+        key 작업을 실행하거나 이미 있는 작업에 합류해 Job을 반환합니다. func(job)이 작업 본문이고,
+        inline=True이면 풀을 거치지 않고 지금 스레드에서 끝까지 실행합니다.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            start = job is None or job.failed
+            if start:
+                job = self._jobs[key] = Job(key, scope)
+                self.misses += 1
+            else:
+                self._jobs.move_to_end(key)
+                self.hits += 1
+            previous = self._slots.get((owner, slot))
+            self._slots[(owner, slot)] = job
+            job.owners.add(owner)
+            if previous is not None and previous is not job:
+                self._release(previous, owner)
+            if start and not inline:
+                job.future = self._executor().submit(job._run, func)
+            self._evict()
+        if start and inline:
+            job._run(func)
+        return job
+
+    def get(self, key):
+        """key 작업 (없으면 None)."""
+        with self._lock:
+            return self._jobs.get(key)
+
+    def slot(self, owner, slot):
+        """owner가 slot에 마지막으로 낸 작업 (없거나 이미 빠졌으면 None)."""
+        with self._lock:
+            return self._slots.get((owner, slot))
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'entries': len(self._jobs), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'nbytes': sum(job.nbytes for job in self._jobs.values()), 'max_bytes': self.max_bytes,
+            }
+
+    def supersede(self, owner, scope):
+        """owner의 작업 중 scope(예: 데이터셋·필터 상태)가 다른 작업에서 모두 빠집니다."""
+        with self._lock:
+            for (job_owner, slot), job in list(self._slots.items()):
+                if job_owner == owner and job.scope != scope:
+                    del self._slots[(job_owner, slot)]
+                    self._release(job, owner)
+
+    def _release(self, job, owner):
+        job.owners.discard(owner)
+        if not job.owners and not job.done():
+            job._abort()
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+
+    def _evict(self):
+        finished = [key for key, job in self._jobs.items() if job.done()]
+        n_bytes = sum(self._jobs[key].nbytes for key in finished)
+        evicted = set()
+        # 오래된 것부터, 개수와 크기가 모두 상한 안에 들 때까지 (가장 최근 결과 하나는 남김)
+        for key in finished[:-1]:
+            if len(finished) - len(evicted) <= self.max_finished and n_bytes <= self.max_bytes:
+                break
+            job = self._jobs.pop(key)
+            n_bytes -= job.nbytes
+            evicted.add(id(job))
+        self.evictions += len(evicted)
+        if evicted:
+            # 쫓겨난 작업의 결과를 세션 자리가 붙잡고 있지 않도록 함께 비웁니다
+            for slot_key in [slot_key for slot_key, job in self._slots.items() if id(job) in evicted]:
+                del self._slots[slot_key]
+
+
+default_runner = JobRunner(name='백그라운드 작업')
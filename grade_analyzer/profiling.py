@@ -0,0 +1,191 @@
+"""
+Streamlit 재실행(rerun) 단위의 구간별 시간/메모리 계측.
+
+앱의 각 구간(업로드, 필터링, 탭별 렌더링, 다운로드 준비)을 section()으로 감싸면
+재실행마다 구간별 소요 시간이 기록되고 최근 N번의 기록을 표로 볼 수 있습니다.
+메모리(tracemalloc)와 cProfile 수집은 부담이 있으므로 켰을 때만 동작합니다.
+
+tracemalloc은 프로세스 전체에 하나뿐이라, 세션마다 있는 계측기들이 모듈 수준의 참조 수로
+켜고 끕니다. 마지막으로 추적을 쓰던 세션이 끄거나 사라질 때만 멈추고, 구간별 최대 메모리는
+추적 중인 세션이 하나일 때만 기록합니다 (reset_peak가 다른 세션의 측정을 덮어쓰므로).
+"""
+import cProfile
+import io
+import pstats
+import itertools
+import tempfile
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+MEMORY_COLUMN = '최대 메모리(MB, 프로세스 전체)'
+# 메모리 추적을 켠 계측기의 토큰. 비면 tracemalloc을 멈춥니다
+_tracers = set()
+_tracers_lock = threading.Lock()
+_tokens = itertools.count()
+
+
+def _acquire_tracing(token):
+    with _tracers_lock:
+        _tracers.add(token)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+def _release_tracing(token):
+    with _tracers_lock:
+        if token not in _tracers:
+            return
+        _tracers.discard(token)
+        if not _tracers and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def tracing_sessions():
+    """지금 메모리 추적을 켜 둔 계측기(세션) 수."""
+    return len(_tracers)
+
+
+class RerunProfiler:
+    """
+    재실행 하나를 begin_run()/end_run()으로 묶고, 그 안의 구간을 section()으로 잽니다.
+
+    end_run() 없이 다음 begin_run()이 호출되면(예: st.stop()으로 스크립트가 중단된 경우)
+    직전 재실행을 그 시점까지의 기록으로 마무리합니다.
+    """
+
+    def __init__(self, history=20):
+        self.history = deque(maxlen=history)
+        self.trace_memory = False
+        self.profile = False
+        self._run = None
+        self._profiler = None
+        self.last_profile = None
+        self.last_snapshot = None
+        # 세션 상태와 함께 계측기가 사라지면 추적 참조도 돌려줍니다
+        self._token = next(_tokens)
+        weakref.finalize(self, _release_tracing, self._token)
+
+    def set_history(self, size):
+        if size != self.history.maxlen:
+            self.history = deque(self.history, maxlen=size)
+
+    def begin_run(self, trace_memory=False, profile=False):
+        if self._run is not None:
+            self.end_run()
+        self.trace_memory = trace_memory
+        self.profile = profile
+        if trace_memory:
+            _acquire_tracing(self._token)
+        else:
+            _release_tracing(self._token)
+        self._run = {
+            'started': datetime.now(), 'start': time.perf_counter(), 'sections': {}, 'peaks': {}, 'peaks_skipped': False
+        }
+        if profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @contextmanager
+    def section(self, name):
+        """
+        구간 하나의 소요 시간(과 메모리 추적 시 최대 메모리 증가량)을 기록합니다. 최대 메모리는
+        프로세스 전체 기준이며, 다른 세션도 추적 중이면 서로의 측정을 망가뜨리므로 건너뜁니다.
+        """
+        if self._run is None:
+            yield
+            return
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing and tracing_sessions() > 1:
+            tracing = False
+            self._run['peaks_skipped'] = True
+        if tracing:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            sections = self._run['sections']
+            sections[name] = sections.get(name, 0.0) + time.perf_counter() - start
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                self._run['peaks'][name] = max(self._run['peaks'].get(name, 0), peak - base)
+
+    def end_run(self):
+        """현재 재실행 기록을 마무리해 기록에 추가하고 반환합니다."""
+        run, self._run = self._run, None
+        if run is None:
+            return None
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.last_profile = self._profiler
+            self._profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.last_snapshot = tracemalloc.take_snapshot()
+        run['total'] = time.perf_counter() - run.pop('start')
+        self.history.append(run)
+        return run
+
+    def history_frame(self):
+        """최근 재실행별 구간 소요 시간(ms) 표. 행은 최신 재실행부터."""
+        rows = []
+        for run in reversed(self.history):
+            row = {'시각': run['started'].strftime('%H:%M:%S'), '전체': run['total'] * 1000}
+            row.update({name: seconds * 1000 for name, seconds in run['sections'].items()})
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    @property
+    def peaks_skipped(self):
+        """가장 최근 재실행에서 다른 세션도 메모리를 추적 중이라 구간별 최대 메모리를 건너뛰었는지."""
+        return bool(self.history) and self.history[-1].get('peaks_skipped', False)
+
+    def memory_frame(self):
+        """가장 최근 재실행의 구간별 최대 메모리 증가량(MB, 프로세스 전체의 tracemalloc 기준) 표."""
+        if not self.history or not self.history[-1]['peaks']:
+            return pd.DataFrame(columns=['구간', MEMORY_COLUMN])
+        peaks = self.history[-1]['peaks']
+        return pd.DataFrame({'구간': list(peaks), MEMORY_COLUMN: [peak / 2 ** 20 for peak in peaks.values()]})
+
+    def dump_profile(self, path):
+        """마지막 cProfile 결과를 .prof 파일(pstats 형식)로 저장합니다. 없으면 False."""
+        if self.last_profile is None:
+            return False
+        self.last_profile.dump_stats(str(path))
+        return True
+
+    def profile_bytes(self):
+        """마지막 cProfile 결과를 .prof 파일 내용(bytes)으로 반환합니다."""
+        if self.last_profile is None:
+            return None
+        with tempfile.NamedTemporaryFile(suffix='.prof') as tmp:
+            self.last_profile.dump_stats(tmp.name)
+            return tmp.read()
+
+    def profile_text(self, limit=30):
+        """마지막 cProfile 결과의 누적 시간 상위 limit개 함수 요약."""
+        if self.last_profile is None:
+            return ''
+        out = io.StringIO()
+        pstats.Stats(self.last_profile, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def dump_memory(self, path, limit=50):
+        """마지막 tracemalloc 스냅샷의 코드 줄별 메모리 상위 limit개를 텍스트 파일로 저장합니다."""
+        if self.last_snapshot is None:
+            return False
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.memory_text(limit))
+        return True
+
+    def memory_text(self, limit=50):
+        if self.last_snapshot is None:
+            return ''
+        return '\n'.join(str(stat) for stat in self.last_snapshot.statistics('lineno')[:limit])
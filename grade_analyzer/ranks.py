@@ -0,0 +1,127 @@
+"""
+정렬 한 번으로 석차·백분위를 조회하는 순위 엔진.
+
+(데이터셋, 필터) 단위로 학생 평균(과 요청된 과목 점수)을 한 번 정렬해 두고, 개별 조회는
+searchsorted로 O(log n)에 답합니다. 동점은 같은 석차(1 + 나보다 높은 학생 수)를 받고,
+백분위는 동점자의 절반을 아래로 세는 중간 순위 방식((아래 + 동점/2) / 인원 × 100)입니다.
+결측(NaN)은 정렬과 인원 수에서 모두 제외합니다.
+"""
+from functools import cached_property
+
+import numpy as np
+
+
+def _sorted_valid(values):
+    values = np.asarray(values, dtype=np.float64)
+    return np.sort(values[~np.isnan(values)])
+
+
+def _percentile_of(sorted_values, values):
+    n = len(sorted_values)
+    values = np.asarray(values, dtype=np.float64)
+    below = np.searchsorted(sorted_values, values, side='left')
+    through = np.searchsorted(sorted_values, values, side='right')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = (below + (through - below) / 2) / n * 100
+    return np.where(np.isnan(values), np.nan, result)
+
+
+def _rank_of(sorted_values, values):
+    values = np.asarray(values, dtype=np.float64)
+    ranks = len(sorted_values) - np.searchsorted(sorted_values, values, side='right') + 1
+    return np.where(np.isnan(values), 0, ranks)
+
+
+class RankIndex:
+    """
+    GradeStats 하나에 대한 석차/백분위 조회. 개별 조회는 O(log n), 전체 배열은 한 번 계산 후 재사용합니다.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.sorted_means = _sorted_valid(stats.row_means)
+
+    @property
+    def nbytes(self):
+        """정렬 배열과 지금까지 만든 전체 학생 배열의 메모리 크기."""
+        arrays = [self.sorted_means, *self.__dict__.get('_sorted_subjects', [])]
+        arrays += [self.__dict__[name] for name in ('ranks', 'percentiles', 'subject_percentiles') if name in self.__dict__]
+        return sum(array.nbytes for array in arrays)
+
+    @property
+    def n_ranked(self):
+        """석차에 포함되는 (평균이 있는) 학생 수."""
+        return len(self.sorted_means)
+
+    # ---------- 평균 점수 기준 ----------
+    def percentile(self, value):
+        """평균 value의 백분위 (동점자는 절반만 아래로 셈)."""
+        return float(_percentile_of(self.sorted_means, value))
+
+    def rank(self, value):
+        """평균 value의 석차 (동점은 같은 석차)."""
+        return int(_rank_of(self.sorted_means, value))
+
+    def ties(self, value):
+        """평균이 value와 같은 학생 수 (자신 포함)."""
+        return int(np.searchsorted(self.sorted_means, value, side='right') - np.searchsorted(self.sorted_means, value, side='left'))
+
+    def quantile(self, q):
+        """평균 점수의 q 분위수 (0~1, np.quantile의 선형 보간과 같음)."""
+        return self._quantile(self.sorted_means, q)
+
+    # ---------- 과목별 ----------
+    def _subject_index(self, subject):
+        return subject if isinstance(subject, (int, np.integer)) else self.stats.score_cols.index(subject)
+
+    @cached_property
+    def _sorted_subjects(self):
+        # 과목별 정렬 결과는 과목 백분위를 처음 조회할 때 한 번에 만듭니다
+        matrix = self.stats.matrix.astype(np.float64)
+        return [_sorted_valid(matrix[:, j]) for j in range(self.stats.n_subjects)]
+
+    def subject_percentile(self, subject, value):
+        """과목(이름 또는 열 번호) 점수 value의 과목 내 백분위."""
+        return float(_percentile_of(self._sorted_subjects[self._subject_index(subject)], value))
+
+    def subject_rank(self, subject, value):
+        return int(_rank_of(self._sorted_subjects[self._subject_index(subject)], value))
+
+    def subject_quantile(self, subject, q):
+        return self._quantile(self._sorted_subjects[self._subject_index(subject)], q)
+
+    def student_subject_percentiles(self, pos):
+        """stats 안의 행 순번 pos인 학생의 과목별 백분위 dict."""
+        return {
+            subject: float(_percentile_of(sorted_values, score))
+            for subject, sorted_values, score in zip(self.stats.score_cols, self._sorted_subjects, self.stats.matrix[pos])
+        }
+
+    @staticmethod
+    def _quantile(sorted_values, q):
+        n = len(sorted_values)
+        if n == 0:
+            return np.nan
+        position = np.clip(q, 0, 1) * (n - 1)
+        lo = int(np.floor(position))
+        hi = min(lo + 1, n - 1)
+        return float(sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (position - lo))
+
+    # ---------- 전체 학생 배열 (stats 행 순서) ----------
+    @cached_property
+    def ranks(self):
+        """모든 학생의 석차 (평균이 없으면 0)."""
+        return _rank_of(self.sorted_means, self.stats.row_means)
+
+    @cached_property
+    def percentiles(self):
+        """모든 학생의 백분위 (평균이 없으면 NaN)."""
+        return _percentile_of(self.sorted_means, self.stats.row_means)
+
+    @cached_property
+    def subject_percentiles(self):
+        """학생×과목 백분위 행렬."""
+        matrix = self.stats.matrix.astype(np.float64)
+        return np.column_stack([
+            _percentile_of(sorted_values, matrix[:, j]) for j, sorted_values in enumerate(self._sorted_subjects)
+        ]) if self.stats.n_subjects else np.empty((self.stats.n_students, 0))
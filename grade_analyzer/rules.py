@@ -0,0 +1,374 @@
+"""
+규칙표 기반 해석·추천 엔진.
+
+해석 문구와 행동 추천은 코드의 if/elif 대신 JSON 규칙표(default_rules.json)로 정의합니다.
+규칙 하나는 적용 대상(scope: '개인' 또는 '반전체'), 조건(when), 문구 템플릿으로 이루어지고,
+같은 group의 규칙은 위에서부터 처음 맞는 하나만 적용됩니다(if/elif와 같음).
+
+    {"scope": "개인", "group": "성과 평가", "when": "avg >= 80 and percentile <= 30",
+     "text": "✅ {name} 학생은 {avg:.1f}점입니다."}
+
+조건은 '지표 비교연산자 값(숫자 또는 다른 지표)'을 and로 이은 식이고, 생략하면 항상 적용됩니다.
+템플릿은 str.format 형식이며 사용할 수 있는 지표 이름은 METRICS에 있습니다. 규칙표는 읽을 때
+한 번 검사·컴파일되고, 조건은 학생 전체의 지표 배열에 대한 마스크 연산으로 한꺼번에 평가됩니다.
+학교별 규칙 파일은 load_rules()로 읽습니다.
+"""
+import hashlib
+import json
+import operator
+import re
+import string
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from grade_analyzer.stats import StatsCache
+
+DEFAULT_RULES_PATH = Path(__file__).with_name('default_rules.json')
+SCOPES = ('개인', '반전체')
+# 적용 대상별 지표와 분석 dict에서 그 값을 꺼내는 방법: (숫자 지표, 문자열 지표)
+_EXTRACTORS = {
+    '개인': (
+        {
+            'avg': lambda a: a['avg'],
+            'class_avg': lambda a: a['class_avg'],
+            'diff': lambda a: a['avg'] - a['class_avg'],
+            'percentile': lambda a: a['percentile'],
+            'rank': lambda a: a['rank'],
+            'n_ranked': lambda a: a['n_ranked'],
+            'weak_score': lambda a: a['scores'][a['weaknesses'][0]] if len(a['weaknesses']) else np.nan,
+            'strong_score': lambda a: a['scores'][a['strengths'][-1]] if len(a['strengths']) else np.nan,
+        },
+        {
+            'name': lambda a: a['name'],
+            # 점수가 있는 과목이 없으면 '-'
+            'strengths': lambda a: ", ".join(a['strengths']) or '-',
+            'weaknesses': lambda a: ", ".join(a['weaknesses']) or '-',
+            'weakest_subject': lambda a: a['weaknesses'][0] if len(a['weaknesses']) else '-',
+            'strongest_subject': lambda a: a['strengths'][-1] if len(a['strengths']) else '-',
+        },
+    ),
+    '반전체': (
+        {
+            'avg': lambda a: a['avg'],
+            'std': lambda a: a['std'],
+            'max': lambda a: a['max'],
+            'min': lambda a: a['min'],
+            'best_avg': lambda a: a['best_avg'],
+            'worst_avg': lambda a: a['worst_avg'],
+            'gap': lambda a: a['best_avg'] - a['worst_avg'],
+        },
+        {
+            'best_subject': lambda a: a['best_subject'],
+            'worst_subject': lambda a: a['worst_subject'],
+            'group': lambda a: a.get('group', ''),
+        },
+    ),
+}
+METRICS = {scope: (tuple(numeric), tuple(text)) for scope, (numeric, text) in _EXTRACTORS.items()}
+_ALL_EXTRACTORS = {scope: {**numeric, **text} for scope, (numeric, text) in _EXTRACTORS.items()}
+# 배열에는 원소별로, 값 하나에는 그대로 적용됩니다 (NaN과의 비교는 언제나 거짓)
+OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+_CONDITION = re.compile(r'^\s*([A-Za-z_]\w*)\s*(<=|>=|==|!=|<|>)\s*([A-Za-z_]\w*|[-+]?\d+(?:\.\d+)?)\s*$')
+
+
+@dataclass(frozen=True)
+class Rule:
+    """컴파일된 규칙 하나. conditions는 (지표, 연산자, 값 또는 지표 이름) 목록, 문구는 Template입니다."""
+    scope: str
+    conditions: tuple
+    group: str = None
+    text: str = None
+    title: str = None
+    actions: tuple = ()
+
+
+class Template:
+    """문구 템플릿과 그 안에서 쓰는 지표(fields). 지표를 쓰지 않는 문구는 컴파일할 때 한 번만 만들어 둡니다."""
+    __slots__ = ('source', 'fields', 'literal')
+
+    def __init__(self, source, fields=()):
+        self.source = source
+        self.fields = tuple(fields)
+        self.literal = None if self.fields else source.format()
+
+    def __getstate__(self):
+        return self.source, self.fields, self.literal
+
+    def __setstate__(self, state):
+        self.source, self.fields, self.literal = state
+
+    def render(self, values):
+        return self.literal if self.literal is not None else self.source.format_map(values)
+
+
+def _fields(template):
+    return [field for _, field, _, _ in string.Formatter().parse(template) if field is not None]
+
+
+def _compile_condition(when, numeric, where):
+    conditions = []
+    for part in re.split(r'\s+and\s+', when.strip()) if when and when.strip() else []:
+        match = _CONDITION.match(part)
+        if match is None:
+            raise ValueError(f"{where}: 조건을 해석할 수 없습니다: '{part}' (예: 'avg >= 80 and diff > 0')")
+        metric, op, rhs = match.groups()
+        for name in (metric, rhs):
+            if name[0].isalpha() or name[0] == '_':
+                if name not in numeric:
+                    raise ValueError(f"{where}: 조건에 쓸 수 없는 지표입니다: '{name}' (사용 가능: {', '.join(numeric)})")
+        conditions.append((metric, op, rhs if rhs in numeric else float(rhs)))
+    return tuple(conditions)
+
+
+def _check_template(template, scope, where):
+    numeric, text = METRICS[scope]
+    if not isinstance(template, str):
+        raise ValueError(f"{where}: 문구는 문자열이어야 합니다")
+    try:
+        fields = _fields(template)
+        for field in fields:
+            if field not in numeric and field not in text:
+                raise ValueError(f"{where}: 문구에 쓸 수 없는 지표입니다: '{{{field}}}'")
+        # 시험 삼아 채워 보며 형식 지정자(:.1f 등)가 지표 종류와 맞는지 확인합니다
+        template.format(**dict.fromkeys(numeric, 1.0), **dict.fromkeys(text, '가'))
+    except (IndexError, KeyError, ValueError) as exc:
+        if str(exc).startswith(where):
+            raise
+        raise ValueError(f"{where}: 문구 템플릿 오류: {exc}") from None
+    return Template(template, fields)
+
+
+def _compile_rule(spec, kind, i):
+    where = f"{'해석' if kind == 'insights' else '추천'} 규칙 {i + 1}번"
+    if not isinstance(spec, dict):
+        raise ValueError(f"{where}: 규칙은 JSON 객체여야 합니다")
+    scope = spec.get('scope')
+    if scope not in SCOPES:
+        raise ValueError(f"{where}: scope는 {' 또는 '.join(SCOPES)}여야 합니다")
+    conditions = _compile_condition(spec.get('when'), METRICS[scope][0], where)
+    if kind == 'insights':
+        if 'text' not in spec:
+            raise ValueError(f"{where}: text가 없습니다")
+        return Rule(scope, conditions, spec.get('group'), text=_check_template(spec['text'], scope, where))
+    if 'title' not in spec or not isinstance(spec.get('actions'), list):
+        raise ValueError(f"{where}: title과 actions(문자열 목록)가 필요합니다")
+    return Rule(
+        scope, conditions, spec.get('group'),
+        title=_check_template(spec['title'], scope, where),
+        actions=tuple(_check_template(action, scope, where) for action in spec['actions']),
+    )
+
+
+class _Values(dict):
+    """분석 dict 하나의 지표 값 (미리 평가하지 않은 분석 dict의 조건 평가용). 조건이 쓰는 지표만 꺼냅니다."""
+
+    def __init__(self, analysis):
+        super().__init__()
+        self.analysis = analysis
+        self.extractors = _ALL_EXTRACTORS[analysis['type']]
+
+    def __missing__(self, name):
+        value = self[name] = self.extractors[name](self.analysis)
+        return value
+
+
+def student_metrics(stats):
+    """학생 전체의 개인 지표 배열 (지표 이름 → 길이 n 배열). 조건 평가에 쓰는 숫자 지표만 만듭니다."""
+    n = stats.n_students
+    class_avg = stats.col_means.mean()
+    matrix = stats.matrix
+    present = ~np.isnan(matrix)
+    any_present = present.any(axis=1)
+    # 결측을 뺀 최저/최고 과목 점수 (모두 결측이면 NaN)
+    weak = np.where(any_present, np.where(present, matrix, np.inf).min(axis=1), np.nan)
+    strong = np.where(any_present, np.where(present, matrix, -np.inf).max(axis=1), np.nan)
+    return {
+        'avg': stats.row_means,
+        'class_avg': np.full(n, class_avg),
+        'diff': stats.row_means - class_avg,
+        'percentile': stats.ranks.percentiles,
+        'rank': stats.ranks.ranks,
+        'n_ranked': np.full(n, stats.ranks.n_ranked),
+        'weak_score': weak.astype(np.float64),
+        'strong_score': strong.astype(np.float64),
+    }
+
+
+class RuleSet:
+    """
+    컴파일된 해석·추천 규칙표. key는 규칙 내용의 해시로, 캐시 키와 미리 평가한 결과의 확인에 씁니다.
+    """
+
+    def __init__(self, spec, source=None):
+        if not isinstance(spec, dict) or not isinstance(spec.get('insights', []), list) \
+                or not isinstance(spec.get('recommendations', []), list):
+            raise ValueError("규칙 파일에는 insights와 recommendations 목록이 있어야 합니다")
+        self.source = source
+        self.description = spec.get('description', '')
+        self.insights = tuple(_compile_rule(rule, 'insights', i) for i, rule in enumerate(spec.get('insights', [])))
+        self.recommendations = tuple(
+            _compile_rule(rule, 'recommendations', i) for i, rule in enumerate(spec.get('recommendations', []))
+        )
+        # 문구를 채울 때 쓰는 지표: (종류, 적용 규칙 번호 tuple) → 지표 이름
+        self._fields = {}
+        # (종류, scope) → 그 scope의 규칙 번호 (규칙표 순서)
+        self._scoped = {
+            (kind, scope): [i for i, rule in enumerate(rules) if rule.scope == scope]
+            for kind, rules in self._kinds() for scope in SCOPES
+        }
+        canonical = json.dumps(spec, ensure_ascii=False, sort_keys=True)
+        self.key = hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def from_json(cls, text, source=None):
+        """JSON 문자열(또는 bytes)에서 규칙표를 만듭니다."""
+        if isinstance(text, (bytes, bytearray)):
+            text = text.decode('utf-8-sig')
+        try:
+            spec = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"규칙 파일이 올바른 JSON이 아닙니다: {exc}") from None
+        return cls(spec, source)
+
+    def _kinds(self):
+        return (('insights', self.insights), ('recommendations', self.recommendations))
+
+    def _mask(self, kind, scope, metrics, n):
+        """scope 규칙별 적용 여부 (규칙 수 × n). 같은 group 안에서는 처음 맞은 규칙만 남깁니다."""
+        rules = getattr(self, kind)
+        indices = self._scoped[kind, scope]
+        mask = np.ones((len(indices), n), dtype=bool)
+        taken = {}
+        for row, i in enumerate(indices):
+            rule = rules[i]
+            for metric, op, rhs in rule.conditions:
+                mask[row] &= OPERATORS[op](metrics[metric], metrics[rhs] if isinstance(rhs, str) else rhs)
+            if rule.group is not None:
+                if rule.group in taken:
+                    mask[row] &= ~taken[rule.group]
+                    taken[rule.group] |= mask[row]
+                else:
+                    taken[rule.group] = mask[row].copy()
+        return indices, mask
+
+    def match(self, scope, metrics):
+        """
+        지표 배열(지표 이름 → 길이 n 배열)에 대해 학생(또는 그룹)별로 적용되는 규칙 번호를 구합니다.
+        (해석 규칙 번호 tuple, 추천 규칙 번호 tuple)의 길이 n 목록을 반환합니다.
+        """
+        n = len(next(iter(metrics.values()))) if metrics else 0
+        matched = []
+        for kind, _ in self._kinds():
+            indices, mask = self._mask(kind, scope, metrics, n)
+            if n == 0:
+                matched.append([])
+                continue
+            # 적용 규칙 조합은 몇 가지뿐이므로 조합마다 번호 tuple을 한 번만 만듭니다
+            if len(indices) < 63:
+                codes = (mask.astype(np.int64) << np.arange(len(indices), dtype=np.int64)[:, None]).sum(axis=0)
+                codes, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+                combos = mask[:, first].T
+            else:
+                combos, inverse = np.unique(mask.T, axis=0, return_inverse=True)
+            ids = [tuple(indices[j] for j in np.flatnonzero(combo)) for combo in combos]
+            matched.append([ids[c] for c in inverse.reshape(-1).tolist()])
+        return list(zip(*matched)) if n else []
+
+    def annotate(self, analyses, metrics=None):
+        """
+        같은 scope의 분석 dict들에 적용 규칙을 미리 평가해 'matched' 키로 붙입니다.
+        metrics(지표 배열)를 주지 않으면 분석 dict에서 지표를 모읍니다.
+        """
+        if not analyses:
+            return analyses
+        scope = analyses[0]['type']
+        if metrics is None:
+            numeric = METRICS[scope][0]
+            values = [_Values(analysis) for analysis in analyses]
+            metrics = {name: np.array([v[name] for v in values], dtype=np.float64) for name in numeric}
+        for analysis, (insight_ids, rec_ids) in zip(analyses, self.match(scope, metrics)):
+            analysis['matched'] = (self.key, insight_ids, rec_ids)
+        return analyses
+
+    def _matched(self, kind, analysis):
+        """분석 dict에 적용할 kind 규칙 번호와, 그 규칙들의 문구를 채울 지표 값 dict."""
+        matched = analysis.get('matched')
+        if matched is not None and matched[0] == self.key:
+            ids = matched[1] if kind == 'insights' else matched[2]
+        else:
+            ids = self._match_one(analysis['type'], _Values(analysis))[0 if kind == 'insights' else 1]
+        fields = self._fields.get((kind, ids))
+        if fields is None:
+            if kind == 'insights':
+                templates = [self.insights[i].text for i in ids]
+            else:
+                templates = [t for i in ids for t in (self.recommendations[i].title, *self.recommendations[i].actions)]
+            fields = self._fields[kind, ids] = tuple(dict.fromkeys(f for t in templates for f in t.fields))
+        # 규칙 조합마다 쓰는 지표가 정해져 있으므로 그 지표만 분석 dict에서 꺼냅니다
+        extractors = _ALL_EXTRACTORS[analysis['type']]
+        return ids, {name: extractors[name](analysis) for name in fields}
+
+    def _match_one(self, scope, values):
+        # 미리 평가하지 않은 분석 dict 하나: match()와 같은 규칙(같은 group은 처음 맞은 것만)을 값 하나에 적용합니다
+        matched = []
+        for kind, rules in self._kinds():
+            ids, taken = [], set()
+            for i in self._scoped[kind, scope]:
+                rule = rules[i]
+                if rule.group in taken:
+                    continue
+                for metric, op, rhs in rule.conditions:
+                    if not OPERATORS[op](values[metric], values[rhs] if isinstance(rhs, str) else rhs):
+                        break
+                else:
+                    ids.append(i)
+                    if rule.group is not None:
+                        taken.add(rule.group)
+            matched.append(tuple(ids))
+        return tuple(matched)
+
+    def render_insights(self, analysis):
+        """분석 dict 하나의 해석 문구 목록."""
+        ids, values = self._matched('insights', analysis)
+        return [self.insights[i].text.render(values) for i in ids]
+
+    def render_recommendations(self, analysis):
+        """분석 dict 하나의 추천 목록 ({'title', 'actions'} dict)."""
+        ids, values = self._matched('recommendations', analysis)
+        return [
+            {
+                'title': self.recommendations[i].title.render(values),
+                'actions': [action.render(values) for action in self.recommendations[i].actions],
+            }
+            for i in ids
+        ]
+
+
+# 내용 해시 → 컴파일한 규칙표. 업로드할 때마다 새 항목이 생기므로 최근 것만 남깁니다.
+_loaded = StatsCache(max_entries=16, name='규칙표')
+_default = None
+
+
+def load_rules(source, name=None):
+    """
+    규칙 파일(경로 또는 업로드한 파일 내용 bytes)을 읽어 RuleSet을 반환합니다. 내용이 같으면 컴파일한
+    규칙표를 재사용합니다(최근 16개까지). 형식이 잘못된 파일은 어느 규칙이 왜 잘못됐는지 알려 주는
+    ValueError를 냅니다.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    else:
+        data, name = Path(source).read_bytes(), name or str(source)
+    return _loaded.get_or_build(hashlib.sha1(data).hexdigest(), lambda: RuleSet.from_json(data, name))
+
+
+def default_rules():
+    """패키지에 들어 있는 기본 규칙표 (처음 쓸 때 한 번 읽습니다)."""
+    global _default
+    if _default is None:
+        _default = load_rules(DEFAULT_RULES_PATH)
+    return _default
@@ -0,0 +1,283 @@
+"""
+통계적 유의성 검정과 분포 비교.
+
+과목 쌍별 대응표본 t-검정·Wilcoxon 부호순위 검정, 그룹 간 일원분산분석(ANOVA)·Kruskal-Wallis
+검정, 상관계수 p값, z점수, 이상치 탐지를 제공합니다. 검정 통계량은 과목 쌍이나 과목마다
+scipy.stats 함수를 부르지 않고 점수 행렬 전체에 대한 행렬곱·구간 합·열 단위 순위로 한 번에 구하고,
+scipy는 분포의 꼬리 확률(p값)을 배열째 계산할 때만 씁니다. scipy는 검정을 실제로 할 때만 불러옵니다.
+
+순위 검정의 p값은 동점 보정을 한 정규 근사입니다 (표본이 50명을 넘거나 동점이 있으면 scipy와 같은 값).
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# 유의수준과 z점수 판정 기준 (양측 5%)
+ALPHA = 0.05
+Z_CRITICAL = 1.959964
+# Tukey 이상치 울타리 배수 (Q1 - k·IQR, Q3 + k·IQR)
+IQR_FACTOR = 1.5
+# 순위 검정에서 한 번에 순위를 매기는 칸 수 (학생 수 × 과목 쌍 수)
+CHUNK_CELLS = 1 << 22
+# 정수 점수의 값 범위가 이보다 좁으면 정렬 대신 값별 개수로 순위를 매깁니다
+MAX_COUNT_RANGE = 100_000
+# 이상치 목록에 남기는 최대 칸 수
+MAX_OUTLIER_ROWS = 1000
+
+
+def _ranks(values):
+    """
+    열마다 평균 순위(동점은 평균)와 동점 보정항 Σ(t³ - t). 결측은 순위 NaN으로 두고 제외합니다.
+
+    점수처럼 값이 범위가 좁은 정수이면 정렬 없이 값별 개수(bincount)의 누적합으로 순위를 구하고,
+    아니면 열마다 한 번 정렬해 같은 값이 이어지는 구간의 시작·끝 위치로 구합니다.
+    """
+    valid = ~np.isnan(values)
+    present = values[valid]
+    if present.size and (present == np.rint(present)).all() and present.max() - present.min() <= MAX_COUNT_RANGE:
+        return _count_ranks(values, valid, present.min(), int(present.max() - present.min()) + 1)
+    # 열을 행으로 돌려 연속된 메모리에서 정렬합니다
+    ranks, ties = _sort_ranks(np.ascontiguousarray(values.T))
+    return ranks.T, ties
+
+
+def _count_ranks(values, valid, low, width):
+    n_cols = values.shape[1]
+    codes = np.where(valid, values - low, 0).astype(np.int64) + np.arange(n_cols, dtype=np.int64) * width
+    counts = np.bincount(codes[valid], minlength=n_cols * width).reshape(n_cols, width).astype(np.float64)
+    # 값 v의 평균 순위 = (v보다 작은 값의 수) + (v의 개수 + 1) / 2
+    average = np.cumsum(counts, axis=1) - counts + (counts + 1) / 2
+    ranks = np.where(valid, average.ravel()[codes], np.nan)
+    return ranks, (counts ** 3 - counts).sum(axis=1)
+
+
+def _sort_ranks(rows):
+    # 행마다 정렬한 뒤, 동점 구간 안에서 순서 순위와 평균 순위의 차의 제곱합이 (t³ - t) / 12인 점을 씁니다
+    n = rows.shape[1]
+    order = np.argsort(rows, axis=1)
+    ordered = np.take_along_axis(rows, order, axis=1)
+    positions = np.arange(n, dtype=np.float64)
+    starts = np.ones(ordered.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    ends = np.ones(ordered.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, positions, n)[:, ::-1], axis=1)[:, ::-1]
+    average = np.where(np.isnan(ordered), np.nan, (first + last) / 2 + 1)
+    ties = 12 * np.nansum((positions + 1 - average) ** 2, axis=1)
+    ranks = np.empty_like(average)
+    np.put_along_axis(ranks, order, average, axis=1)
+    return ranks, ties
+
+
+def holm(pvalues):
+    """Holm-Bonferroni 다중 비교 보정 p값 (NaN은 검정 수에서 빼고 그대로 둡니다)."""
+    pvalues = np.asarray(pvalues, dtype=np.float64)
+    adjusted = np.full(pvalues.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(pvalues))
+    order = valid[np.argsort(pvalues[valid], kind='stable')]
+    m = len(order)
+    adjusted[order] = np.minimum(np.maximum.accumulate(pvalues[order] * (m - np.arange(m))), 1.0)
+    return adjusted
+
+
+def stars(pvalues):
+    """p값을 유의 표시(*** < 0.001, ** < 0.01, * < 0.05)로 바꿉니다."""
+    pvalues = np.asarray(pvalues, dtype=np.float64)
+    return np.select([pvalues < 0.001, pvalues < 0.01, pvalues < ALPHA], ['***', '**', '*'], '')
+
+
+def corr_pvalues(stats):
+    """
+    과목 간 피어슨 상관계수의 양측 p값 DataFrame. 과목 쌍마다 두 점수가 모두 있는 학생 수로
+    t = r·√((n-2)/(1-r²))를 구해 자유도 n-2의 t분포로 계산합니다. 대각선과 학생 3명 미만인 쌍은 NaN입니다.
+    """
+    from scipy.stats import t as t_dist
+
+    r = stats.corr.to_numpy()
+    n = stats.pair_counts.astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = r * np.sqrt((n - 2) / (1 - r ** 2))
+        pvalues = 2 * t_dist.sf(np.abs(t), n - 2)
+    pvalues[(n < 3) | np.eye(len(r), dtype=bool)] = np.nan
+    return pd.DataFrame(pvalues, index=stats.score_cols, columns=stats.score_cols)
+
+
+def paired_tests(stats, wilcoxon=True, progress=None):
+    """
+    모든 과목 쌍의 평균 차이 검정표. 두 과목 점수가 모두 있는 학생만 씁니다.
+
+    대응표본 t-검정에 필요한 쌍별 학생 수·차이의 합·제곱합은 마스크 행렬곱 몇 번으로 모든 쌍에 대해
+    한꺼번에 구합니다. wilcoxon=True이면 차이 행렬을 CHUNK_CELLS 칸씩 묶어 열 단위로 순위를 매겨
+    Wilcoxon 부호순위 검정(차이 0은 제외)도 함께 계산하고, 묶음마다 progress(완료 쌍 수, 전체 쌍 수)를
+    호출합니다. p값 보정은 t-검정 p값에 대한 Holm 방법입니다.
+    """
+    from scipy.stats import norm, t as t_dist
+
+    matrix = stats.matrix.astype(np.float64)
+    mask = ~np.isnan(matrix)
+    present = np.where(mask, matrix, 0.0)
+    weights = mask.astype(np.float64)
+    first, second = np.triu_indices(stats.n_subjects, 1)
+
+    # (i, j) 칸: 과목 i와 j가 모두 있는 학생에 대한 과목 i 점수의 합 / 제곱합
+    sums = present.T @ weights
+    squares = (present ** 2).T @ weights
+    cross = present.T @ present
+    n = stats.pair_counts[first, second].astype(np.float64)
+    diff_sum = sums[first, second] - sums[second, first]
+    diff_sq = squares[first, second] + squares[second, first] - 2 * cross[first, second]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = diff_sum / n
+        sd = np.sqrt(np.maximum(diff_sq - n * mean ** 2, 0) / (n - 1))
+        t = mean / (sd / np.sqrt(n))
+        t_p = 2 * t_dist.sf(np.abs(t), n - 1)
+        effect = mean / sd
+    table = pd.DataFrame({
+        '과목 A': np.asarray(stats.score_cols, dtype=object)[first],
+        '과목 B': np.asarray(stats.score_cols, dtype=object)[second],
+        '학생 수': n.astype(np.int64),
+        '평균 차이 (A-B)': mean,
+        't': t,
+        't-검정 p': t_p,
+        '효과 크기 (d)': effect,
+    })
+    if wilcoxon:
+        table['Wilcoxon p'] = _wilcoxon_pvalues(matrix, first, second, progress, norm)
+    table['보정 p (Holm)'] = holm(t_p)
+    table['유의'] = stars(table['보정 p (Holm)'])
+    return table
+
+
+def _wilcoxon_pvalues(matrix, first, second, progress, norm):
+    n_pairs = len(first)
+    pvalues = np.full(n_pairs, np.nan)
+    chunk = max(1, CHUNK_CELLS // max(len(matrix), 1))
+    for start in range(0, n_pairs, chunk):
+        stop = min(start + chunk, n_pairs)
+        diff = matrix[:, first[start:stop]] - matrix[:, second[start:stop]]
+        diff[diff == 0] = np.nan
+        ranks, ties = _ranks(np.abs(diff))
+        n = (~np.isnan(diff)).sum(axis=0).astype(np.float64)
+        positive = np.where(diff > 0, ranks, 0.0).sum(axis=0)
+        expected = n * (n + 1) / 4
+        variance = n * (n + 1) * (2 * n + 1) / 24 - ties / 48
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = (positive - expected) / np.sqrt(variance)
+        pvalues[start:stop] = np.where(n > 0, 2 * norm.sf(np.abs(z)), np.nan)
+        if progress is not None:
+            progress(stop, n_pairs)
+    return pvalues
+
+
+def group_tests(groups):
+    """
+    그룹(반, 학년 등) 간 차이 검정표. 과목마다, 그리고 학생 평균에 대해 일원분산분석(F, η²)과
+    Kruskal-Wallis 검정(H)을 계산합니다. 그룹 순으로 정렬한 행렬에 구간 합(np.add.reduceat)을
+    적용해 모든 과목을 한 번에 처리하며, 과목마다 점수가 있는 학생이 한 명 이상인 그룹만 셉니다.
+    """
+    from scipy.stats import chi2, f as f_dist
+
+    stats = groups.stats
+    columns = [*stats.score_cols, '학생 평균']
+    if not groups.n_groups:
+        return pd.DataFrame(columns=['과목', '그룹 수', '학생 수', 'F', 'ANOVA p', 'η²', 'H', 'Kruskal p', '유의'])
+    values = np.column_stack([stats.matrix, stats.row_means])[groups.order].astype(np.float64)
+    present = ~np.isnan(values)
+
+    def segment_sum(array):
+        return np.add.reduceat(array, groups.starts, axis=0)
+
+    counts = segment_sum(present.astype(np.float64))
+    sums = segment_sum(np.where(present, values, 0.0))
+    n = counts.sum(axis=0)
+    k = (counts > 0).sum(axis=0).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+        grand = sums.sum(axis=0) / n
+        between = np.nansum(counts * (means - grand) ** 2, axis=0)
+        deviations = values - np.repeat(np.nan_to_num(means), groups.sizes, axis=0)
+        within = np.where(present, deviations ** 2, 0.0).sum(axis=0)
+        f = (between / (k - 1)) / (within / (n - k))
+        f_p = f_dist.sf(f, k - 1, n - k)
+        eta = between / (between + within)
+
+        ranks, ties = _ranks(values)
+        rank_sums = segment_sum(np.where(present, ranks, 0.0))
+        h = 12 / (n * (n + 1)) * np.nansum(rank_sums ** 2 / counts, axis=0) - 3 * (n + 1)
+        h /= 1 - ties / (n ** 3 - n)
+        h_p = chi2.sf(h, k - 1)
+    invalid = k < 2
+    f_p[invalid] = h_p[invalid] = np.nan
+    return pd.DataFrame({
+        '과목': columns,
+        '그룹 수': k.astype(np.int64),
+        '학생 수': n.astype(np.int64),
+        'F': f,
+        'ANOVA p': f_p,
+        'η²': eta,
+        'H': h,
+        'Kruskal p': h_p,
+        '유의': stars(h_p),
+    })
+
+
+def z_scores(stats):
+    """과목별 z점수 행렬 (과목 평균과 표본 표준편차 기준, 결측은 NaN)."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (stats.matrix.astype(np.float64) - stats.col_means) / stats.col_std
+
+
+def average_z(stats):
+    """학생 평균의 z점수 (학생 평균들의 평균과 표본 표준편차 기준)."""
+    means = stats.row_means
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return (means - np.nanmean(means)) / np.nanstd(means, ddof=1)
+
+
+def standing(z, threshold=Z_CRITICAL):
+    """z점수 판정: 기준(양측 5%)을 넘으면 '유의하게 높음/낮음', 아니면 '평균 범위'."""
+    if np.isnan(z):
+        return '판정 불가'
+    if z >= threshold:
+        return '유의하게 높음'
+    if z <= -threshold:
+        return '유의하게 낮음'
+    return '평균 범위'
+
+
+def outliers(stats, factor=IQR_FACTOR, max_rows=MAX_OUTLIER_ROWS):
+    """
+    Tukey 울타리(Q1 - factor·IQR, Q3 + factor·IQR) 밖의 점수.
+
+    (과목별 요약표, 이상치 목록)을 반환합니다. 목록은 z점수 절댓값이 큰 순으로 최대 max_rows칸이며
+    '행'은 stats 안의 행 순번입니다.
+    """
+    matrix = stats.matrix.astype(np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        q1, q3 = np.nanpercentile(matrix, [25, 75], axis=0)
+    low, high = q1 - factor * (q3 - q1), q3 + factor * (q3 - q1)
+    below, above = matrix < low, matrix > high
+    summary = pd.DataFrame({
+        '과목': stats.score_cols,
+        'Q1': q1,
+        'Q3': q3,
+        '하한': low,
+        '상한': high,
+        '낮은 이상치': below.sum(axis=0),
+        '높은 이상치': above.sum(axis=0),
+    })
+    rows, cols = np.nonzero(below | above)
+    z = z_scores(stats)[rows, cols]
+    keep = np.argsort(-np.abs(z), kind='stable')[:max_rows]
+    detail = pd.DataFrame({
+        '행': rows[keep],
+        '과목': np.asarray(stats.score_cols, dtype=object)[cols[keep]],
+        '점수': matrix[rows[keep], cols[keep]],
+        'z점수': z[keep],
+        '방향': np.where(above[rows[keep], cols[keep]], '높음', '낮음'),
+    })
+    return summary, detail
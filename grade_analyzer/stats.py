@@ -0,0 +1,270 @@
+"""
+한 번 만들어 모든 탭이 공유하는 성적 통계 객체.
+
+성적 컬럼을 연속된 float32 행렬 하나로 모은 뒤, 각 집계값은 처음 요청될 때
+한 번만 계산하고 이후에는 저장된 값을 재사용합니다.
+"""
+import threading
+import warnings
+from collections import OrderedDict
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from grade_analyzer.cache import approx_nbytes, register
+from grade_analyzer.ranks import RankIndex
+
+
+def _nan_reduce(func, matrix, axis):
+    # 전부 결측인 행/열에 대한 경고는 무시하고 NaN을 돌려줍니다 (pandas와 동일)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return func(matrix, axis=axis)
+
+
+class GradeStats:
+    """
+    (데이터셋, 필터) 단위의 통계 객체.
+
+    모든 집계는 결측값(NaN)을 건너뜁니다. 과목별 표준편차는 표본 표준편차(ddof=1),
+    전체 표준편차는 모표준편차(ddof=0)로 계산하고, 상관계수는 두 과목 점수가 모두 있는
+    학생만으로(pairwise-complete) 계산합니다.
+    """
+
+    def __init__(self, matrix, score_cols):
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        # 여러 세션이 같은 객체를 공유하므로 점수 행렬은 읽기 전용으로 둡니다
+        self.matrix.flags.writeable = False
+        self.score_cols = list(score_cols)
+
+    @classmethod
+    def from_frame(cls, df, score_cols):
+        return cls(df[score_cols].to_numpy(dtype=np.float32, na_value=np.nan), score_cols)
+
+    def subset(self, rows):
+        """선택된 행(불리언 마스크 또는 행 위치)만 담은 통계 객체를 반환합니다."""
+        sub = GradeStats(self.matrix[rows], self.score_cols)
+        # 이미 계산된 행 평균은 다시 계산하지 않고 잘라서 넘겨줍니다
+        if 'row_means' in self.__dict__:
+            sub.__dict__['row_means'] = self.row_means[rows]
+        return sub
+
+    @property
+    def n_students(self):
+        return self.matrix.shape[0]
+
+    @property
+    def nbytes(self):
+        """점수 행렬과 지금까지 계산해 둔 집계 결과의 메모리 크기 (캐시 크기 계산용)."""
+        return self.matrix.nbytes + sum(approx_nbytes(value) for value in self.__dict__.values() if value is not self.matrix)
+
+    @property
+    def n_subjects(self):
+        return self.matrix.shape[1]
+
+    @property
+    def flat(self):
+        """결측을 뺀 모든 점수 (1차원)."""
+        return self._present_values
+
+    @cached_property
+    def _present_values(self):
+        values = self.matrix.ravel()
+        return values[~np.isnan(values)]
+
+    # ---------- 학생별(행) 집계 ----------
+    @cached_property
+    def row_means(self):
+        return _nan_reduce(np.nanmean, self.matrix.astype(np.float64), axis=1)
+
+    @cached_property
+    def ranks(self):
+        """석차/백분위 조회용 순위 엔진 (학생 평균을 한 번만 정렬)."""
+        return RankIndex(self)
+
+    # ---------- 과목별(열) 집계 ----------
+    @cached_property
+    def col_means(self):
+        return _nan_reduce(np.nanmean, self.matrix.astype(np.float64), axis=0)
+
+    @cached_property
+    def col_medians(self):
+        return _nan_reduce(np.nanmedian, self.matrix, axis=0).astype(np.float64)
+
+    @cached_property
+    def col_std(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanstd(self.matrix.astype(np.float64), axis=0, ddof=1)
+
+    @cached_property
+    def col_max(self):
+        return _nan_reduce(np.nanmax, self.matrix, axis=0).astype(np.float64)
+
+    @cached_property
+    def col_min(self):
+        return _nan_reduce(np.nanmin, self.matrix, axis=0).astype(np.float64)
+
+    @cached_property
+    def pair_counts(self):
+        """과목 쌍마다 두 점수가 모두 있는 학생 수 (k × k 정수 행렬)."""
+        mask = ~np.isnan(self.matrix)
+        if mask.all():
+            return np.full((self.n_subjects, self.n_subjects), self.n_students, dtype=np.int64)
+        weights = mask.astype(np.float64)
+        return np.rint(weights.T @ weights).astype(np.int64)
+
+    @cached_property
+    def corr(self):
+        """
+        과목 간 피어슨 상관계수 DataFrame.
+
+        결측이 있으면 마스크 행렬곱으로 과목 쌍마다 두 점수가 모두 있는 학생만의 합계를 한 번에
+        구합니다 (pandas DataFrame.corr와 같은 결과). 공통 학생이 2명 미만인 쌍은 NaN입니다.
+        """
+        matrix = self.matrix.astype(np.float64)
+        mask = ~np.isnan(matrix)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if mask.all():
+                corr = np.atleast_2d(np.corrcoef(matrix, rowvar=False))
+            else:
+                # 열 평균으로 중심화해 큰 수끼리의 뺄셈 오차를 줄입니다
+                centered = np.where(mask, matrix - self.col_means, 0.0)
+                weights = mask.astype(np.float64)
+                n = self.pair_counts
+                sum_x = centered.T @ weights
+                sum_xx = (centered ** 2).T @ weights
+                cov = centered.T @ centered - sum_x * sum_x.T / n
+                var_x = sum_xx - sum_x ** 2 / n
+                corr = cov / np.sqrt(var_x * var_x.T)
+                corr[n < 2] = np.nan
+            corr = np.clip(corr, -1, 1)
+        return pd.DataFrame(corr, index=self.score_cols, columns=self.score_cols)
+
+    # ---------- 전체 점수 집계 ----------
+    @cached_property
+    def overall_mean(self):
+        return float(self.flat.mean(dtype=np.float64)) if self.flat.size else np.nan
+
+    @cached_property
+    def overall_median(self):
+        return float(np.median(self.flat)) if self.flat.size else np.nan
+
+    @cached_property
+    def overall_std(self):
+        return float(self.flat.std(dtype=np.float64)) if self.flat.size else np.nan
+
+    @cached_property
+    def overall_max(self):
+        return float(self.flat.max()) if self.flat.size else np.nan
+
+    @cached_property
+    def overall_min(self):
+        return float(self.flat.min()) if self.flat.size else np.nan
+
+    def summary_table(self):
+        """통계 요약 탭의 과목별 통계표를 반환합니다."""
+        return pd.DataFrame({
+            '과목': self.score_cols,
+            '평균': self.col_means,
+            '중앙값': self.col_medians,
+            '표준편차': self.col_std,
+            '최고점': self.col_max,
+            '최저점': self.col_min,
+        })
+
+
+class StatsCache:
+    """
+    (데이터셋 키, 필터 상태) 등을 키로 GradeStats·인덱스 같은 파생 결과를 보관하는 LRU 캐시.
+
+    항목 수(max_entries)나 항목 크기의 합(max_bytes, approx_nbytes 기준)이 상한을 넘으면 가장 오래
+    쓰지 않은 항목부터 제거합니다. 가장 최근 항목 하나는 상한보다 커도 남겨 둡니다. name을 주면
+    cache_metrics()의 공유 캐시 상태표에 나타납니다.
+    """
+
+    def __init__(self, max_entries=16, max_bytes=None, name=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+        if name is not None:
+            register(name, self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            stats = self._entries.get(key)
+            if stats is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                # GradeStats처럼 집계를 나중에 채우는 객체는 적중할 때 크기를 다시 잽니다
+                if hasattr(stats, 'nbytes'):
+                    self._resize(key, approx_nbytes(stats))
+                    self._evict()
+                return stats
+            self.misses += 1
+        stats = build()
+        size = approx_nbytes(stats)
+        with self._lock:
+            self._entries[key] = stats
+            self._entries.move_to_end(key)
+            self._resize(key, size)
+            self._evict()
+        return stats
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'nbytes': self._nbytes, 'max_bytes': self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._nbytes = 0
+
+    def _resize(self, key, size):
+        self._nbytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+
+    def _evict(self):
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or (self.max_bytes is not None and self._nbytes > self.max_bytes)
+        ):
+            key, _ = self._entries.popitem(last=False)
+            self._nbytes -= self._sizes.pop(key)
+            self.evictions += 1
+
+
+default_cache = StatsCache(max_entries=32, max_bytes=512 << 20, name='통계 객체')
+
+
+def dataset_stats(dataset, cache=None):
+    """필터를 적용하지 않은 데이터셋 전체의 통계 객체를 반환합니다."""
+    cache = default_cache if cache is None else cache
+    return cache.get_or_build((dataset.key, None), lambda: GradeStats.from_frame(dataset.df, dataset.score_cols))
+
+
+def filtered_stats(dataset, filter_key, rows, cache=None):
+    """
+    필터 상태(filter_key)로 선택된 행(rows)의 통계 객체를 반환합니다.
+    모든 행이 선택되었으면 데이터셋 전체의 통계 객체를 그대로 재사용합니다.
+    """
+    cache = default_cache if cache is None else cache
+    full = dataset_stats(dataset, cache)
+    if len(rows) == full.n_students and (len(rows) == 0 or rows[-1] == len(rows) - 1):
+        return full
+    return cache.get_or_build((dataset.key, filter_key), lambda: full.subset(rows))
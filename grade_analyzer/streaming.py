@@ -0,0 +1,261 @@
+"""
+메모리보다 큰 CSV를 위한 스트리밍(청크) 수집 모드.
+
+CSV를 청크 단위로 읽으면서 전체 DataFrame을 만들지 않은 채 요약 통계만 누적합니다.
+요약(summarize_stream)은 청크의 점수 컬럼을 곧바로 float64 행렬로 바꿔 넘기고, 청크 자체를
+보관해야 하는 호출자는 점수를 uint8/float32, 이름/학번을 범주형으로 줄인 청크를
+iter_compact_chunks로 받습니다. 메모리 사용량은 파일 크기가 아니라 청크 크기와 과목 수에만
+비례하며, 경로를 넘기면 파일 전체를 메모리에 올리지 않습니다.
+"""
+import numpy as np
+import pandas as pd
+
+from grade_analyzer.ingest import TEXT_COLUMNS, detect_score_columns
+from grade_analyzer.validation import MAX_PLAUSIBLE_SCORE
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# 분위수 스케치 격자: 0.1점 단위 칸별 개수를 셉니다. 처음에는 0~100점이고, 관측한 최솟값/최댓값이
+# 벗어나면 같은 간격으로 격자를 넓히므로 소수 첫째 자리까지의 점수라면 중앙값/분위수가 정확합니다.
+# ±SKETCH_LIMIT(점수로 볼 수 있는 최대값)을 넘는 값은 격자에 넣지 않고 과목별로 세어, 그 과목의
+# 분위수는 NaN으로 둡니다 (잘못된 값을 보고하지 않도록).
+SKETCH_LO = 0.0
+SKETCH_HI = 100.0
+SKETCH_STEP = 0.1
+SKETCH_LIMIT = MAX_PLAUSIBLE_SCORE
+
+
+def downcast_scores(chunk, score_cols):
+    """점수 컬럼을 0~255 정수면 uint8, 그 밖에는 float32로 줄입니다. 이름/학번은 범주형으로 바꿉니다."""
+    for col in score_cols:
+        values = pd.to_numeric(chunk[col], errors='coerce')
+        if values.notna().all() and (values % 1 == 0).all() and values.between(0, 255).all():
+            chunk[col] = values.astype(np.uint8)
+        else:
+            chunk[col] = values.astype(np.float32)
+    for col in TEXT_COLUMNS:
+        if col in chunk.columns:
+            chunk[col] = chunk[col].astype(str).astype('category')
+    return chunk
+
+
+def iter_compact_chunks(source, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    CSV를 청크 단위로 읽어 (청크, 점수 컬럼) 쌍을 차례로 돌려줍니다.
+
+    점수 컬럼은 첫 청크에서 한 번만 감지하고 이후 청크에는 같은 컬럼을 적용합니다.
+    """
+    score_cols = None
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        if score_cols is None:
+            score_cols = detect_score_columns(chunk)
+        yield downcast_scores(chunk, score_cols), score_cols
+
+
+class StreamingSummary:
+    """
+    청크를 받을 때마다 갱신되는 과목별 요약 통계.
+
+    개수/합/편차제곱합/최솟값/최댓값과 상관계수용 공동적률(co-moment) 행렬은 청크별로
+    중심화한 뒤 병합(Chan 방식)하여 수치적으로 안정적입니다. 상관계수는 모든 과목 점수가
+    있는 행만 사용합니다.
+    """
+
+    def __init__(self, score_cols):
+        k = len(score_cols)
+        self.score_cols = list(score_cols)
+        self.n_rows = 0
+        self.count = np.zeros(k, dtype=np.int64)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+        # 상관계수용 (결측 없는 행 기준)
+        self.n_complete = 0
+        self.co_mean = np.zeros(k)
+        self.co_moment = np.zeros((k, k))
+        # 분위수/히스토그램 스케치: 칸 번호 first_cell..(first_cell + 칸 수 - 1), 칸 값 = 번호 × SKETCH_STEP
+        self.first_cell = int(round(SKETCH_LO / SKETCH_STEP))
+        self.sketch = np.zeros((k, int(round(SKETCH_HI / SKETCH_STEP)) - self.first_cell + 1), dtype=np.int64)
+        # 스케치 범위(±SKETCH_LIMIT) 밖이라 분위수에서 뺀 값의 과목별 개수
+        self.out_of_range = np.zeros(k, dtype=np.int64)
+
+    def update(self, matrix):
+        """점수 행렬(행=학생, 열=과목) 청크 하나를 누적합니다."""
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.size == 0:
+            return self
+        self.n_rows += matrix.shape[0]
+        valid = ~np.isnan(matrix)
+
+        # 과목별 개수/평균/편차제곱합 병합
+        n_b = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_b = np.where(n_b > 0, np.nansum(matrix, axis=0) / np.maximum(n_b, 1), 0.0)
+        m2_b = np.nansum((matrix - mean_b) ** 2, axis=0)
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = np.where(n > 0, n_b / np.maximum(n, 1), 0.0)
+        self.mean = self.mean + delta * ratio
+        self.m2 = self.m2 + m2_b + delta ** 2 * n_a * ratio
+        self.count = n
+        if valid.any():
+            self.min = np.fmin(self.min, np.nanmin(np.where(valid, matrix, np.inf), axis=0))
+            self.max = np.fmax(self.max, np.nanmax(np.where(valid, matrix, -np.inf), axis=0))
+
+        # 공동적률 병합 (결측 없는 행만)
+        complete = matrix[valid.all(axis=1)]
+        if len(complete):
+            nb = complete.shape[0]
+            cmean_b = complete.mean(axis=0)
+            centered = complete - cmean_b
+            cm_b = centered.T @ centered
+            na = self.n_complete
+            total = na + nb
+            d = cmean_b - self.co_mean
+            self.co_moment += cm_b + np.outer(d, d) * na * nb / total
+            self.co_mean += d * nb / total
+            self.n_complete = total
+
+        # 스케치: 0.1점 격자 칸 번호를 과목별로 bincount (관측 범위가 넓어지면 격자를 먼저 넓힙니다)
+        inside = valid & (np.abs(np.where(valid, matrix, 0.0)) <= SKETCH_LIMIT)
+        self.out_of_range += (valid & ~inside).sum(axis=0)
+        if inside.any():
+            cells = np.rint(np.where(inside, matrix, 0.0) / SKETCH_STEP).astype(np.int64)
+            self._extend(int(cells[inside].min()), int(cells[inside].max()))
+            n_cells = self.sketch.shape[1]
+            for j in range(matrix.shape[1]):
+                self.sketch[j] += np.bincount(cells[inside[:, j], j] - self.first_cell, minlength=n_cells)
+        return self
+
+    def _extend(self, low_cell, high_cell):
+        """스케치 격자가 칸 번호 low_cell..high_cell을 포함하도록 양쪽에 빈 칸을 덧붙입니다."""
+        before = max(0, self.first_cell - low_cell)
+        after = max(0, high_cell - (self.first_cell + self.sketch.shape[1] - 1))
+        if before or after:
+            self.sketch = np.pad(self.sketch, ((0, 0), (before, after)))
+            self.first_cell -= before
+
+    @property
+    def grid(self):
+        """스케치 칸별 점수 값."""
+        return np.round(np.arange(self.first_cell, self.first_cell + self.sketch.shape[1]) * SKETCH_STEP, 6)
+
+    # ---------- 과목별 통계 ----------
+    @property
+    def std(self):
+        """과목별 표본 표준편차 (ddof=1)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(np.where(self.count > 1, self.m2 / (self.count - 1), np.nan))
+
+    def quantiles(self, q):
+        """과목별 q 분위수 (numpy의 선형 보간과 동일한 정의). 스케치 범위 밖 값이 있던 과목은 NaN."""
+        grid = self.grid
+        return np.array([
+            _quantile_from_counts(self.sketch[j], grid, q) if not self.out_of_range[j] else np.nan
+            for j in range(len(self.score_cols))
+        ])
+
+    @property
+    def medians(self):
+        return self.quantiles(0.5)
+
+    @property
+    def corr(self):
+        """과목 간 상관계수 DataFrame."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scale = np.sqrt(np.diag(self.co_moment))
+            corr = self.co_moment / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=self.score_cols, columns=self.score_cols)
+
+    # ---------- 전체 점수 통계 ----------
+    @property
+    def overall_count(self):
+        return int(self.count.sum())
+
+    @property
+    def overall_mean(self):
+        """전체 점수의 평균. 점수가 하나도 없으면 NaN."""
+        n = self.overall_count
+        return float((self.mean * self.count).sum() / n) if n else np.nan
+
+    @property
+    def overall_std(self):
+        """전체 점수의 모표준편차 (ddof=0). 점수가 하나도 없으면 NaN."""
+        n = self.overall_count
+        if not n:
+            return np.nan
+        m2 = self.m2.sum() + (self.count * (self.mean - self.overall_mean) ** 2).sum()
+        return float(np.sqrt(m2 / n))
+
+    @property
+    def overall_median(self):
+        if self.out_of_range.any():
+            return np.nan
+        return _quantile_from_counts(self.sketch.sum(axis=0), self.grid, 0.5)
+
+    @property
+    def overall_min(self):
+        return float(self.min.min()) if self.overall_count else np.nan
+
+    @property
+    def overall_max(self):
+        return float(self.max.max()) if self.overall_count else np.nan
+
+    def histogram(self, bin_edges):
+        """
+        전체 점수의 구간별 개수를 스케치로부터 계산합니다. 마지막 구간은 오른쪽 끝을 포함하고,
+        스케치 범위 밖 값(out_of_range)은 세지 않습니다.
+        """
+        cells = self.sketch.sum(axis=0)
+        which = np.clip(np.searchsorted(bin_edges, self.grid, side='right') - 1, 0, len(bin_edges) - 2)
+        return np.bincount(which, weights=cells, minlength=len(bin_edges) - 1).astype(np.int64)
+
+    def summary_table(self):
+        """GradeStats.summary_table과 같은 형식의 과목별 통계표."""
+        return pd.DataFrame({
+            '과목': self.score_cols,
+            '평균': np.where(self.count > 0, self.mean, np.nan),
+            '중앙값': self.medians,
+            '표준편차': self.std,
+            '최고점': np.where(self.count > 0, self.max, np.nan),
+            '최저점': np.where(self.count > 0, self.min, np.nan),
+        })
+
+
+def _quantile_from_counts(counts, grid, q):
+    """격자 칸별 개수로부터 q 분위수를 구합니다."""
+    n = counts.sum()
+    if n == 0:
+        return np.nan
+    cum = np.cumsum(counts)
+    h = (n - 1) * q
+    lo, hi = int(np.floor(h)), int(np.ceil(h))
+    v_lo = grid[np.searchsorted(cum, lo, side='right')]
+    v_hi = grid[np.searchsorted(cum, hi, side='right')]
+    return float(v_lo + (v_hi - v_lo) * (h - lo))
+
+
+def _score_matrix(chunk, score_cols):
+    # 점수 컬럼을 숫자로 바꾸며 바로 float64 행렬에 채웁니다 (읽을 수 없는 칸은 NaN)
+    matrix = np.empty((len(chunk), len(score_cols)))
+    for j, col in enumerate(score_cols):
+        matrix[:, j] = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return matrix
+
+
+def summarize_stream(source, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    CSV(경로 또는 파일 객체)를 스트리밍으로 읽어 StreamingSummary를 반환합니다.
+
+    전체 DataFrame은 만들지 않으며 한 번에 청크 하나만 메모리에 올립니다. 점수 컬럼은 첫 청크에서
+    한 번만 감지합니다. 헤더만 있는 파일이면 점수가 없는 요약(overall_count == 0)을 반환합니다.
+    """
+    summary = None
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        if summary is None:
+            summary = StreamingSummary(detect_score_columns(chunk))
+        summary.update(_score_matrix(chunk, summary.score_cols))
+    return summary
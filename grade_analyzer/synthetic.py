@@ -0,0 +1,70 @@
+"""
+재현 가능한 가상 성적표 생성기.
+
+벤치마크와 데모용으로 학생 수, 과목, 반 수, 결측 비율, 점수 분포 모양을 바꿔 가며
+같은 시드에서 항상 같은 데이터를 만듭니다.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_SUBJECTS = ('국어', '영어', '수학', '과학', '사회')
+DISTRIBUTIONS = ('uniform', 'normal', 'skewed', 'bimodal')
+
+
+def _subject_names(subjects):
+    if isinstance(subjects, int):
+        base = list(DEFAULT_SUBJECTS)
+        return base[:subjects] if subjects <= len(base) else base + [f'선택{i}' for i in range(1, subjects - len(base) + 1)]
+    return list(subjects)
+
+
+def _ability(rng, n, distribution):
+    """학생별 기본 실력(0~100 척도의 평균 점수)을 분포 모양에 따라 뽑습니다."""
+    if distribution == 'uniform':
+        return rng.uniform(60, 100, n)
+    if distribution == 'normal':
+        return rng.normal(75, 12, n)
+    if distribution == 'skewed':
+        # 고득점 쪽으로 몰린 분포 (왼쪽 꼬리가 긴 형태)
+        return 100 * rng.beta(5, 1.8, n)
+    if distribution == 'bimodal':
+        upper = rng.random(n) < 0.5
+        return np.where(upper, rng.normal(85, 6, n), rng.normal(58, 8, n))
+    raise ValueError(f"distribution은 {', '.join(DISTRIBUTIONS)} 중 하나여야 합니다: {distribution}")
+
+
+def generate_gradebook(n_students=30, subjects=DEFAULT_SUBJECTS, n_classes=1, missing_rate=0.0,
+                       distribution='normal', subject_spread=8.0, seed=42):
+    """
+    가상 성적표 DataFrame을 만듭니다.
+
+    각 학생의 점수는 '기본 실력 + 과목별 난이도 + 개인별 편차'로 만들어 과목 간에 양의
+    상관관계가 생기며, 0~100 정수로 자릅니다. missing_rate 비율의 점수는 결측(NaN)으로 비웁니다.
+    subjects에는 과목 이름 목록이나 과목 수를 줄 수 있고, n_classes가 2 이상이면 '반' 컬럼을 추가합니다.
+    """
+    rng = np.random.default_rng(seed)
+    subject_names = _subject_names(subjects)
+    k = len(subject_names)
+
+    ability = _ability(rng, n_students, distribution)
+    difficulty = rng.normal(0, 4, k)
+    scores = ability[:, None] + difficulty[None, :] + rng.normal(0, subject_spread, (n_students, k))
+    scores = np.clip(np.rint(scores), 0, 100)
+
+    width = max(3, len(str(n_students)))
+    df = pd.DataFrame({
+        '학번': [f'S{i:0{width}d}' for i in range(1, n_students + 1)],
+        '이름': [f'학생{i}' for i in range(1, n_students + 1)],
+    })
+    if n_classes > 1:
+        class_names = np.array([f'{c}반' for c in range(1, n_classes + 1)], dtype=object)
+        df['반'] = class_names[rng.integers(0, n_classes, n_students)]
+
+    if missing_rate > 0:
+        scores[rng.random(scores.shape) < missing_rate] = np.nan
+        for i, name in enumerate(subject_names):
+            df[name] = scores[:, i]
+    else:
+        for i, name in enumerate(subject_names):
+            df[name] = scores[:, i].astype(np.int64)
+    return df
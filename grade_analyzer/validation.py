@@ -0,0 +1,192 @@
+"""
+업로드 직후의 검증·변환 단계.
+
+컬럼 이름 규칙(스키마)과 값 규칙으로 성적 컬럼을 가려낸 뒤, 성적 컬럼을 컬럼당 한 번의
+벡터 연산으로 숫자로 바꿉니다. '결시' 같은 결시 표기와 빈 칸은 결측(NaN)이 되고, 숫자로
+읽을 수 없는 칸은 결측으로 바꾼 뒤 거부된 칸 목록으로 보고합니다. 이미 숫자형인 컬럼은
+변환하지 않으므로 깨끗한 파일에서는 추가 비용이 거의 없습니다.
+"""
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# 숫자형이지만 성적이 아닌 식별자 컬럼
+ID_COLUMNS = ('학번',)
+# 문자열로 유지하는 텍스트 컬럼
+TEXT_COLUMNS = ('학번', '이름')
+# 숫자형이어도 성적이 아닌 소속(그룹) 컬럼
+GROUP_COLUMNS = ('학년', '반')
+# 값과 관계없이 성적 컬럼으로 보는 과목 이름
+KNOWN_SUBJECTS = (
+    '국어', '영어', '수학', '과학', '사회', '한국사', '역사', '도덕', '물리', '화학', '생명과학', '지구과학',
+    '통합과학', '통합사회', '기술가정', '정보', '음악', '미술', '체육', '제2외국어', '한문',
+)
+# 이름에 들어 있으면 식별자로 보는 말
+ID_NAME_PATTERN = re.compile(r'번호|코드|전화|연락처|생년|주민|(^|[^a-z])id([^a-z]|$)', re.IGNORECASE)
+# 결시/미응시 표기: 결측으로 바꾸되 거부된 칸으로 세지 않습니다
+ABSENCE_TOKENS = frozenset({'결시', '결석', '미응시', '미제출', '면제', '-', '--', '.', 'X', 'x', 'N/A', 'n/a', 'NA', 'na', '없음'})
+# 이름 규칙에 걸리지 않은 문자열 컬럼을 성적으로 보려면 (결시 표기를 뺀) 값 중 이 비율 이상이 숫자여야 합니다
+MIN_NUMERIC_SHARE = 0.8
+# 이 값을 넘는 정수가 대부분인 컬럼은 점수가 아니라 식별자(예: 20240101)로 봅니다
+MAX_PLAUSIBLE_SCORE = 1000
+# 점수로 보기에 범위를 벗어났다고 경고하는 기준 (값은 그대로 둡니다)
+SCORE_RANGE = (0, 100)
+# 보고서에 남기는 거부된 칸의 최대 개수
+MAX_REJECTED_ROWS = 1000
+
+
+@dataclass
+class ValidationReport:
+    """검증 결과: 성적 컬럼, 제외한 컬럼과 이유, 컬럼별 결시/거부/범위 밖 칸 수, 거부된 칸 목록."""
+    score_cols: list
+    skipped: dict = field(default_factory=dict)
+    absent: dict = field(default_factory=dict)
+    rejected_counts: dict = field(default_factory=dict)
+    out_of_range: dict = field(default_factory=dict)
+    rejected: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=['행', '컬럼', '값']))
+
+    @property
+    def n_absent(self):
+        return sum(self.absent.values())
+
+    @property
+    def n_rejected(self):
+        return sum(self.rejected_counts.values())
+
+    @property
+    def has_issues(self):
+        return bool(self.n_absent or self.n_rejected or self.out_of_range)
+
+    def to_dict(self):
+        """저장소 메타데이터(JSON)에 넣을 dict."""
+        return {
+            'score_cols': self.score_cols,
+            'skipped': self.skipped,
+            'absent': self.absent,
+            'rejected_counts': self.rejected_counts,
+            'out_of_range': self.out_of_range,
+            'rejected': self.rejected.astype({'값': str}).to_dict('list'),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['score_cols'], data['skipped'], data['absent'], data['rejected_counts'], data['out_of_range'],
+            pd.DataFrame(data['rejected'], columns=['행', '컬럼', '값']),
+        )
+
+
+def _name_reason(name):
+    """컬럼 이름만으로 성적이 아니라고 볼 이유. 이름으로 판단할 수 없으면 None."""
+    name = str(name)
+    if name in TEXT_COLUMNS or name in ID_COLUMNS:
+        return '식별자/이름'
+    if name in GROUP_COLUMNS:
+        return '소속(그룹)'
+    if name not in KNOWN_SUBJECTS and ID_NAME_PATTERN.search(name):
+        return '식별자로 보이는 이름'
+    return None
+
+
+def _value_reason(values):
+    """숫자로 바꾼 값만으로 성적이 아니라고 볼 이유. 성적 컬럼이면 None."""
+    valid = values[~np.isnan(values)]
+    if valid.size == 0:
+        return '값 없음'
+    if (np.abs(valid) > MAX_PLAUSIBLE_SCORE).mean() > 0.5:
+        return '점수 범위를 크게 벗어난 값 (식별자로 보임)'
+    # 0 또는 1부터 1씩 늘어나는 고유한 정수(순번)는 점수가 아닙니다
+    lo, hi = valid.min(), valid.max()
+    if valid.size >= 10 and lo in (0, 1) and hi - lo + 1 == valid.size and (valid % 1 == 0).all():
+        if (np.diff(np.sort(valid)) == 1).all():
+            return '순번으로 보이는 값'
+    return None
+
+
+def _looks_numeric(series, sample_size=200):
+    # 문자열 컬럼 전체를 변환하기 전에 앞부분 표본으로 숫자 컬럼일 가능성을 확인합니다
+    sample = series.dropna().head(sample_size)
+    if sample.empty:
+        return True
+    text = sample.astype(str).str.strip()
+    text = text[~text.isin(ABSENCE_TOKENS) & (text != '')]
+    return text.empty or pd.to_numeric(text, errors='coerce').notna().mean() >= MIN_NUMERIC_SHARE / 2
+
+
+def _coerce(series):
+    """
+    컬럼 하나를 float64 배열로 바꿔 (값, 결시 마스크, 거부 마스크)를 반환합니다.
+
+    숫자형 컬럼은 그대로 읽고, 문자열 컬럼은 pd.to_numeric으로 한꺼번에 변환한 뒤
+    실패한 칸만 문자열로 보고 결시 표기인지 확인합니다.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return values, np.isnan(values), np.zeros(len(values), dtype=bool)
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    failed = np.isnan(values)
+    absent = series.isna().to_numpy()
+    candidates = failed & ~absent
+    if candidates.any():
+        text = series[candidates].astype(str).str.strip()
+        absent[candidates] = (text.isin(ABSENCE_TOKENS) | (text == '')).to_numpy()
+    return values, absent, failed & ~absent
+
+
+def detect_score_columns(df):
+    """이름 규칙과 값 규칙으로 고른 성적 컬럼 목록 (검증 보고서 없이 컬럼만 필요할 때)."""
+    return validate_frame(df)[1].score_cols
+
+
+def validate_frame(df):
+    """
+    성적 컬럼을 숫자(float64, 결측은 NaN)로 바꾼 새 DataFrame과 ValidationReport를 반환합니다.
+    성적이 아닌 컬럼은 그대로 둡니다.
+    """
+    # 컬럼을 통째로 바꿔 끼우기만 하므로 얕은 복사로 충분합니다 (원본 DataFrame은 바뀌지 않음)
+    df = df.copy(deep=False)
+    report = ValidationReport(score_cols=[])
+    rejected_frames = []
+    n_reported = 0
+    for col in df.columns:
+        series = df[col]
+        reason = _name_reason(col)
+        known = str(col) in KNOWN_SUBJECTS
+        numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+        if reason is None and not numeric and not known and not _looks_numeric(series):
+            reason = '숫자가 아닌 값'
+        coerced = None
+        if reason is None:
+            coerced = _coerce(series)
+            values, absent, rejected = coerced
+            present = (~absent).sum()
+            if not numeric and not known and (present == 0 or (present - rejected.sum()) / present < MIN_NUMERIC_SHARE):
+                # 문자열 컬럼은 결시 표기를 뺀 값의 대부분이 숫자여야 성적으로 봅니다
+                reason = '숫자가 아닌 값'
+            elif not known:
+                reason = _value_reason(values)
+        if reason is not None:
+            report.skipped[str(col)] = reason
+            continue
+
+        values, absent, rejected = coerced
+        report.score_cols.append(col)
+        if not numeric:
+            df[col] = values
+        if absent.any():
+            report.absent[str(col)] = int(absent.sum())
+        if rejected.any():
+            report.rejected_counts[str(col)] = int(rejected.sum())
+            rows = np.flatnonzero(rejected)[:max(MAX_REJECTED_ROWS - n_reported, 0)]
+            if len(rows):
+                rejected_frames.append(pd.DataFrame({'행': rows + 1, '컬럼': str(col), '값': series.iloc[rows].astype(str).to_numpy()}))
+                n_reported += len(rows)
+        lo, hi = SCORE_RANGE
+        outside = int(((values < lo) | (values > hi)).sum())
+        if outside:
+            report.out_of_range[str(col)] = outside
+    if rejected_frames:
+        report.rejected = pd.concat(rejected_frames, ignore_index=True)
+    return df, report
@@ -0,0 +1,393 @@
+"""
+시각화 분석 보기(view)별 결과 생성과 캐시.
+
+앱은 선택된 보기 하나만 그리고, 각 보기의 차트·표·분석 결과는
+(데이터셋 키, 필터 상태, 보기 이름, 보기 매개변수)를 키로 한 번만 만듭니다.
+같은 조건으로 보기를 다시 열거나 다른 위젯만 바뀐 재실행에서는 캐시된 결과를 그대로 씁니다.
+데이터가 크면 통계표·상관관계처럼 무거운 결과는 jobs 모듈의 백그라운드 작업으로 계산합니다.
+학생이 LARGE_DATA_ROWS명을 넘으면 큰 데이터 표시 모드로 바꿔, 점이 많은 차트는 WebGL로 그리고
+학생 명단과 학생 선택 목록은 전체를 보내지 않고 쪽 단위·검색 결과만 만듭니다.
+Plotly는 차트를 실제로 만들 때만 불러옵니다.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from grade_analyzer import clustering, significance
+from grade_analyzer.analysis import analyze_grades, generate_insights, generate_recommendations
+from grade_analyzer.charts import box_figure, histogram_counts, histogram_figure, score_bin_edges
+from grade_analyzer.grading import assign_grades, grade_counts, grade_positions
+from grade_analyzer.groups import GroupStats
+from grade_analyzer.jobs import INLINE_MAX_CELLS, default_runner
+from grade_analyzer.rules import default_rules
+from grade_analyzer.stats import StatsCache
+
+# 보기 이름 → 화면 제목 (표시 순서)
+VIEWS = {
+    'distribution': "📊 전체 점수 분포",
+    'subjects': "📈 과목별 비교",
+    'grades': "🏆 등급 분포",
+    'individual': "👤 개인별 분석",
+    'summary': "📉 통계 요약",
+    'insights': "💡 AI 기반 해석 및 추천",
+    'trends': "📅 시험별 추이",
+    'groups': "🏫 그룹 비교",
+    'profiles': "🧩 학습자 프로필",
+}
+# 이보다 학생이 많으면 큰 데이터 표시 모드로 그립니다
+LARGE_DATA_ROWS = 20_000
+# 큰 데이터 표시 모드에서 이름 검색 결과로 보여 줄 최대 학생 수
+MAX_NAME_MATCHES = 200
+# 히트맵 칸에 숫자를 쓰는 최대 과목 수 (넘으면 마우스를 올렸을 때만 보여 줍니다)
+ANNOTATE_MAX_SUBJECTS = 20
+
+_cache = StatsCache(max_entries=64, max_bytes=256 << 20, name='보기 결과')
+
+
+@dataclass
+class ViewContext:
+    """필터링이 끝난 뒤 모든 보기가 공유하는 입력. 보기 결과 캐시의 키를 만듭니다."""
+    dataset: object
+    stats: object
+    rows: object
+    names: object
+    index: object
+    filter_key: tuple
+    scale: object
+    group_col: str = None
+    owner: str = None
+    rules: object = None
+
+    @property
+    def score_cols(self):
+        return self.dataset.score_cols
+
+    @property
+    def rule_set(self):
+        """해석·추천 규칙표 (지정하지 않으면 기본 규칙표). 결과가 규칙에 따라 달라지는 보기는 key를 매개변수에 넣습니다."""
+        return self.rules or default_rules()
+
+    @property
+    def large(self):
+        """큰 데이터 표시 모드 여부 (필터링된 학생 수 기준)."""
+        return self.stats.n_students > LARGE_DATA_ROWS
+
+    @property
+    def scope(self):
+        """백그라운드 작업의 범위. 바뀌면 이 세션의 이전 작업은 취소 대상이 됩니다."""
+        return (self.dataset.key, self.filter_key)
+
+    def cached(self, view, params, build):
+        """(데이터셋, 필터 상태, 보기, 매개변수)별로 build() 결과를 한 번만 만듭니다."""
+        return _cache.get_or_build((self.dataset.key, self.filter_key, view, params), build)
+
+    def submit(self, name, params, build, inline=None):
+        """
+        build(job)을 (데이터셋, 필터 상태, 작업, 매개변수) 키의 백그라운드 작업으로 내고 Job을 반환합니다.
+        inline을 정하지 않으면 점수 행렬이 INLINE_MAX_CELLS보다 작을 때 바로 계산합니다.
+        """
+        if inline is None:
+            inline = self.stats.matrix.size < INLINE_MAX_CELLS
+        key = (self.dataset.key, self.filter_key, name, params)
+        return default_runner.submit(self.owner, name, key, build, scope=self.scope, inline=inline)
+
+    def job(self, name, params):
+        """이 세션이 같은 조건으로 낸 작업, 없으면 (어느 세션이 냈든) 이미 끝난 같은 조건의 작업. 둘 다 없으면 None."""
+        key = (self.dataset.key, self.filter_key, name, params)
+        job = default_runner.slot(self.owner, name)
+        if job is not None and job.key == key:
+            return job
+        job = default_runner.get(key)
+        return job if job is not None and job.done() and not job.failed else None
+
+
+def distribution_figure(ctx):
+    """전체 점수 히스토그램. 서버에서 구간별 개수만 계산해 학생 수와 무관한 크기로 전송합니다."""
+    def build():
+        stats = ctx.stats
+        bin_edges = score_bin_edges(stats.overall_min, stats.overall_max)
+        return histogram_figure(
+            histogram_counts(stats.flat, bin_edges), bin_edges, "전체 학생 점수 분포",
+            mean=stats.overall_mean, median=stats.overall_median
+        )
+    return ctx.cached('distribution', (), build)
+
+
+def subjects_figure(ctx):
+    """과목별 박스 플롯 (사분위수/수염을 미리 계산하고 이상값은 표본만 전송, 큰 데이터는 이상값을 WebGL로)."""
+    return ctx.cached('subjects', ctx.large, lambda: box_figure(
+        ctx.stats.matrix, ctx.score_cols, "과목별 점수 분포 (박스 플롯)", webgl=ctx.large
+    ))
+
+
+def grades(ctx, scale):
+    """필터링된 학생들의 평균 점수 기준 등급 (등급 분포 보기와 다운로드가 함께 사용)."""
+    return ctx.cached('grades', scale.name, lambda: assign_grades(ctx.stats.row_means, scale))
+
+
+def grade_view(ctx, scale):
+    """등급별 학생 수 막대 차트, 등급별 학생 수, 등급별 학생 행 위치 배열."""
+    def build():
+        import plotly.express as px
+
+        student_grades = grades(ctx, scale)
+        counts = grade_counts(student_grades)
+        fig = px.bar(
+            x=counts.index.astype(str),
+            y=counts.values,
+            title="등급별 학생 분포",
+            labels={'x': '등급', 'y': '학생 수'},
+            color=counts.index.astype(str),
+            color_discrete_map=scale.colors
+        )
+        return fig, counts, grade_positions(student_grades)
+    return ctx.cached('grade_view', scale.name, build)
+
+
+def search_names(ctx, query, limit=MAX_NAME_MATCHES):
+    """이름에 query가 들어 있는 학생 이름 (최대 limit명, 행 순서). query가 비어 있으면 앞에서부터 limit명."""
+    def build():
+        names = pd.Series(ctx.names, dtype=object)
+        if query:
+            names = names[names.astype(str).str.contains(query, regex=False)]
+        return names.head(limit).tolist()
+    return ctx.cached('search_names', (query, limit), build)
+
+
+def rank_order(ctx):
+    """석차 순 학생 행 위치 (석차표를 쪽 단위로 보여 줄 때 씁니다)."""
+    return ctx.cached('rank_order', (), lambda: np.argsort(ctx.stats.ranks.ranks, kind='stable'))
+
+
+def radar_figure(ctx, student_name, student_pos):
+    """학생 한 명과 반 평균의 과목별 레이더 차트."""
+    def build():
+        import plotly.graph_objects as go
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatterpolar(
+            r=ctx.stats.matrix[student_pos],
+            theta=ctx.score_cols,
+            fill='toself',
+            name=student_name
+        ))
+        fig.add_trace(go.Scatterpolar(
+            r=ctx.stats.col_means,
+            theta=ctx.score_cols,
+            fill='toself',
+            name='반 평균'
+        ))
+        fig.update_layout(
+            polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+            title=f"{student_name} 학생 성적 분석",
+            height=500
+        )
+        return fig
+    return ctx.cached('individual', (student_name, student_pos), build)
+
+
+def correlation_heatmap(stats, title, order=None):
+    """
+    과목 간 상관관계 히트맵. 칸에는 상관계수와 유의 표시(*)를, 마우스를 올리면 p값과 학생 수를 보여 줍니다.
+    order를 주면 과목을 그 순서로 배열하고, 과목이 ANNOTATE_MAX_SUBJECTS개를 넘으면 칸에 숫자를 쓰지 않습니다.
+    """
+    import plotly.express as px
+
+    if order is None:
+        order = np.arange(stats.n_subjects)
+    corr = stats.corr.iloc[order, order]
+    pvalues = significance.corr_pvalues(stats).iloc[order, order]
+    annotate = stats.n_subjects <= ANNOTATE_MAX_SUBJECTS
+    fig = px.imshow(
+        corr,
+        color_continuous_scale='RdBu_r',
+        zmin=-1, zmax=1,
+        title=title,
+        height=None if annotate else max(500, 16 * stats.n_subjects)
+    )
+    if annotate:
+        text = corr.map('{:.2f}'.format).to_numpy().astype(object) + significance.stars(pvalues)
+        fig.update_traces(text=text, texttemplate='%{text}')
+    fig.update_traces(
+        customdata=np.dstack([pvalues.to_numpy(), stats.pair_counts[np.ix_(order, order)]]),
+        hovertemplate='%{y} × %{x}<br>r = %{z:.3f}<br>p = %{customdata[0]:.4g}<br>학생 수 = %{customdata[1]}<extra></extra>'
+    )
+    return fig
+
+
+def subject_order(ctx):
+    """비슷한 과목끼리 이웃하도록 계층적 군집으로 정한 과목 순서."""
+    return ctx.cached('subject_order', (), lambda: clustering.subject_order(ctx.stats.corr))
+
+
+def correlation_figure(ctx, ordered=False):
+    """과목 간 상관관계 히트맵 (유의 표시 포함). ordered이면 계층적 군집 순서로 과목을 배열합니다."""
+    return ctx.cached('summary', ordered, lambda: correlation_heatmap(
+        ctx.stats, "과목 간 상관관계 분석", subject_order(ctx) if ordered else None
+    ))
+
+
+def summary_view(ctx, ordered=False):
+    """통계 요약 보기의 과목별 통계표와 상관관계 히트맵을 계산하는 작업. 통계표를 중간 결과로 먼저 알립니다."""
+    def build(job):
+        job.update(0, 2, "과목별 통계 계산 중...")
+        table = ctx.stats.summary_table()
+        job.update(1, 2, "과목 간 상관관계 계산 중...", partial=table)
+        return table, correlation_figure(ctx, ordered)
+    return ctx.submit('summary', ordered, build)
+
+
+def significance_view(ctx):
+    """
+    과목 쌍별 평균 차이 검정표(t-검정·Wilcoxon)와 이상치 (요약표, 목록)을 계산하는 작업.
+    Wilcoxon 순위 계산 묶음마다 진행률을 알립니다.
+    """
+    def build(job):
+        n_pairs = ctx.stats.n_subjects * (ctx.stats.n_subjects - 1) // 2
+        job.update(0, n_pairs, "과목 쌍별 검정 중...")
+        tests = significance.paired_tests(
+            ctx.stats, progress=lambda done, total: job.update(done, total, f"과목 쌍별 검정 중... ({done}/{total})")
+        )
+        return (tests, *significance.outliers(ctx.stats))
+    return ctx.submit('significance', (), build)
+
+
+def paired_t_tests(ctx):
+    """과목 쌍별 대응표본 t-검정표 (순위 검정 없이 행렬곱만으로 계산)."""
+    return ctx.cached('paired_t', (), lambda: significance.paired_tests(ctx.stats, wilcoxon=False))
+
+
+def average_z(ctx):
+    """학생 평균의 z점수 배열."""
+    return ctx.cached('average_z', (), lambda: significance.average_z(ctx.stats))
+
+
+def _analysis_figure(analysis):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if analysis['type'] == '개인':
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=list(analysis['scores'].keys()),
+            y=list(analysis['scores'].values()),
+            name='개인 성적',
+            marker_color='#1f77b4'
+        ))
+        fig.add_hline(y=analysis['class_avg'], line_dash="dash", line_color="red", annotation_text=f"반 평균: {analysis['class_avg']:.1f}")
+        fig.update_layout(
+            title=f"{analysis['name']} 학생 - 과목별 성적 비교",
+            xaxis_title="과목",
+            yaxis_title="점수",
+            height=400
+        )
+        return fig
+
+    subjects = list(analysis['scores_by_subject'].keys())
+    scores = list(analysis['scores_by_subject'].values())
+    fig = px.bar(
+        x=subjects,
+        y=scores,
+        title="반 전체 - 과목별 평균 성적",
+        labels={'y': '점수', 'x': '과목'},
+        color=scores,
+        color_continuous_scale='RdYlGn'
+    )
+    fig.add_hline(y=analysis['avg'], line_dash="dash", line_color="blue", annotation_text=f"전체 평균: {analysis['avg']:.1f}")
+    return fig
+
+
+def insight_view(ctx, student_name=None):
+    """
+    반 전체(student_name=None) 또는 학생 한 명의 분석 dict, 해석, 추천, 요약 차트.
+    """
+    def build():
+        if student_name is None:
+            analysis = analyze_grades(None, ctx.score_cols, stats=ctx.stats)
+        else:
+            student_pos = ctx.index.locate(ctx.rows, student_name)
+            analysis = analyze_grades(None, ctx.score_cols, student_name, ctx.stats, student_pos=student_pos)
+        return (
+            analysis,
+            generate_insights(analysis, ctx.rule_set),
+            generate_recommendations(analysis, rules=ctx.rule_set),
+            _analysis_figure(analysis),
+        )
+    return ctx.cached('insights', (student_name, ctx.rule_set.key), build)
+
+
+def group_stats(ctx):
+    """선택된 그룹 컬럼 기준 그룹별 통계 (모든 그룹을 한 번에 계산)."""
+    return ctx.cached('groups', ctx.group_col, lambda: GroupStats.from_dataset(ctx.dataset, ctx.stats, ctx.rows, ctx.group_col))
+
+
+def group_view(ctx, scale):
+    """그룹 비교 보기의 요약표와 그룹별 평균·과목 평균·등급 분포 차트."""
+    def build():
+        import plotly.express as px
+
+        groups = group_stats(ctx)
+        summary = groups.summary_table()
+        labels = summary['그룹'].astype(str)
+        height = max(400, 18 * groups.n_groups)
+        avg_fig = px.bar(
+            summary.assign(그룹=labels), x='평균', y='그룹', error_x='표준편차', orientation='h',
+            title="그룹별 평균 (오차 막대: 표준편차)", hover_data=['학생 수', '최고 과목', '최저 과목'], height=height
+        )
+        avg_fig.update_yaxes(autorange='reversed')
+        heatmap = px.imshow(
+            groups.subject_means_frame().set_axis(labels, axis=0),
+            text_auto='.1f' if groups.n_groups <= 40 else False,
+            color_continuous_scale='RdYlGn', aspect='auto',
+            title="그룹×과목 평균", height=height
+        )
+        table = groups.grade_table(grades(ctx, scale))
+        shares = table.div(table.sum(axis=1).where(lambda total: total > 0), axis=0) * 100
+        grade_fig = px.bar(
+            shares.set_axis(labels, axis=0).reset_index(names='그룹').melt(id_vars='그룹', var_name='등급', value_name='비율'),
+            x='비율', y='그룹', color='등급', orientation='h', color_discrete_map=scale.colors,
+            title="그룹별 등급 비율 (%)", height=height
+        )
+        grade_fig.update_yaxes(autorange='reversed')
+        return summary, avg_fig, heatmap, grade_fig
+    return ctx.cached('group_view', (ctx.group_col, scale.name), build)
+
+
+def group_tests(ctx):
+    """그룹 간 차이 검정표 (과목별·학생 평균 ANOVA와 Kruskal-Wallis)."""
+    return ctx.cached('group_tests', ctx.group_col, lambda: significance.group_tests(group_stats(ctx)))
+
+
+def group_detail(ctx, group):
+    """그룹 하나의 해석 문구와 과목 간 상관관계 히트맵."""
+    def build():
+        groups = group_stats(ctx)
+        analysis = next(a for a in groups.analyses() if a['group'] == group)
+        corr = correlation_heatmap(groups.group_stats(group), f"{group} 과목 간 상관관계")
+        return generate_insights(analysis, ctx.rule_set), corr
+    return ctx.cached('group_detail', (ctx.group_col, group, ctx.rule_set.key), build)
+
+
+def profile_view(ctx, k):
+    """학생을 k개 학습자 프로필로 나누는 작업. (LearnerProfiles, 요약표, 프로필×과목 z점수 히트맵)을 반환합니다."""
+    def build(job):
+        import plotly.express as px
+
+        job.update(0, 2, "학생 군집 계산 중...")
+        profiles = clustering.learner_profiles(ctx.stats, k)
+        job.update(1, 2, "차트 생성 중...")
+        annotate = ctx.stats.n_subjects <= ANNOTATE_MAX_SUBJECTS
+        fig = px.imshow(
+            profiles.z_centers,
+            text_auto='.2f' if annotate else False,
+            color_continuous_scale='RdBu_r',
+            zmin=-2, zmax=2, aspect='auto',
+            title="프로필별 과목 위치 (평균 z점수, 0 = 전체 평균)"
+        )
+        fig.update_traces(
+            customdata=profiles.centers.to_numpy(),
+            hovertemplate='%{y} · %{x}<br>z = %{z:.2f}<br>평균 점수 = %{customdata:.1f}<extra></extra>'
+        )
+        return profiles, profiles.summary_table(), fig
+    return ctx.submit('profiles', k, build)
@@ -1,13 +1,24 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import altair as alt
-import plotly.graph_objects as go
 import plotly.express as px
-from scipy import stats
-import io
+import sqlite3
+import uuid
 from datetime import datetime
 
+from grade_analyzer import columnar, export, groups, history, ingest, jobs, rules, significance, views
+from grade_analyzer.batch import build_reports_zip, bulk_analyze, summary_frame
+from grade_analyzer.cache import cache_metrics
+from grade_analyzer.charts import histogram_figure, score_bin_edges
+from grade_analyzer.grading import GRADE_SCALES
+from grade_analyzer.index import dataset_index
+from grade_analyzer.profiling import MEMORY_COLUMN, RerunProfiler
+from grade_analyzer.stats import dataset_stats, filtered_stats
+from grade_analyzer.streaming import SKETCH_LIMIT, summarize_stream
+
+# 데이터셋 DataFrame은 모든 세션이 공유하므로, 파생 객체를 고쳐도 원본이 바뀌지 않도록 copy-on-write로 둡니다
+pd.set_option('mode.copy_on_write', True)
+
 # 페이지 설정
 st.set_page_config(
     page_title="성적 데이터 시각화 분석기",
@@ -27,190 +38,512 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# ==================== AI 기반 분석 함수 ====================
-def analyze_grades(df_data, score_cols, student_name=None):
+# ==================== 성능 계측 ====================
+if 'profiler' not in st.session_state:
+    st.session_state.profiler = RerunProfiler()
+profiler = st.session_state.profiler
+with st.sidebar.expander("⏱️ 성능 계측"):
+    show_profiler = st.checkbox("구간별 소요 시간 패널 표시")
+    history_size = st.slider("표시할 최근 재실행 수", 5, 50, 20)
+    trace_memory = st.checkbox("메모리 추적 (tracemalloc)", help="구간별 최대 메모리 증가량을 기록합니다. 켜 두면 전체가 느려집니다.")
+    run_cprofile = st.checkbox("cProfile 수집", help="재실행 전체의 함수별 프로파일을 수집해 .prof 파일로 내려받을 수 있습니다.")
+lazy_views = st.sidebar.toggle(
+    "⚡ 선택한 보기만 계산",
+    value=True,
+    help="끄면 모든 시각화 보기를 탭으로 한 번에 계산합니다"
+)
+profiler.set_history(history_size)
+profiler.begin_run(trace_memory, run_cprofile)
+profiler_panel = st.sidebar.container()
+
+# ==================== 해석·추천 규칙 ====================
+# 학교별 규칙 파일을 올리면 해석·추천·일괄 리포트·내보내기가 모두 그 규칙표를 따릅니다
+rule_set = rules.default_rules()
+with st.sidebar.expander("📐 해석·추천 규칙"):
+    rules_file = st.file_uploader(
+        "해석 규칙 파일 (JSON)", type=["json"],
+        help="조건(when)과 문구 템플릿으로 이루어진 규칙표입니다. 기본 규칙 파일을 내려받아 고쳐 쓰세요."
+    )
+    if rules_file is not None:
+        try:
+            rule_set = rules.load_rules(rules_file.getvalue(), rules_file.name)
+            st.caption(f"✅ {rules_file.name}: 해석 규칙 {len(rule_set.insights)}개, 추천 규칙 {len(rule_set.recommendations)}개")
+        except ValueError as exc:
+            st.error(f"규칙 파일 오류: {exc}")
+            st.caption("기본 규칙을 사용합니다.")
+    st.download_button(
+        "📄 기본 규칙 파일 내려받기", rules.DEFAULT_RULES_PATH.read_bytes(),
+        file_name="default_rules.json", mime="application/json"
+    )
+
+# 이 세션이 낸 백그라운드 작업을 구분하는 식별자
+if 'job_owner' not in st.session_state:
+    st.session_state.job_owner = uuid.uuid4().hex
+
+# ==================== 백그라운드 작업 ====================
+# 작업 진행 상황을 다시 그리는 간격 (초)
+JOB_POLL_SECONDS = 0.5
+
+
+def render_job(job, render_result, render_partial=None):
     """
-    성적 데이터를 분석하고 비판적 해석 및 추천을 제공합니다.
+    끝난 작업은 결과를 바로 그립니다. 실행 중인 작업은 진행률과 중간 결과만 주기적으로 다시 그리는
+    fragment를 띄워 스크립트를 붙잡지 않고, 작업이 끝나면 앱을 한 번 다시 실행해 결과를 그립니다.
     """
-    analysis = {}
-    
-    if student_name and student_name in df_data['이름'].values:
-        # 개인별 분석
-        student = df_data[df_data['이름'] == student_name].iloc[0]
-        student_scores = student[score_cols].values
-        student_avg = student_scores.mean()
-        class_avg = df_data[score_cols].mean().mean()
-        
-        analysis['type'] = '개인'
-        analysis['name'] = student_name
-        analysis['avg'] = student_avg
-        analysis['class_avg'] = class_avg
-        analysis['strengths'] = score_cols[np.argsort(student_scores)[-2:]]  # 상위 2개 과목
-        analysis['weaknesses'] = score_cols[np.argsort(student_scores)[:2]]  # 하위 2개 과목
-        analysis['scores'] = dict(zip(score_cols, student_scores))
-        analysis['percentile'] = (df_data[score_cols].mean(axis=1) < student_avg).sum() / len(df_data) * 100
-        
+    if job.done():
+        render_result(job.result())
+        return
+
+    @st.fragment(run_every=JOB_POLL_SECONDS)
+    def poll():
+        if job.done():
+            st.rerun()
+        st.progress(job.fraction, text=job.text or "계산 중...")
+        if render_partial is not None and job.partial is not None:
+            render_partial(job.partial)
+
+    poll()
+
+# ==================== 시각화 보기 ====================
+# 각 보기는 ViewContext 하나만 받아 그리며, 차트와 분석 결과는 views 모듈의 캐시에서 가져옵니다
+
+# 큰 데이터 표시 모드에서 학생 표 한 쪽의 행 수
+PAGE_ROWS = 500
+
+
+def render_student_table(ctx, n_rows, build_page, key, formats=None):
+    """
+    학생 n_rows명의 표. build_page(slice)가 해당 범위의 DataFrame을 만듭니다. 큰 데이터 표시 모드에서는
+    PAGE_ROWS행씩 쪽을 나눠 보고 있는 쪽만 만들어 보내고, 아니면 전체를 한 번에 그립니다.
+    """
+    page_slice = slice(None)
+    if ctx.large and n_rows > PAGE_ROWS:
+        n_pages = -(-n_rows // PAGE_ROWS)
+        page = st.number_input(f"쪽 (전체 {n_pages:,}쪽, {n_rows:,}명)", 1, n_pages, 1, key=key)
+        page_slice = slice((page - 1) * PAGE_ROWS, min(page * PAGE_ROWS, n_rows))
+    st.dataframe(build_page(page_slice).style.format(formats or {}), use_container_width=True, hide_index=True)
+
+
+def pick_student(ctx, label):
+    """
+    학생 선택 위젯. 큰 데이터 표시 모드에서는 모든 이름을 선택 목록으로 보내지 않고
+    이름 검색어에 맞는 학생(최대 views.MAX_NAME_MATCHES명)만 목록에 넣습니다. 고른 학생이 없으면 None.
+    """
+    if not ctx.large:
+        return st.selectbox(label, ctx.names)
+    query = st.text_input(f"{label} - 이름 검색", help=f"학생이 많아 이름에 검색어가 들어간 학생 최대 {views.MAX_NAME_MATCHES}명만 목록에 보여 줍니다.")
+    matches = views.search_names(ctx, query.strip())
+    if not matches:
+        st.info("검색어에 맞는 학생이 없습니다.")
+        return None
+    return st.selectbox(label, matches)
+
+
+def render_distribution_view(ctx):
+    st.subheader("전체 점수 분포 (히스토그램)")
+    st.markdown("**기능**: 마우스를 올리면 구간별 학생 수 확인, 더블클릭하면 특정 범위 확대")
+    st.plotly_chart(views.distribution_figure(ctx), use_container_width=True)
+    
+    # 통계 정보
+    stats = ctx.stats
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("최고점", f"{stats.overall_max:.0f}")
+    with col2:
+        st.metric("최저점", f"{stats.overall_min:.0f}")
+    with col3:
+        st.metric("평균", f"{stats.overall_mean:.1f}")
+    with col4:
+        st.metric("표준편차", f"{stats.overall_std:.1f}")
+
+
+def render_subjects_view(ctx):
+    st.subheader("과목별 점수 비교")
+    st.markdown("**기능**: 각 과목별 성과 비교, 과목별 평균값 확인")
+    st.plotly_chart(views.subjects_figure(ctx), use_container_width=True)
+    
+    # 과목별 평균 표시
+    st.write("**과목별 평균 점수**")
+    cols = st.columns(len(ctx.score_cols))
+    for i, (col, avg) in enumerate(zip(ctx.score_cols, ctx.stats.col_means)):
+        cols[i].metric(col, f"{avg:.1f}")
+
+
+def render_grades_view(ctx):
+    st.subheader("등급 분포")
+    st.markdown("**기능**: A/B/C/D/F 또는 9등급 등 등급별 학생 수 파악, 성적대별 학생 분류")
+    fig, counts, members = views.grade_view(ctx, ctx.scale)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # 등급별 상세
+    st.write("**등급별 학생 명단**")
+    if ctx.names is None:
+        for grade, count in counts.items():
+            st.write(f"**{grade} 등급 ({count}명)**: N/A")
+    elif ctx.large:
+        # 이름을 한 줄로 이어 쓰면 수 MB의 문자열이 되므로 고른 등급만 쪽 단위 표로 보여 줍니다
+        grade = st.selectbox("명단을 볼 등급", list(members), format_func=lambda g: f"{g} 등급 ({len(members[g]):,}명)")
+        positions = members[grade]
+        render_student_table(
+            ctx, len(positions),
+            lambda page: pd.DataFrame({'이름': ctx.names[positions[page]], '평균': ctx.stats.row_means[positions[page]]}),
+            key='grade_page', formats={'평균': '{:.1f}'}
+        )
     else:
-        # 반 전체 분석
-        analysis['type'] = '반전체'
-        analysis['avg'] = df_data[score_cols].values.mean()
-        analysis['max'] = df_data[score_cols].values.max()
-        analysis['min'] = df_data[score_cols].values.min()
-        analysis['std'] = df_data[score_cols].values.std()
-        analysis['scores_by_subject'] = df_data[score_cols].mean().to_dict()
-        
-        # 강점/약점 과목
-        subject_means = df_data[score_cols].mean()
-        analysis['best_subject'] = subject_means.idxmax()
-        analysis['worst_subject'] = subject_means.idxmin()
-        analysis['best_avg'] = subject_means.max()
-        analysis['worst_avg'] = subject_means.min()
-    
-    return analysis
-
-def generate_insights(analysis):
-    """분석 결과로부터 비판적 해석을 생성합니다."""
-    insights = []
-    
-    if analysis['type'] == '개인':
-        # 개인별 해석
-        avg = analysis['avg']
-        class_avg = analysis['class_avg']
-        diff = avg - class_avg
-        
-        # 성과 평가
-        if avg >= 90:
-            insights.append(f"🌟 **최우수 성적**: {analysis['name']} 학생은 {avg:.1f}점의 우수한 성적을 기록했습니다. 이는 반 평균({class_avg:.1f}점)보다 {diff:+.1f}점 높습니다.")
-        elif avg >= 80:
-            insights.append(f"✅ **우수한 성적**: {analysis['name']} 학생은 {avg:.1f}점으로 양호한 수준입니다. (반 평균: {class_avg:.1f}점, 상위 {analysis['percentile']:.0f}%)")
-        elif avg >= 70:
-            insights.append(f"📊 **중상 수준**: {analysis['name']} 학생은 {avg:.1f}점으로 평균 수준입니다. (반 평균과의 격차: {diff:+.1f}점)")
+        for grade, positions in members.items():
+            st.write(f"**{grade} 등급 ({len(positions)}명)**: {', '.join(ctx.names[positions])}")
+
+
+def render_individual_view(ctx):
+    st.subheader("개인별 상세 분석")
+    st.markdown("**기능**: 특정 학생의 과목별 성적 비교, 전체 평균과 개인 성적 비교")
+    
+    if ctx.names is None:
+        st.warning("이름 컬럼이 없습니다.")
+        return
+    student_name = pick_student(ctx, "학생 선택")
+    if student_name is None:
+        return
+    student_pos = ctx.index.locate(ctx.rows, student_name)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        avg = ctx.stats.row_means[student_pos]
+        st.metric("개인 평균", f"{avg:.1f}")
+    with col2:
+        overall_avg = ctx.stats.col_means.mean()
+        st.metric("반 평균", f"{overall_avg:.1f}")
+    with col3:
+        diff = avg - overall_avg
+        z = views.average_z(ctx)[student_pos]
+        st.metric("평가", f"{diff:+.1f}", delta="상위" if diff > 0 else "하위",
+                  help=f"평균 z점수 {z:+.2f}: {significance.standing(z)} (|z| ≥ {significance.Z_CRITICAL:.2f}이면 유의)")
+    with col4:
+        ranks = ctx.stats.ranks
+        st.metric("석차", f"{ranks.ranks[student_pos]}위 / {ranks.n_ranked}명")
+    
+    # 과목별 성적 비교
+    st.plotly_chart(views.radar_figure(ctx, student_name, student_pos), use_container_width=True)
+    
+    st.write("**과목별 백분위** (동점자는 절반만 아래로 계산)")
+    st.dataframe(
+        pd.DataFrame({
+            '과목': ctx.score_cols,
+            '점수': ctx.stats.matrix[student_pos],
+            '백분위': ranks.subject_percentiles[student_pos],
+        }).style.format({'점수': '{:.0f}', '백분위': '{:.1f}'}, na_rep='-'),
+        use_container_width=True, hide_index=True
+    )
+
+
+def render_summary_view(ctx):
+    st.subheader("통계 요약")
+    st.markdown("**기능**: 전체 학생 성적의 통계적 분석")
+    
+    def show_table(table):
+        st.dataframe(table.style.format({'평균': '{:.2f}', '중앙값': '{:.2f}', '표준편차': '{:.2f}', '최고점': '{:.0f}', '최저점': '{:.0f}'}), use_container_width=True)
+    
+    def show_result(result):
+        table, corr_fig = result
+        show_table(table)
+        # 상관관계 히트맵
+        st.write("**과목 간 상관관계**")
+        st.plotly_chart(corr_fig, use_container_width=True)
+        st.caption("유의 표시: * p < 0.05, ** p < 0.01, *** p < 0.001 (상관계수가 0이라는 가설에 대한 양측 검정)")
+    
+    # 과목이 많으면 이름 순보다 비슷한 과목끼리 모인 순서가 읽기 쉽습니다
+    ordered = st.checkbox("비슷한 과목끼리 묶어 정렬 (계층적 군집)", value=len(ctx.score_cols) > views.ANNOTATE_MAX_SUBJECTS)
+    # 큰 데이터는 백그라운드에서 계산하고, 통계표가 먼저 나오면 상관관계를 기다리는 동안 보여 줍니다
+    render_job(views.summary_view(ctx, ordered), show_result, show_table)
+    
+    # 과목 간 평균 차이 검정과 이상치 (과목 수의 제곱에 비례해 무거우므로 선택했을 때만 계산)
+    if st.checkbox("과목 간 차이 검정 및 이상치 보기"):
+        def show_tests(result):
+            tests, outlier_summary, outlier_rows = result
+            st.write("**과목 쌍별 평균 차이 검정** (대응표본 t-검정, Wilcoxon 부호순위 검정, Holm 보정)")
+            st.dataframe(
+                tests.style.format({
+                    '평균 차이 (A-B)': '{:+.2f}', 't': '{:.2f}', '효과 크기 (d)': '{:+.2f}',
+                    't-검정 p': '{:.4g}', 'Wilcoxon p': '{:.4g}', '보정 p (Holm)': '{:.4g}'
+                }, na_rep='-'),
+                use_container_width=True, hide_index=True
+            )
+            st.write(f"**이상치** (Q1 - {significance.IQR_FACTOR}·IQR 미만 또는 Q3 + {significance.IQR_FACTOR}·IQR 초과)")
+            st.dataframe(outlier_summary.style.format({'Q1': '{:.1f}', 'Q3': '{:.1f}', '하한': '{:.1f}', '상한': '{:.1f}'}),
+                         use_container_width=True, hide_index=True)
+            if len(outlier_rows):
+                labels = ctx.names if ctx.names is not None else np.arange(1, ctx.stats.n_students + 1)
+                outlier_rows = outlier_rows.assign(행=np.asarray(labels)[outlier_rows['행']]).rename(columns={'행': '이름'})
+                st.dataframe(outlier_rows.style.format({'점수': '{:.0f}', 'z점수': '{:+.2f}'}),
+                             use_container_width=True, hide_index=True)
+        render_job(views.significance_view(ctx), show_tests)
+    
+    # 전체 학생 석차 (순위 엔진의 배열을 그대로 사용)
+    if st.checkbox("학생별 석차표 보기"):
+        ranks = ctx.stats.ranks
+        order = views.rank_order(ctx)
+        labels = ctx.names if ctx.names is not None else np.arange(1, ctx.stats.n_students + 1)
+        render_student_table(
+            ctx, len(order),
+            lambda page: pd.DataFrame({
+                '이름': labels[order[page]],
+                '평균': ctx.stats.row_means[order[page]],
+                '석차': ranks.ranks[order[page]],
+                '백분위': ranks.percentiles[order[page]],
+            }),
+            key='rank_page', formats={'평균': '{:.1f}', '백분위': '{:.1f}'}
+        )
+
+
+def render_insights_view(ctx):
+    st.subheader("💡 AI 기반 비판적 해석 및 행동 추천")
+    st.markdown("**기능**: 데이터 분석 결과를 토대로 비판적 해석과 실행 가능한 행동 방안을 제시합니다.")
+    
+    # 분석 유형 선택
+    analysis_type = st.radio("분석 유형 선택", ["📊 반 전체 분석", "👤 개인별 분석"], horizontal=True)
+    
+    result = None
+    if analysis_type == "👤 개인별 분석":
+        if ctx.names is not None:
+            student_name = pick_student(ctx, "분석할 학생 선택")
+            if student_name is not None:
+                result = views.insight_view(ctx, student_name)
         else:
-            insights.append(f"⚠️ **주의 필요**: {analysis['name']} 학생은 {avg:.1f}점으로 학습 지원이 필요합니다. (반 평균: {class_avg:.1f}점)")
-        
-        # 과목별 분석
-        strengths_str = ", ".join(analysis['strengths'])
-        weaknesses_str = ", ".join(analysis['weaknesses'])
-        insights.append(f"\n📚 **과목별 성과**:\n- ✨ 강점: {strengths_str}\n- 📌 개선 필요: {weaknesses_str}")
-        
+            st.warning("이름 컬럼이 없어 개인별 분석이 불가능합니다.")
     else:
-        # 반 전체 분석
-        avg = analysis['avg']
-        std = analysis['std']
-        
-        insights.append(f"📈 **반 전체 성적 분석**:\n- 평균: {avg:.1f}점\n- 최고: {analysis['max']:.0f}점 / 최저: {analysis['min']:.0f}점\n- 표준편차: {std:.2f}")
-        insights.append(f"\n🎯 **과목별 성과**:\n- 최강점: {analysis['best_subject']} ({analysis['best_avg']:.1f}점)\n- 개선필요: {analysis['worst_subject']} ({analysis['worst_avg']:.1f}점)\n- 격차: {analysis['best_avg'] - analysis['worst_avg']:.1f}점")
-        
-        # 학력 분포 평가
-        if std < 5:
-            insights.append(f"\n⚖️ **학력 분포**: 표준편차가 작아(σ={std:.2f}) 학생들의 성적 편차가 적습니다. (균등한 수준)")
+        result = views.insight_view(ctx)
+    
+    if result:
+        analysis, insights, recommendations, fig = result
+        # ========== 비판적 해석 섹션 ==========
+        st.markdown("### 📌 비판적 해석")
+        for insight in insights:
+            st.markdown(f'<div class="insight-box">{insight}</div>', unsafe_allow_html=True)
+        
+        # ========== 행동 추천 섹션 ==========
+        st.markdown("### 🎯 행동 연결 추천")
+        for i, rec in enumerate(recommendations, 1):
+            with st.expander(f"#{i}. {rec['title']}", expanded=(i==1)):
+                for action in rec['actions']:
+                    st.markdown(f'<div class="recommendation-box">✓ {action}</div>', unsafe_allow_html=True)
+        
+        # ========== 데이터 기반 통계 ==========
+        st.markdown("### 📊 참고 통계")
+        col1, col2, col3 = st.columns(3)
+        
+        if analysis['type'] == '개인':
+            with col1:
+                st.metric("개인 평균", f"{analysis['avg']:.1f}", delta=f"{analysis['avg'] - analysis['class_avg']:+.1f}")
+            with col2:
+                st.metric("반 평균", f"{analysis['class_avg']:.1f}")
+            with col3:
+                st.metric("상위 백분위", f"{analysis['percentile']:.0f}%")
         else:
-            insights.append(f"\n⚖️ **학력 분포**: 표준편차가 크므로(σ={std:.2f}) 학생별 학력 격차가 큼을 시사합니다.")
+            with col1:
+                st.metric("반 평균", f"{analysis['avg']:.1f}")
+            with col2:
+                st.metric("표준편차", f"{analysis['std']:.2f}")
+            with col3:
+                tests = views.paired_t_tests(ctx)
+                pair = tests[tests['과목 A'].isin([analysis['best_subject'], analysis['worst_subject']])
+                             & tests['과목 B'].isin([analysis['best_subject'], analysis['worst_subject']])]
+                p_value = pair['t-검정 p'].iloc[0] if len(pair) else np.nan
+                st.metric("학력 격차", f"{analysis['best_avg'] - analysis['worst_avg']:.1f}",
+                          help=f"{analysis['best_subject']}-{analysis['worst_subject']} 대응표본 t-검정 p = {p_value:.4g}")
+        
+        # ========== 시각적 요약 ==========
+        st.markdown("### 📈 점수 분포 시각화")
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # ========== 전체 학생 일괄 리포트 ==========
+    st.markdown("### 📦 전체 학생 일괄 리포트")
+    st.caption("필터링된 모든 학생의 해석·추천과 차트를 학생별 HTML 파일로 만들어 zip으로 내려받습니다.")
+    stats = ctx.stats
+    if st.button(f"📝 {stats.n_students}명 리포트 생성"):
+        def build_reports(job):
+            report_names = ctx.names if ctx.names is not None else [f"{i + 1}번" for i in range(stats.n_students)]
+            analyses = bulk_analyze(stats, report_names, ctx.rule_set)
+            job.update(0, len(analyses), "리포트 생성 중...", partial=summary_frame(analyses))
+            return build_reports_zip(
+                analyses, stats.col_means,
+                progress=lambda done, total: job.update(done, total, f"리포트 생성 중... ({done}/{total})"),
+                rules=ctx.rule_set
+            )
+        # 리포트 렌더링은 데이터 크기와 관계없이 백그라운드에서 실행합니다
+        ctx.submit('reports', ctx.rule_set.key, build_reports, inline=False)
+    report_job = ctx.job('reports', ctx.rule_set.key)
+    if report_job is not None:
+        render_job(
+            report_job,
+            lambda report_zip: st.download_button(
+                label="📥 전체 리포트 다운로드 (zip)",
+                data=report_zip,
+                file_name="student_reports.zip",
+                mime="application/zip"
+            ),
+            lambda table: st.dataframe(table.head(20), use_container_width=True, hide_index=True)
+        )
+
+
+def render_trends_view(ctx):
+    st.subheader("시험별 추이")
+    st.markdown("**기능**: 여러 시험을 기록해 반 전체·과목별·학생별 성적 변화를 추적")
+    store = history.default_history
+    
+    with st.expander("➕ 현재 데이터셋을 시험 기록에 추가", expanded=store.exam_for(ctx.dataset.key) is None):
+        st.caption("필터와 관계없이 데이터셋 전체가 시험 하나로 기록되며, 학생은 학번(없으면 이름)으로 구분합니다.")
+        col1, col2 = st.columns(2)
+        with col1:
+            exam_label = st.text_input("시험 이름", value=ctx.dataset.name or "")
+        with col2:
+            taken_on = st.date_input("시험일")
+        if st.button("기록에 추가"):
+            try:
+                store.append(ctx.dataset, exam_label, taken_on, stats=dataset_stats(ctx.dataset))
+                st.success(f"✅ '{exam_label}' 시험을 기록했습니다.")
+            except ValueError as exc:
+                st.error(str(exc))
+            except sqlite3.Error as exc:
+                st.error(f"시험 기록 저장소에 쓰지 못했습니다. 잠시 후 다시 시도하세요. ({exc})")
+    
+    exams = store.exams()
+    if exams.empty:
+        st.info("💡 기록된 시험이 없습니다. 위에서 현재 데이터셋을 시험 기록에 추가하세요.")
+        return
+    
+    # 반 전체 추이 (시험 추가 시 저장한 analyze_grades 결과)
+    st.write(f"**반 전체 평균 추이 ({len(exams)}회)**")
+    fig = px.line(exams, x='label', y='avg', error_y='std', markers=True, labels={'label': '시험', 'avg': '평균'})
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(
+        exams.drop(columns='exam_id').rename(columns={
+            'label': '시험', 'taken_on': '시험일', 'n_students': '학생 수', 'avg': '평균', 'std': '표준편차',
+            'best_subject': '최고 과목', 'worst_subject': '최저 과목'
+        }).style.format({'평균': '{:.1f}', '표준편차': '{:.2f}'}),
+        use_container_width=True
+    )
+    
+    # 과목별 추이
+    subject_trend = store.subject_trend()
+    fig = px.line(subject_trend, x='label', y='mean', color='subject', markers=True,
+                  title="과목별 평균 추이", labels={'label': '시험', 'mean': '평균', 'subject': '과목'})
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # 학생별 추이
+    students = store.students()
+    student = st.selectbox("추이를 볼 학생", list(students), format_func=lambda s: f"{students[s]} ({s})" if students[s] != s else s)
+    trend = store.student_trend(student)
+    subjects = [subject for subject in subject_trend['subject'].unique() if subject in trend.columns]
+    fig = px.line(trend, x='label', y=['평균', *subjects], markers=True,
+                  title=f"{students[student]} 학생 시험별 성적", labels={'label': '시험', 'value': '점수', 'variable': '과목'})
+    st.plotly_chart(fig, use_container_width=True)
+    
+    for insight in history.trend_insights(trend, subjects):
+        st.markdown(f'<div class="insight-box">{insight}</div>', unsafe_allow_html=True)
     
-    return insights
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**시험별 석차**")
+        st.dataframe(
+            trend[['label', '평균', '석차', 'n_students', '백분위']].rename(columns={'label': '시험', 'n_students': '응시 인원'})
+            .style.format({'평균': '{:.1f}', '백분위': '{:.0f}%'}),
+            use_container_width=True
+        )
+    with col2:
+        st.write("**누적 통계**")
+        st.dataframe(
+            store.student_totals(student).rename(columns={'subject': '과목', 'n': '응시 횟수', 'mean': '평균', 'std': '표준편차'})
+            .style.format({'평균': '{:.1f}', '표준편차': '{:.2f}'}, na_rep='-'),
+            use_container_width=True
+        )
 
-def generate_recommendations(analysis, df_data, score_cols):
-    """데이터 기반 행동 연결 추천을 생성합니다."""
-    recommendations = []
+
+def render_groups_view(ctx):
+    st.subheader("그룹 비교")
+    st.markdown("**기능**: 반/학년 등 그룹별 평균, 과목별 강약점, 등급 분포를 한 번에 비교")
     
-    if analysis['type'] == '개인':
-        avg = analysis['avg']
-        class_avg = analysis['class_avg']
-        scores = analysis['scores']
-        
-        # 점수대별 추천
-        if avg >= 90:
-            recommendations.append({
-                'title': '🏆 현재 성과 유지 및 심화',
-                'actions': [
-                    '현재 학습 방법 지속 - 효과적인 학습 습관 유지',
-                    '심화 학습 시작 - 상위권 대학 진학 준비',
-                    '피어 튜터링 - 다른 학생들 지도를 통한 심화 이해',
-                    '과학고/영재반 도전 검토'
-                ]
-            })
-        elif avg >= 80:
-            recommendations.append({
-                'title': '✅ 점진적 성과 향상',
-                'actions': [
-                    '약점 과목 집중 학습 - 특히 ' + ", ".join(analysis['weaknesses']) + ' 강화',
-                    '그룹 스터디 참여 - 협력 학습으로 이해도 증진',
-                    '주 3~4회 복습 일정 수립',
-                    '월 1회 성적 점검 및 학습 계획 수정'
-                ]
-            })
-        elif avg >= 70:
-            recommendations.append({
-                'title': '📚 적극적인 학습 지원 필요',
-                'actions': [
-                    '개인 튜터링 - 특히 ' + analysis['weaknesses'][0] + ' 과목 집중',
-                    '교과서 기본 개념 재학습 - 고등학교 내용 선행 학습',
-                    '매일 학습 일정 수립 (최소 2시간)',
-                    '학교 보충수업 필수 참여'
-                ]
-            })
-        else:
-            recommendations.append({
-                'title': '🆘 긴급 학습 지원 필요',
-                'actions': [
-                    '전담 튜터 배정 또는 학습 컨설팅 상담',
-                    '심리 상담 - 학습 동기 부족 원인 파악',
-                    '기초 학력 진단 및 맞춤형 프로그램 시작',
-                    '학부모 면담 - 가정 지원 방안 논의',
-                    '진로 적성 검사 - 학습 목표 재설정'
-                ]
-            })
-        
-        # 약점 과목 맞춤 추천
-        weakest_subject = analysis['weaknesses'][0]
-        weak_score = scores[weakest_subject]
-        
-        if weak_score < 70:
-            recommendations.append({
-                'title': f'🎯 {weakest_subject} 과목 집중 개선 전략',
-                'actions': [
-                    f'문제점 진단 - {weakest_subject} 단원별 이해도 파악',
-                    f'기초 개념 강화 - 선행 학습 내용 복습',
-                    f'주 2회 과외 또는 온라인 강의 수강 고려',
-                    f'매주 연습 문제 10문제 이상 풀이',
-                    f'월말 진도율 점검'
-                ]
-            })
+    if ctx.group_col is None:
+        st.info("💡 사이드바의 '🏫 그룹 컬럼'에서 비교할 그룹(반, 학년 등)을 선택하세요.")
+        return
+    summary, avg_fig, heatmap, grade_fig = views.group_view(ctx, ctx.scale)
+    st.write(f"**{ctx.group_col}별 요약 ({len(summary)}개 그룹)**")
+    st.dataframe(
+        summary.style.format({
+            '평균': '{:.1f}', '표준편차': '{:.2f}', '최고 과목 평균': '{:.1f}', '최저 과목 평균': '{:.1f}', '학력 격차': '{:.1f}'
+        }),
+        use_container_width=True
+    )
+    st.plotly_chart(avg_fig, use_container_width=True)
+    st.plotly_chart(heatmap, use_container_width=True)
+    st.plotly_chart(grade_fig, use_container_width=True)
     
-    else:
-        # 반 전체 추천
-        best_subject = analysis['best_subject']
-        worst_subject = analysis['worst_subject']
-        gap = analysis['best_avg'] - analysis['worst_avg']
-        
-        if gap > 10:
-            recommendations.append({
-                'title': '⚠️ 과목별 학력 격차 해소 필요',
-                'actions': [
-                    f'{worst_subject} 과목에 추가 교육 자원 배분',
-                    f'{worst_subject} 과목 보충수업 운영 (주 2회)',
-                    f'우수 학생 피어 튜터 배치',
-                    f'{best_subject} 성공 사례 공유 및 학습법 전수',
-                    f'월 1회 진도율 및 성과 모니터링'
-                ]
-            })
+    # 그룹 간 차이가 우연으로 설명되는지 검정
+    st.write(f"**{ctx.group_col} 간 차이 검정** (일원분산분석, Kruskal-Wallis)")
+    st.dataframe(
+        views.group_tests(ctx).style.format({
+            'F': '{:.2f}', 'ANOVA p': '{:.4g}', 'η²': '{:.3f}', 'H': '{:.2f}', 'Kruskal p': '{:.4g}'
+        }, na_rep='-'),
+        use_container_width=True, hide_index=True
+    )
+    
+    # 그룹 하나의 해석과 과목 간 상관관계
+    group = st.selectbox("자세히 볼 그룹", summary['그룹'])
+    insights, corr_fig = views.group_detail(ctx, group)
+    for insight in insights:
+        st.markdown(f'<div class="insight-box">{insight}</div>', unsafe_allow_html=True)
+    st.plotly_chart(corr_fig, use_container_width=True)
+
+
+def render_profiles_view(ctx):
+    st.subheader("학습자 프로필")
+    st.markdown("**기능**: 과목별 성적 패턴이 비슷한 학생끼리 묶어(k-평균 군집) 학습자 유형과 유형별 강점·약점 파악")
+    
+    k = st.slider("프로필 수", 2, 8, 4)
+    
+    def show_profiles(result):
+        profiles, summary, fig = result
+        if not profiles.names:
+            st.info("점수가 있는 학생이 없습니다.")
+            return
+        st.dataframe(
+            summary.style.format({'비율 (%)': '{:.1f}', '평균': '{:.1f}', '평균 z점수': '{:+.2f}'}),
+            use_container_width=True, hide_index=True
+        )
+        st.caption("강점/약점 과목은 전체 학생 대비 위치(z점수)가 그 프로필의 평균 위치보다 가장 높은/낮은 과목입니다.")
+        st.plotly_chart(fig, use_container_width=True)
         
-        recommendations.append({
-            'title': '📊 전체 학력 향상 전략',
-            'actions': [
-                f'반 전체 평균 {analysis["avg"]:.1f}점 → 85점 목표 설정',
-                '주 1회 전체 팀 미팅으로 학습 현황 공유',
-                '월 2회 모의고사 실시 및 오답 분석',
-                f'저성취 학생({analysis["min"]:.0f}점 이하) 집중 관리',
-                '학습 동기 강화를 위한 인센티브 제도 도입'
-            ]
-        })
-    
-    return recommendations
+        # 프로필 하나의 학생 목록
+        profile = st.selectbox("학생 목록을 볼 프로필", profiles.names)
+        members = np.flatnonzero(profiles.labels == profiles.names.index(profile))
+        render_student_table(
+            ctx, len(members),
+            lambda page: pd.DataFrame({
+                '이름': ctx.names[members[page]] if ctx.names is not None else members[page] + 1,
+                '평균': ctx.stats.row_means[members[page]],
+                '석차': ctx.stats.ranks.ranks[members[page]],
+            }),
+            key='profile_page', formats={'평균': '{:.1f}'}
+        )
+    
+    render_job(views.profile_view(ctx, k), show_profiles)
+
+
+VIEW_RENDERERS = {
+    'distribution': render_distribution_view,
+    'subjects': render_subjects_view,
+    'grades': render_grades_view,
+    'individual': render_individual_view,
+    'summary': render_summary_view,
+    'insights': render_insights_view,
+    'trends': render_trends_view,
+    'groups': render_groups_view,
+    'profiles': render_profiles_view,
+}
+
 
 st.title("📊 성적 데이터 시각화 분석기")
 st.markdown("""
-성적 CSV 파일을 업로드하면 다양한 시각화와 통계 분석을 제공합니다.
+성적 CSV/Parquet/Arrow 파일을 업로드하면 다양한 시각화와 통계 분석을 제공합니다.
 - 📈 점수 분포, 등급 분포 확인
 - 🎯 과목별 성과 비교
 - 📍 개인별/반 전체 성적 분석
@@ -218,16 +551,33 @@ st.markdown("""
 - 💾 필터링된 데이터 다운로드
 """)
 
-# ==================== CSV 업로드 ====================
+# ==================== 파일 업로드 ====================
 st.header("1️⃣ 성적 데이터 업로드")
+dataset = None
 uploaded_file = st.file_uploader(
-    "CSV 파일을 선택하세요 (예: 학번, 이름, 국어, 영어, 수학, 과학, 사회)",
-    type=['csv'],
-    help="학생 성적 데이터를 담은 CSV 파일을 업로드하세요"
+    "CSV/Parquet/Arrow 파일을 선택하세요 (예: 학번, 이름, 국어, 영어, 수학, 과학, 사회)",
+    type=columnar.UPLOAD_EXTENSIONS,
+    help="학생 성적 데이터를 담은 CSV, Parquet 또는 Arrow(Feather) 파일을 업로드하세요"
+)
+streaming_mode = st.checkbox(
+    "🚀 대용량 스트리밍 모드",
+    help="전체 데이터를 메모리에 올리지 않고 청크 단위로 읽어 '전체 점수 분포'와 '통계 요약'만 계산합니다"
 )
 
 if uploaded_file is None:
-    st.info("💡 CSV 파일을 업로드하여 시작하세요!")
+    st.info("💡 성적 파일을 업로드하여 시작하세요!")
+    
+    # 이전에 수집한 데이터셋은 파싱 없이 메모리 맵으로 다시 열기
+    stored = columnar.default_store.list()
+    if stored:
+        stored_labels = {key: f"{name} ({datetime.fromtimestamp(mtime):%Y-%m-%d %H:%M})" for key, name, mtime in stored}
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            stored_key = st.selectbox("📂 저장된 데이터셋 다시 열기", list(stored_labels), format_func=stored_labels.get)
+        with col2:
+            st.write("")
+            if st.button("열기", use_container_width=True):
+                st.session_state.dataset_key = stored_key
     
     # 샘플 데이터 생성 옵션
     if st.button("📋 샘플 데이터로 시작하기"):
@@ -241,13 +591,77 @@ if uploaded_file is None:
             '과학': np.random.randint(70, 100, 30),
             '사회': np.random.randint(70, 100, 30),
         }
-        st.session_state.df = pd.DataFrame(sample_data)
+        with profiler.section("업로드"):
+            st.session_state.dataset_key = ingest.dataset_from_frame(pd.DataFrame(sample_data), '샘플 데이터').key
         st.success("✅ 샘플 데이터 로드됨!")
 
+elif streaming_mode and columnar.detect_format(uploaded_file.name) == 'csv':
+    # 청크 단위로 읽으며 요약 통계만 누적 (같은 업로드면 재계산하지 않음).
+    # 내용 해시를 구하려면 업로드 전체를 한 번 더 복사해야 하므로 업로드 번호(file_id)를 키로 씁니다.
+    cached = st.session_state.get('stream_summary')
+    if cached is None or cached[0] != uploaded_file.file_id:
+        uploaded_file.seek(0)
+        try:
+            with st.spinner("청크 단위로 읽는 중..."), profiler.section("업로드"):
+                st.session_state.stream_summary = (uploaded_file.file_id, summarize_stream(uploaded_file))
+        except ValueError as exc:
+            st.error(f"CSV를 읽지 못했습니다: {exc}")
+            st.stop()
+    summary = st.session_state.stream_summary[1]
+    st.success(f"✅ 스트리밍 집계 완료! ({summary.n_rows}명 학생, {len(summary.score_cols)}과목)")
+    st.caption("업로드한 파일은 Streamlit이 메모리에 보관합니다. 메모리보다 큰 파일은 `python -m grade_analyzer analyze --stream`으로 디스크에서 바로 읽으세요.")
+    if not summary.overall_count:
+        st.warning("⚠️ 점수가 하나도 없습니다. 성적 컬럼과 값이 들어 있는지 확인하세요.")
+        st.stop()
+    
+    st.header("2️⃣ 스트리밍 요약")
+    stream_tab1, stream_tab2 = st.tabs(["📊 전체 점수 분포", "📉 통계 요약"])
+    
+    if summary.out_of_range.any():
+        flagged = [col for col, n in zip(summary.score_cols, summary.out_of_range) if n]
+        st.warning(
+            f"⚠️ ±{SKETCH_LIMIT}점을 넘는 값이 있어 중앙값과 분포에서 뺐습니다: {', '.join(map(str, flagged))} "
+            "(해당 과목의 중앙값은 표시하지 않습니다)"
+        )
+    
+    with stream_tab1:
+        bin_edges = score_bin_edges(summary.overall_min, summary.overall_max)
+        median = summary.overall_median
+        fig = histogram_figure(
+            summary.histogram(bin_edges), bin_edges, "전체 학생 점수 분포",
+            mean=summary.overall_mean, median=None if np.isnan(median) else median
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("최고점", f"{summary.overall_max:.0f}")
+        with col2:
+            st.metric("최저점", f"{summary.overall_min:.0f}")
+        with col3:
+            st.metric("평균", f"{summary.overall_mean:.1f}")
+        with col4:
+            st.metric("표준편차", f"{summary.overall_std:.1f}")
+    
+    with stream_tab2:
+        st.dataframe(summary.summary_table().style.format({'평균': '{:.2f}', '중앙값': '{:.2f}', '표준편차': '{:.2f}', '최고점': '{:.0f}', '최저점': '{:.0f}'}), use_container_width=True)
+        st.write("**과목 간 상관관계**")
+        fig = px.imshow(
+            summary.corr,
+            text_auto='.2f' if len(summary.corr) <= views.ANNOTATE_MAX_SUBJECTS else False,
+            color_continuous_scale='RdBu_r',
+            zmin=-1, zmax=1,
+            title="과목 간 상관관계 분석"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    st.stop()
+
 else:
-    # CSV 파일 로드
-    df = pd.read_csv(uploaded_file)
-    st.session_state.df = df
+    # CSV 파일 로드 (같은 내용이면 캐시된 데이터셋 재사용)
+    with profiler.section("업로드"):
+        dataset = ingest.load_dataset(uploaded_file.getvalue(), uploaded_file.name)
+    st.session_state.dataset_key = dataset.key
+    df = dataset.df
     st.success(f"✅ 파일 로드 완료! ({len(df)}명 학생)")
     
     # 데이터 미리보기
@@ -255,16 +669,34 @@ else:
         st.dataframe(df.head(10), use_container_width=True)
 
 # ==================== 데이터 확인 및 필터링 ====================
-if 'df' in st.session_state:
-    df = st.session_state.df
+# 세션은 데이터셋 키만 들고 있고, 데이터셋 자체는 프로세스 공유 캐시(없으면 로컬 저장소)에서 찾습니다
+if dataset is None and 'dataset_key' in st.session_state:
+    dataset = ingest.load_stored_dataset(st.session_state.dataset_key)
+    if dataset is None:
+        del st.session_state.dataset_key
+        st.info("💡 공유 캐시에서 밀려난 데이터셋입니다. 파일을 다시 업로드하거나 샘플 데이터를 다시 불러오세요.")
+
+if dataset is not None:
+    df = dataset.df
     
-    # 성적 컬럼 자동 감지
-    score_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    if '학번' in score_cols:
-        score_cols.remove('학번')
+    # 성적 컬럼 (데이터셋 수집 시 한 번만 감지)
+    score_cols = dataset.score_cols
+    with profiler.section("필터링"):
+        full_stats = dataset_stats(dataset)
+        index = dataset_index(dataset)
     
     st.header("2️⃣ 데이터 필터링 및 통계")
     
+    # 그룹 비교 보기의 기준 컬럼 (반, 학년 등)
+    group_col = None
+    candidate_groups = groups.group_columns(dataset)
+    if candidate_groups:
+        group_col = st.sidebar.selectbox(
+            "🏫 그룹 컬럼", [None, *candidate_groups],
+            format_func=lambda col: "(없음)" if col is None else col,
+            help="선택한 컬럼으로 그룹별 지표를 한 번에 계산해 '그룹 비교' 보기에서 비교합니다"
+        )
+    
     col1, col2, col3 = st.columns(3)
     
     with col1:
@@ -272,9 +704,32 @@ if 'df' in st.session_state:
     with col2:
         st.metric("📖 과목 수", len(score_cols))
     with col3:
-        avg_score = df[score_cols].values.mean()
+        avg_score = full_stats.overall_mean
         st.metric("⭐ 평균 점수", f"{avg_score:.1f}")
     
+    # 수집 단계의 검증 결과 (결시/읽을 수 없는 칸은 이미 결측으로 바뀌어 있음)
+    report = dataset.report
+    if report is not None and report.has_issues:
+        st.warning(
+            f"⚠️ 결시/빈 칸 {report.n_absent}개와 읽을 수 없는 값 {report.n_rejected}개를 결측으로 처리했습니다. "
+            "평균 등 모든 통계는 결측을 제외하고 계산합니다."
+        )
+    if report is not None:
+        with st.expander("🧹 데이터 검증 결과"):
+            st.write(f"**성적 컬럼**: {', '.join(map(str, report.score_cols))}")
+            if report.skipped:
+                st.write("**성적에서 제외한 컬럼**: " + ", ".join(f"{col} ({reason})" for col, reason in report.skipped.items()))
+            counts = pd.DataFrame({
+                '결시/빈 칸': pd.Series(report.absent, dtype='int64'),
+                '거부된 값': pd.Series(report.rejected_counts, dtype='int64'),
+                '0~100 범위 밖': pd.Series(report.out_of_range, dtype='int64'),
+            }).fillna(0).astype(int)
+            if not counts.empty:
+                st.dataframe(counts, use_container_width=True)
+            if report.n_rejected:
+                st.write(f"**거부된 칸** (최대 {len(report.rejected)}개 표시, 행 번호는 헤더 다음 줄부터 1)")
+                st.dataframe(report.rejected, use_container_width=True, hide_index=True)
+    
     # 필터링 옵션
     with st.expander("🔍 필터링 옵션"):
         col1, col2 = st.columns(2)
@@ -283,293 +738,122 @@ if 'df' in st.session_state:
         with col2:
             max_score = st.slider("최대 점수", 0, 100, 100)
         
-        if '이름' in df.columns:
+        selected_student = []
+        if index.names is not None and len(df) > views.LARGE_DATA_ROWS:
+            # 학생이 많으면 모든 이름을 선택 목록으로 보내지 않고 이름을 직접 입력받습니다
+            typed = st.text_input("학생 이름 (쉼표로 구분, 비우면 전체)")
+            selected_student = list(dict.fromkeys(name.strip() for name in typed.split(',') if name.strip()))
+        elif index.names is not None:
             selected_student = st.multiselect("학생 선택 (선택 없으면 전체)", df['이름'].unique())
-            if selected_student:
-                df_filtered = df[df['이름'].isin(selected_student)]
-            else:
-                df_filtered = df
-        else:
-            df_filtered = df
         
-        # 점수 범위 필터
-        df_filtered = df_filtered[
-            (df_filtered[score_cols].mean(axis=1) >= min_score) & 
-            (df_filtered[score_cols].mean(axis=1) <= max_score)
-        ]
-    
-    st.write(f"**필터링 결과: {len(df_filtered)}명 학생**")
-    
-    # ==================== 시각화 1: 점수 분포 (히스토그램) ====================
-    st.header("3️⃣ 시각화 분석")
-    
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        "📊 전체 점수 분포",
-        "📈 과목별 비교",
-        "🏆 등급 분포",
-        "👤 개인별 분석",
-        "📉 통계 요약",
-        "💡 AI 기반 해석 및 추천"
-    ])
-    
-    with tab1:
-        st.subheader("전체 점수 분포 (히스토그램)")
-        st.markdown("**기능**: 마우스를 올리면 구간별 학생 수 확인, 더블클릭하면 특정 범위 확대")
-        
-        all_scores = df_filtered[score_cols].values.flatten()
-        
-        fig = px.histogram(
-            x=all_scores,
-            nbins=20,
-            title="전체 학생 점수 분포",
-            labels={'x': '점수', 'count': '학생 수'},
-            color_discrete_sequence=['#1f77b4']
-        )
-        fig.update_xaxes(range=[0, 105])
-        fig.add_vline(x=np.mean(all_scores), line_dash="dash", line_color="red", annotation_text=f"평균: {np.mean(all_scores):.1f}")
-        fig.add_vline(x=np.median(all_scores), line_dash="dot", line_color="green", annotation_text=f"중앙값: {np.median(all_scores):.1f}")
-        st.plotly_chart(fig, use_container_width=True)
+        # 등급 분포 보기와 다운로드의 등급 컬럼에 함께 쓰입니다
+        scale = GRADE_SCALES[st.selectbox("등급 체계", list(GRADE_SCALES))]
         
-        # 통계 정보
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("최고점", f"{np.max(all_scores):.0f}")
-        with col2:
-            st.metric("최저점", f"{np.min(all_scores):.0f}")
-        with col3:
-            st.metric("평균", f"{np.mean(all_scores):.1f}")
-        with col4:
-            st.metric("표준편차", f"{np.std(all_scores):.1f}")
+        # 정렬된 평균에서 점수 범위를 잘라내고 이름은 해시 인덱스로 조회 (행 위치만 반환)
+        with profiler.section("필터링"):
+            filtered_rows = index.select(min_score, max_score, selected_student)
     
-    with tab2:
-        st.subheader("과목별 점수 비교")
-        st.markdown("**기능**: 각 과목별 성과 비교, 과목별 평균값 확인")
-        
-        # 과목별 평균
-        subject_avg = df_filtered[score_cols].mean()
-        
-        # 박스 플롯
-        fig = go.Figure()
-        for col in score_cols:
-            fig.add_trace(go.Box(
-                y=df_filtered[col],
-                name=col,
-                boxmean='sd'
-            ))
-        fig.update_layout(
-            title="과목별 점수 분포 (박스 플롯)",
-            yaxis_title="점수",
-            height=500
-        )
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # 과목별 평균 표시
-        st.write("**과목별 평균 점수**")
-        cols = st.columns(len(score_cols))
-        
-        for i, col in enumerate(score_cols):
-            cols[i].metric(col, f"{subject_avg[col]:.1f}")
+    filter_key = (min_score, max_score, tuple(selected_student))
+    # 필터가 바뀌면 이 세션이 이전 조건으로 낸 백그라운드 작업은 더 기다리지 않습니다 (다른 세션이 없으면 취소)
+    jobs.default_runner.supersede(st.session_state.job_owner, (dataset.key, filter_key))
+    with profiler.section("필터링"):
+        grade_stats = filtered_stats(dataset, filter_key, filtered_rows)
+        filtered_names = index.names[filtered_rows] if index.names is not None else None
     
-    with tab3:
-        st.subheader("등급 분포")
-        st.markdown("**기능**: A/B/C/D/F 등급별 학생 수 파악, 성적대별 학생 분류")
-        
-        # 평균 점수 기준 등급 분류
-        def get_grade(score):
-            if score >= 90: return 'A'
-            elif score >= 80: return 'B'
-            elif score >= 70: return 'C'
-            elif score >= 60: return 'D'
-            else: return 'F'
-        
-        df_filtered['평균'] = df_filtered[score_cols].mean(axis=1)
-        df_filtered['등급'] = df_filtered['평균'].apply(get_grade)
-        
-        grade_counts = df_filtered['등급'].value_counts().sort_index(ascending=False)
-        
-        fig = px.bar(
-            x=grade_counts.index,
-            y=grade_counts.values,
-            title="등급별 학생 분포",
-            labels={'x': '등급', 'y': '학생 수'},
-            color=grade_counts.index,
-            color_discrete_map={'A': '#00cc66', 'B': '#0066cc', 'C': '#ffcc00', 'D': '#ff6600', 'F': '#cc0000'}
+    st.write(f"**필터링 결과: {len(filtered_rows)}명 학생**")
+    if len(filtered_rows) > views.LARGE_DATA_ROWS:
+        st.caption(
+            f"학생이 {views.LARGE_DATA_ROWS:,}명을 넘어 큰 데이터 표시 모드로 그립니다: 점이 많은 차트는 WebGL, "
+            f"학생 명단과 석차표는 {PAGE_ROWS}명씩 쪽 단위, 학생 선택은 이름 검색으로 바뀝니다."
         )
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # 등급별 상세
-        st.write("**등급별 학생 명단**")
-        for grade in ['A', 'B', 'C', 'D', 'F']:
-            if grade in df_filtered['등급'].values:
-                students = df_filtered[df_filtered['등급'] == grade]
-                st.write(f"**{grade} 등급 ({len(students)}명)**: {', '.join(students['이름'].values) if '이름' in students.columns else 'N/A'}")
-    
-    with tab4:
-        st.subheader("개인별 상세 분석")
-        st.markdown("**기능**: 특정 학생의 과목별 성적 비교, 전체 평균과 개인 성적 비교")
-        
-        if '이름' in df_filtered.columns:
-            student_name = st.selectbox("학생 선택", df_filtered['이름'].values)
-            student_data = df_filtered[df_filtered['이름'] == student_name].iloc[0]
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                avg = student_data[score_cols].mean()
-                st.metric("개인 평균", f"{avg:.1f}")
-            with col2:
-                overall_avg = df_filtered[score_cols].mean().mean()
-                st.metric("반 평균", f"{overall_avg:.1f}")
-            with col3:
-                diff = avg - overall_avg
-                st.metric("평가", f"{diff:+.1f}", delta="상위" if diff > 0 else "하위")
-            
-            # 과목별 성적 비교
-            fig = go.Figure()
-            fig.add_trace(go.Scatterpolar(
-                r=[student_data[col] for col in score_cols],
-                theta=score_cols,
-                fill='toself',
-                name=student_name
-            ))
-            fig.add_trace(go.Scatterpolar(
-                r=[df_filtered[col].mean() for col in score_cols],
-                theta=score_cols,
-                fill='toself',
-                name='반 평균'
-            ))
-            fig.update_layout(
-                polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-                title=f"{student_name} 학생 성적 분석",
-                height=500
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.warning("이름 컬럼이 없습니다.")
+    if len(filtered_rows) == 0:
+        st.warning("⚠️ 필터 조건에 맞는 학생이 없습니다. 점수 범위나 학생 선택을 조정하세요.")
+        st.stop()
     
-    with tab5:
-        st.subheader("통계 요약")
-        st.markdown("**기능**: 전체 학생 성적의 통계적 분석")
-        
-        # 통계표
-        stats_df = pd.DataFrame({
-            '과목': score_cols,
-            '평균': df_filtered[score_cols].mean().values,
-            '중앙값': df_filtered[score_cols].median().values,
-            '표준편차': df_filtered[score_cols].std().values,
-            '최고점': df_filtered[score_cols].max().values,
-            '최저점': df_filtered[score_cols].min().values,
-        })
-        
-        st.dataframe(stats_df.style.format({'평균': '{:.2f}', '중앙값': '{:.2f}', '표준편차': '{:.2f}', '최고점': '{:.0f}', '최저점': '{:.0f}'}), use_container_width=True)
-        
-        # 상관관계 히트맵
-        st.write("**과목 간 상관관계**")
-        corr_matrix = df_filtered[score_cols].corr()
-        
-        fig = px.imshow(
-            corr_matrix,
-            text_auto='.2f',
-            color_continuous_scale='RdBu_r',
-            zmin=-1, zmax=1,
-            title="과목 간 상관관계 분석"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    # ==================== 시각화 분석 ====================
+    st.header("3️⃣ 시각화 분석")
+    
+    view_ctx = views.ViewContext(
+        dataset, grade_stats, filtered_rows, filtered_names, index, filter_key, scale, group_col,
+        st.session_state.job_owner, rule_set
+    )
+    if lazy_views:
+        # 선택한 보기 하나만 계산하고 그립니다
+        view = st.radio("보기 선택", list(views.VIEWS), format_func=views.VIEWS.get, horizontal=True, label_visibility="collapsed")
+        with profiler.section(f"보기: {views.VIEWS[view]}"):
+            VIEW_RENDERERS[view](view_ctx)
+    else:
+        for tab, view in zip(st.tabs(list(views.VIEWS.values())), views.VIEWS):
+            with tab, profiler.section(f"보기: {views.VIEWS[view]}"):
+                VIEW_RENDERERS[view](view_ctx)
     
-    with tab6:
-        st.subheader("💡 AI 기반 비판적 해석 및 행동 추천")
-        st.markdown("**기능**: 데이터 분석 결과를 토대로 비판적 해석과 실행 가능한 행동 방안을 제시합니다.")
-        
-        # 분석 유형 선택
-        analysis_type = st.radio("분석 유형 선택", ["📊 반 전체 분석", "👤 개인별 분석"], horizontal=True)
-        
-        if analysis_type == "👤 개인별 분석":
-            if '이름' in df_filtered.columns:
-                selected_student = st.selectbox("분석할 학생 선택", df_filtered['이름'].values)
-                analysis = analyze_grades(df_filtered, score_cols, selected_student)
-            else:
-                st.warning("이름 컬럼이 없어 개인별 분석이 불가능합니다.")
-                analysis = None
-        else:
-            analysis = analyze_grades(df_filtered, score_cols)
-        
-        if analysis:
-            # ========== 비판적 해석 섹션 ==========
-            st.markdown("### 📌 비판적 해석")
-            insights = generate_insights(analysis)
-            for insight in insights:
-                st.markdown(f'<div class="insight-box">{insight}</div>', unsafe_allow_html=True)
-            
-            # ========== 행동 추천 섹션 ==========
-            st.markdown("### 🎯 행동 연결 추천")
-            recommendations = generate_recommendations(analysis, df_filtered, score_cols)
-            
-            for i, rec in enumerate(recommendations, 1):
-                with st.expander(f"#{i}. {rec['title']}", expanded=(i==1)):
-                    for action in rec['actions']:
-                        st.markdown(f'<div class="recommendation-box">✓ {action}</div>', unsafe_allow_html=True)
-            
-            # ========== 데이터 기반 통계 ==========
-            st.markdown("### 📊 참고 통계")
-            col1, col2, col3 = st.columns(3)
-            
-            if analysis['type'] == '개인':
-                with col1:
-                    st.metric("개인 평균", f"{analysis['avg']:.1f}", delta=f"{analysis['avg'] - analysis['class_avg']:+.1f}")
-                with col2:
-                    st.metric("반 평균", f"{analysis['class_avg']:.1f}")
-                with col3:
-                    st.metric("상위 백분위", f"{analysis['percentile']:.0f}%")
-            else:
-                with col1:
-                    st.metric("반 평균", f"{analysis['avg']:.1f}")
-                with col2:
-                    st.metric("표준편차", f"{analysis['std']:.2f}")
-                with col3:
-                    st.metric("학력 격차", f"{analysis['best_avg'] - analysis['worst_avg']:.1f}")
-            
-            # ========== 시각적 요약 ==========
-            st.markdown("### 📈 점수 분포 시각화")
-            if analysis['type'] == '개인':
-                # 개인별 레이더 차트 (이미 tab4에서 표시하므로, 여기서는 간단한 요약)
-                fig = go.Figure()
-                fig.add_trace(go.Bar(
-                    x=list(analysis['scores'].keys()),
-                    y=list(analysis['scores'].values()),
-                    name='개인 성적',
-                    marker_color='#1f77b4'
-                ))
-                fig.add_hline(y=analysis['class_avg'], line_dash="dash", line_color="red", annotation_text=f"반 평균: {analysis['class_avg']:.1f}")
-                fig.update_layout(
-                    title=f"{analysis['name']} 학생 - 과목별 성적 비교",
-                    xaxis_title="과목",
-                    yaxis_title="점수",
-                    height=400
-                )
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                # 반 전체 과목별 평균
-                subjects = list(analysis['scores_by_subject'].keys())
-                scores = list(analysis['scores_by_subject'].values())
-                
-                fig = px.bar(
-                    x=subjects,
-                    y=scores,
-                    title="반 전체 - 과목별 평균 성적",
-                    labels={'y': '점수', 'x': '과목'},
-                    color=scores,
-                    color_continuous_scale='RdYlGn'
-                )
-                fig.add_hline(y=analysis['avg'], line_dash="dash", line_color="blue", annotation_text=f"전체 평균: {analysis['avg']:.1f}")
-                st.plotly_chart(fig, use_container_width=True)
     
     # ==================== 데이터 다운로드 ====================
     st.header("4️⃣ 데이터 다운로드")
+    st.caption("파일은 '파일 준비'를 누를 때만 만들고, 같은 데이터·필터·형식이면 이미 만든 파일을 다시 씁니다.")
     
-    csv = df_filtered.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="📥 분석된 데이터 다운로드 (CSV)",
-        data=csv,
-        file_name="grades_analysis.csv",
-        mime="text/csv"
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        export_format = st.radio("파일 형식", export.available_formats(), horizontal=True)
+    with col2:
+        csv_bom = st.checkbox(
+            "Excel용 BOM 추가", value=True, disabled=export_format != "CSV",
+            help="CSV 앞에 UTF-8 BOM을 붙여 Excel에서 열어도 한글 헤더가 깨지지 않게 합니다"
+        )
+    if export.excel_engine() is None:
+        st.caption("Excel(.xlsx) 형식은 openpyxl 또는 xlsxwriter를 설치하면 사용할 수 있습니다.")
+    # 학생별 표에는 평균/석차/백분위/등급이, Excel·JSON에는 과목별 통계·등급 분포·반 전체 분석이 함께 들어갑니다
+    export_params = (
+        export_format, scale.name, csv_bom if export_format == "CSV" else None,
+        rule_set.key if export_format in ("Excel", "JSON") else None
     )
+    
+    def build_export(job):
+        job.update(0, len(filtered_rows), "내보낼 표 만드는 중...")
+        student_grades = views.grades(view_ctx, scale)
+        table = export.student_table(dataset, grade_stats, filtered_rows, student_grades)
+        tables = export.analysis_tables(grade_stats, student_grades, rule_set) if export_format in ("Excel", "JSON") else None
+        return export.export_bytes(
+            export_format, table, tables, bom=csv_bom,
+            progress=lambda done, total: job.update(done, total, f"{export_format} 인코딩 중... ({done:,}/{total:,}행)")
+        )
+    
+    too_many_rows = export_format == "Excel" and len(filtered_rows) > export.EXCEL_MAX_ROWS
+    if too_many_rows:
+        st.warning(f"⚠️ Excel 시트에는 최대 {export.EXCEL_MAX_ROWS:,}명까지 넣을 수 있습니다. CSV나 Parquet 형식을 사용하세요.")
+    if st.button(f"📦 {export_format} 파일 준비", disabled=too_many_rows):
+        with profiler.section("다운로드 인코딩"):
+            view_ctx.submit('export', export_params, build_export)
+    export_job = view_ctx.job('export', export_params)
+    if export_job is not None:
+        render_job(
+            export_job,
+            lambda export_data: st.download_button(
+                label=f"📥 분석된 데이터 다운로드 ({export_format}, {len(export_data) / 1024:,.0f}KB)",
+                data=export_data,
+                file_name=export.file_name(export_format),
+                mime=export.mime_type(export_format)
+            )
+        )
 
+# ==================== 성능 계측 패널 ====================
+profiler.end_run()
+if show_profiler:
+    with profiler_panel:
+        st.subheader("⏱️ 재실행별 구간 소요 시간 (ms)")
+        st.dataframe(profiler.history_frame().style.format(precision=1, na_rep='-'), use_container_width=True)
+        st.write("**공유 캐시 상태** (모든 세션 합계)")
+        st.dataframe(
+            cache_metrics().style.format({'적중률(%)': '{:.1f}', '메모리(MB)': '{:.1f}', '상한(MB)': '{:.0f}'}, na_rep='-'),
+            use_container_width=True, hide_index=True
+        )
+        if trace_memory:
+            st.write("**최근 재실행의 구간별 최대 메모리 증가량** (프로세스 전체 기준)")
+            if profiler.peaks_skipped:
+                st.caption("다른 세션도 메모리를 추적 중이라 구간별 최대 메모리는 기록하지 않았습니다 (서로의 측정을 덮어쓰므로).")
+            st.dataframe(profiler.memory_frame().style.format({MEMORY_COLUMN: '{:.2f}'}), use_container_width=True)
+            st.download_button("📥 메모리 스냅샷 (txt)", profiler.memory_text(), file_name="rerun_memory.txt", mime="text/plain")
+        if run_cprofile and profiler.last_profile is not None:
+            with st.expander("cProfile 상위 함수"):
+                st.code(profiler.profile_text())
+            st.download_button("📥 cProfile 결과 (.prof)", profiler.profile_bytes(), file_name="rerun.prof", mime="application/octet-stream")